@@ -0,0 +1,176 @@
+"""Animaciones de las acciones de combate guiadas por el tiempo de fotograma.
+
+:class:`ReproductorAnimaciones` convierte las acciones de cada turno en
+interpolaciones que avanzan con el tiempo transcurrido entre fotogramas, en
+lugar de detener el bucle principal. Todas las acciones de un turno forman
+una tanda y se animan a la vez; las tandas se reproducen en orden.
+
+Si los turnos llegan más rápido de lo que se animan, las tandas pendientes
+se fusionan: cada unidad conserva un único desplazamiento desde su primera
+casilla de origen hasta la última de destino y un único ataque o curación
+por objetivo. Las tandas que superan ``max_animaciones`` se recortan.
+"""
+
+import pygame
+
+import constantes as const
+
+# Duración en milisegundos de cada tanda a velocidad 1
+DURACION_ANIMACION = 200
+# Animaciones que pueden mostrarse a la vez
+MAX_ANIMACIONES = 500
+# Tandas que pueden esperar antes de fusionarse con la siguiente
+MAX_TANDAS_PENDIENTES = 2
+
+COLORES = {
+    "mover": (255, 255, 0),
+    "atacar": (255, 0, 0),
+    "curar": (0, 255, 0),
+}
+
+
+def _clave(accion: dict):
+    """Identifica las acciones que se fusionan entre tandas."""
+
+    if accion.get("tipo") == "mover":
+        return ("mover", id(accion.get("unidad")))
+    return (accion.get("tipo"), id(accion.get("unidad")), id(accion.get("objetivo")))
+
+
+class ReproductorAnimaciones:
+    """Reproduce por tandas las acciones de los turnos simulados.
+
+    Parameters
+    ----------
+    velocidad:
+        Multiplicador de la velocidad de reproducción. Con 2 cada tanda dura
+        la mitad.
+    duracion:
+        Milisegundos que dura cada tanda a velocidad 1.
+    max_animaciones:
+        Máximo de animaciones de una tanda; las sobrantes se descartan.
+    max_pendientes:
+        Tandas que pueden esperar turno. A partir de ahí las nuevas se
+        fusionan con la última pendiente.
+    """
+
+    def __init__(
+        self,
+        velocidad: float = 1.0,
+        duracion: float = DURACION_ANIMACION,
+        max_animaciones: int = MAX_ANIMACIONES,
+        max_pendientes: int = MAX_TANDAS_PENDIENTES,
+    ):
+        if velocidad <= 0:
+            raise ValueError("La velocidad de reproducción debe ser positiva")
+        if max_pendientes < 1:
+            raise ValueError("Debe admitirse al menos una tanda pendiente")
+        self.velocidad = velocidad
+        self.duracion = duracion
+        self.max_animaciones = max_animaciones
+        self.max_pendientes = max_pendientes
+        # Acciones descartadas al fusionar o recortar tandas
+        self.descartadas = 0
+        self._actual: list[dict] = []
+        self._progreso = 0.0
+        self._pendientes: list[list[dict]] = []
+
+    @property
+    def activa(self) -> bool:
+        return bool(self._actual or self._pendientes)
+
+    @property
+    def pendientes(self) -> int:
+        return len(self._pendientes)
+
+    def vaciar(self) -> None:
+        self.descartadas += len(self._actual) + sum(len(t) for t in self._pendientes)
+        self._actual = []
+        self._pendientes = []
+        self._progreso = 0.0
+
+    # ------------------------------------------------------------------
+    # Tandas
+    # ------------------------------------------------------------------
+    def _recortar(self, tanda: list[dict]) -> list[dict]:
+        if len(tanda) > self.max_animaciones:
+            self.descartadas += len(tanda) - self.max_animaciones
+            tanda = tanda[: self.max_animaciones]
+        return tanda
+
+    def _fusionar(self, anterior: list[dict], nueva: list[dict]) -> list[dict]:
+        fusion = {_clave(a): a for a in anterior}
+        for accion in nueva:
+            clave = _clave(accion)
+            previa = fusion.pop(clave, None)
+            if previa is not None:
+                self.descartadas += 1
+                if accion.get("tipo") == "mover":
+                    accion = {**accion, "origen": previa["origen"]}
+            # Las acciones más recientes quedan al final
+            fusion[clave] = accion
+        return self._recortar(list(fusion.values()))
+
+    def agregar_turno(self, acciones: list[dict]) -> None:
+        """Añade una tanda con todas las acciones de un turno."""
+
+        tanda = self._recortar([a for a in acciones if "origen" in a])
+        if not tanda:
+            return
+        if len(self._pendientes) >= self.max_pendientes:
+            self._pendientes[-1] = self._fusionar(self._pendientes[-1], tanda)
+        else:
+            self._pendientes.append(tanda)
+        if not self._actual:
+            self._siguiente_tanda()
+
+    def agregar(self, accion: dict) -> None:
+        """Añade una acción suelta a la última tanda pendiente."""
+
+        if self._pendientes:
+            self._pendientes[-1] = self._fusionar(self._pendientes[-1], [accion])
+        else:
+            self.agregar_turno([accion])
+
+    def _siguiente_tanda(self) -> None:
+        self._actual = self._pendientes.pop(0) if self._pendientes else []
+        self._progreso = 0.0
+
+    def actualizar(self, dt: float) -> None:
+        """Avanza las animaciones ``dt`` milisegundos."""
+
+        avance = dt * self.velocidad / self.duracion if self.duracion > 0 else 1.0
+        while self._actual and avance > 0:
+            restante = 1.0 - self._progreso
+            if avance < restante:
+                self._progreso += avance
+                return
+            avance -= restante
+            self._siguiente_tanda()
+
+    # ------------------------------------------------------------------
+    # Dibujo
+    # ------------------------------------------------------------------
+    def dibujar(self, superficie, cam_x: int, cam_y: int) -> None:
+        """Dibuja la tanda en curso con la cámara indicada."""
+
+        if not self._actual:
+            return
+        celda = const.TAM_CELDA
+        mitad = celda // 2
+        base_y = const.ALTO_PANEL + cam_y + mitad
+        base_x = cam_x + mitad
+        t = self._progreso
+        for accion in self._actual:
+            tipo = accion.get("tipo")
+            ox, oy = accion["origen"]
+            dx, dy = accion.get("destino", (ox, oy))
+            inicio = (base_x + ox * celda, base_y + oy * celda)
+            fin = (base_x + dx * celda, base_y + dy * celda)
+            color = COLORES.get(tipo, COLORES["mover"])
+            if tipo == "mover":
+                px = inicio[0] + (fin[0] - inicio[0]) * t
+                py = inicio[1] + (fin[1] - inicio[1]) * t
+                pygame.draw.circle(superficie, color, (int(px), int(py)), celda // 3)
+            else:
+                pygame.draw.line(superficie, color, inicio, fin, 3)
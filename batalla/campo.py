@@ -3,12 +3,36 @@
 from __future__ import annotations
 
 import json
-from typing import Dict, Iterable, Tuple, Set, List
+from time import perf_counter
+from typing import Callable, Dict, Iterable, Tuple, Set, List
+
+import numpy as np
 
 from terreno import Terreno
 
 from .unidad import Unidad
 from .ejercito import Ejercito
+from .flujo import campo_distancias
+from .indice import IndiceEspacial
+from .instantanea import Instantanea, capturar, restaurar
+from .instrumentacion import Instrumentacion
+from .replay import EscritorReplayJSONL, serializar_turno
+from .replay_binario import EscritorReplayBinario
+from .motor_vectorial import MotorVectorial
+from .replanificador import PlanIncremental
+
+# Modos de movimiento admitidos por :class:`CampoBatalla`
+MODOS_MOVIMIENTO = ("ruta", "flujo", "incremental")
+# Distancia máxima que puede desplazarse el objetivo de un plan incremental
+# para repararlo en lugar de crear uno nuevo
+_SALTO_OBJETIVO_REPARABLE = 2
+# Distancia a la que las unidades ocupan celdas para los planes incrementales
+_RADIO_OCUPACION = 2
+# Un plan sigue apuntando a la celda original de su objetivo mientras este se
+# haya desplazado menos de ``1 / _TOLERANCIA_DERIVA`` de la distancia restante
+_TOLERANCIA_DERIVA = 2
+# Motores de resolución de turnos
+MOTORES = ("objetos", "vectorial")
 
 
 class CampoBatalla:
@@ -18,10 +42,31 @@ class CampoBatalla:
     simulando movimiento, ataques y acciones de soporte. Las dimensiones y
     obstáculos provienen directamente del objeto :class:`Terreno` recibido en
     el constructor.
+
+    ``modo_movimiento`` selecciona cómo avanzan las unidades que no actúan:
+    ``"ruta"`` calcula una ruta A* por unidad, ``"flujo"`` construye un
+    campo de distancias por ejército y turno que todas sus unidades siguen e
+    ``"incremental"`` mantiene por unidad una búsqueda D* Lite que se repara
+    con los cambios de ocupación en lugar de repetirse desde cero.
+
+    ``motor`` elige cómo se resuelve cada turno: ``"objetos"`` recorre las
+    unidades una a una y ``"vectorial"`` usa :class:`MotorVectorial`, que
+    resuelve cada fase con operaciones sobre arrays.
     """
 
-    def __init__(self, terreno: Terreno):
+    def __init__(
+        self, terreno: Terreno, modo_movimiento: str = "ruta", motor: str = "objetos"
+    ):
+        if modo_movimiento not in MODOS_MOVIMIENTO:
+            raise ValueError(f"Modo de movimiento desconocido: {modo_movimiento}")
+        if motor not in MOTORES:
+            raise ValueError(f"Motor desconocido: {motor}")
         self.terreno = terreno
+        self.modo_movimiento = modo_movimiento
+        self.motor = motor
+        self._motor_vectorial: MotorVectorial | None = None
+        # Se incrementa con cada cambio de posición o presencia de unidades
+        self._version = 0
         self.ancho = terreno.ancho_tiles
         self.alto = terreno.alto_tiles
         self._grid: list[list[Unidad | None]] = [
@@ -29,6 +74,14 @@ class CampoBatalla:
         ]
         self._posiciones: Dict[Unidad, Tuple[int, int]] = {}
         self._salud_max: Dict[Unidad, int] = {}
+        # Ejército de cada unidad, registrado al colocarla. Las unidades
+        # colocadas sin ejército se asignan al comienzo del siguiente turno.
+        self._equipos: Dict[Unidad, Ejercito | None] = {}
+        self._sin_equipo: Set[Unidad] = set()
+        # Un índice espacial por ejército para las consultas de unidad más
+        # cercana; el orden de colocación desempata entre índices.
+        self._indices: Dict[Ejercito | None, IndiceEspacial] = {}
+        self._colocadas = 0
         self._estadisticas = {
             "turno_actual": 0,
             "daño_total": 0,
@@ -36,9 +89,21 @@ class CampoBatalla:
             "daño_por_unidad": {},
         }
         self._replay: list[dict] = []
+        # Escritor opcional que transmite cada turno en lugar de acumularlo
+        self._escritor_replay: EscritorReplayJSONL | None = None
         # Caché de rutas calculadas por unidad. Cada entrada almacena la
         # posición de destino y la lista de pasos pendientes para alcanzarlo.
         self._ruta_cache: Dict[Unidad, Tuple[Tuple[int, int], List[Tuple[int, int]]]] = {}
+        # Modo incremental: plan D* Lite por unidad y registro de las celdas
+        # cuya ocupación ha cambiado. ``_registro_base`` es la posición
+        # absoluta de la primera entrada conservada.
+        self._planes: Dict[Unidad, PlanIncremental] = {}
+        self._registro_celdas: List[Tuple[int, int]] = []
+        self._registro_base = 0
+        self._filas_transitables: list[list[bool]] | None = None
+        self._version_terreno: int | None = None
+        # Métricas por fase; ``None`` mientras la instrumentación no se active
+        self._instrumentacion: Instrumentacion | None = None
 
     # ------------------------------------------------------------------
     # Gestión de unidades
@@ -46,19 +111,57 @@ class CampoBatalla:
     def es_transitable(self, x: int, y: int) -> bool:
         """Indica si una celda puede ser ocupada por una unidad."""
 
-        if 0 <= x < self.ancho and 0 <= y < self.alto:
-            bloque = self.terreno.mapa[y][x]
-            return bloque not in ("PARED", "AGUA", "HUECO")
-        return False
+        return self.terreno.es_transitable(x, y)
 
-    def colocar_unidad(self, unidad: Unidad, x: int, y: int) -> None:
-        """Ubica una unidad en la celda indicada."""
+    def colocar_unidad(
+        self, unidad: Unidad, x: int, y: int, ejercito: Ejercito | None = None
+    ) -> None:
+        """Ubica una unidad en la celda indicada.
+
+        Si se indica ``ejercito`` queda registrado como el bando de la
+        unidad; en caso contrario se deduce al simular el siguiente turno.
+        """
 
         if not self.es_transitable(x, y) or self._grid[y][x] is not None:
             raise ValueError("Posición inválida para la unidad")
         self._grid[y][x] = unidad
         self._posiciones[unidad] = (x, y)
+        self._anotar_celda(x, y)
+        self._equipos[unidad] = ejercito
+        if ejercito is None:
+            self._sin_equipo.add(unidad)
+        self._indice_de(ejercito).insertar(unidad, x, y, self._colocadas)
+        self._colocadas += 1
         self._salud_max.setdefault(unidad, unidad.salud)
+        self._version += 1
+
+    def colocar_ejercito(
+        self, ejercito: Ejercito, desde_derecha: bool = False, componente: int | None = None
+    ) -> None:
+        """Coloca todas las unidades de ``ejercito`` en el campo.
+
+        Las celdas se recorren por columnas empezando por el borde
+        izquierdo, o por el derecho si ``desde_derecha`` es ``True``, y cada
+        unidad ocupa la primera celda transitable libre. Si se indica
+        ``componente`` solo se usan las celdas de esa región conectada del
+        terreno (ver :attr:`Terreno.componentes`).
+        """
+
+        columnas = range(self.ancho - 1, -1, -1) if desde_derecha else range(self.ancho)
+        etiquetas = self.terreno.componentes if componente is not None else None
+        libres = (
+            (x, y)
+            for x in columnas
+            for y in range(self.alto)
+            if self.es_transitable(x, y)
+            and self._grid[y][x] is None
+            and (etiquetas is None or etiquetas[y, x] == componente)
+        )
+        for unidad in ejercito.unidades:
+            posicion = next(libres, None)
+            if posicion is None:
+                raise ValueError("No hay posiciones disponibles")
+            self.colocar_unidad(unidad, *posicion, ejercito)
 
     def mover_unidad(self, unidad: Unidad, dx: int, dy: int) -> bool:
         """Intenta mover la unidad una casilla en la dirección dada."""
@@ -70,6 +173,10 @@ class CampoBatalla:
         self._grid[y][x] = None
         self._grid[ny][nx] = unidad
         self._posiciones[unidad] = (nx, ny)
+        self._anotar_celda(x, y)
+        self._anotar_celda(nx, ny)
+        self._indices[self._equipos[unidad]].mover(unidad, nx, ny)
+        self._version += 1
         return True
 
     def eliminar_unidad(self, unidad: Unidad) -> None:
@@ -79,14 +186,62 @@ class CampoBatalla:
         if pos:
             x, y = pos
             self._grid[y][x] = None
+            self._anotar_celda(x, y)
+        equipo = self._equipos.pop(unidad, None)
+        if equipo in self._indices:
+            self._indices[equipo].quitar(unidad)
+        self._sin_equipo.discard(unidad)
         self._salud_max.pop(unidad, None)
+        self._version += 1
         self._ruta_cache.pop(unidad, None)
+        self._planes.pop(unidad, None)
+
+    def _anotar_celda(self, x: int, y: int) -> None:
+        """Registra un cambio de ocupación para los planes incrementales."""
+
+        if self.modo_movimiento == "incremental":
+            self._registro_celdas.append((x, y))
 
     def posicion(self, unidad: Unidad) -> Tuple[int, int]:
         """Devuelve la posición actual de una unidad."""
 
         return self._posiciones[unidad]
 
+    def ejercito_de(self, unidad: Unidad) -> Ejercito | None:
+        """Devuelve el ejército registrado para ``unidad``, si lo hay."""
+
+        return self._equipos.get(unidad)
+
+    def _indice_de(self, ejercito: Ejercito | None) -> IndiceEspacial:
+        indice = self._indices.get(ejercito)
+        if indice is None:
+            indice = self._indices[ejercito] = IndiceEspacial()
+        return indice
+
+    def _asignar_equipos(self, ejercito_a: Ejercito, ejercito_b: Ejercito) -> None:
+        """Registra el ejército de las unidades colocadas sin él."""
+
+        for unidad in list(self._sin_equipo):
+            if unidad in ejercito_a.unidades:
+                ejercito = ejercito_a
+            elif unidad in ejercito_b.unidades:
+                ejercito = ejercito_b
+            else:
+                continue
+            x, y, orden = self._indices[None].quitar(unidad)
+            self._indice_de(ejercito).insertar(unidad, x, y, orden)
+            self._equipos[unidad] = ejercito
+            self._sin_equipo.discard(unidad)
+
+    def _bandos(
+        self, unidad: Unidad, ejercito_a: Ejercito, ejercito_b: Ejercito
+    ) -> Tuple[Ejercito, Ejercito]:
+        """Devuelve ``(propio, rival)`` para ``unidad``."""
+
+        if self._equipos.get(unidad) is ejercito_a:
+            return ejercito_a, ejercito_b
+        return ejercito_b, ejercito_a
+
     def unidades(self) -> Iterable[Unidad]:
         """Itera sobre todas las unidades presentes."""
 
@@ -120,8 +275,15 @@ class CampoBatalla:
 
         from heapq import heappush, heappop
 
+        if self._instrumentacion is not None:
+            self._instrumentacion.contar("busquedas")
         if origen == destino:
             return [origen]
+        # Sin región conectada común la búsqueda recorrería toda la región
+        # del origen para terminar fallando
+        componente = self.terreno.componente_transitable(*origen)
+        if componente != self.terreno.componente_transitable(*destino):
+            return None
 
         def heuristica(a: Tuple[int, int], b: Tuple[int, int]) -> int:
             return abs(a[0] - b[0]) + abs(a[1] - b[1])
@@ -130,16 +292,19 @@ class CampoBatalla:
         heappush(abiertos, (0, origen))
         came_from: Dict[Tuple[int, int], Tuple[int, int]] = {}
         g_score: Dict[Tuple[int, int], int] = {origen: 0}
+        camino = None
+        expandidos = 0
 
         while abiertos:
             _, actual = heappop(abiertos)
+            expandidos += 1
             if actual == destino:
                 camino = [actual]
                 while actual in came_from:
                     actual = came_from[actual]
                     camino.append(actual)
                 camino.reverse()
-                return camino
+                break
 
             x, y = actual
             for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
@@ -159,13 +324,28 @@ class CampoBatalla:
                     f_score = tentativo + heuristica(vecino, destino)
                     heappush(abiertos, (f_score, vecino))
 
-        return None
-    def _objetivo_cercano(self, unidad: Unidad, candidatos: Iterable[Unidad]) -> Unidad:
-        ux, uy = self.posicion(unidad)
-        return min(
-            candidatos,
-            key=lambda u: abs(self.posicion(u)[0] - ux) + abs(self.posicion(u)[1] - uy),
-        )
+        if self._instrumentacion is not None:
+            self._instrumentacion.contar("nodos_expandidos", expandidos)
+        return camino
+
+    def _objetivo_cercano(
+        self,
+        unidad: Unidad,
+        ejercito: Ejercito,
+        filtro: Callable[[Unidad], bool],
+        radio: int | None = None,
+    ) -> Unidad | None:
+        """Busca la unidad de ``ejercito`` más cercana que cumple ``filtro``.
+
+        Si se indica ``radio`` solo se consideran las unidades a esa
+        distancia Manhattan o menos.
+        """
+
+        indice = self._indices.get(ejercito)
+        if indice is None:
+            return None
+        ux, uy = self._posiciones[unidad]
+        return indice.mas_cercano(ux, uy, filtro, radio)
 
     def resolver_curaciones(
         self, ejercito_a: Ejercito, ejercito_b: Ejercito, orden: Iterable[Unidad]
@@ -174,26 +354,22 @@ class CampoBatalla:
 
         acciones: list[dict] = []
         actuaron: Set[Unidad] = set()
+        self._asignar_equipos(ejercito_a, ejercito_b)
+
+        def herido(a: Unidad) -> bool:
+            return a.esta_viva() and a.salud < self._salud_max.get(a, a.salud)
+
         for unidad in orden:
             accion_curar = unidad.acciones.get("curar")
             if accion_curar is None or not unidad.esta_viva():
                 continue
 
-            aliados = (
-                ejercito_a.unidades if unidad in ejercito_a.unidades else ejercito_b.unidades
-            )
-            heridos = [
-                a
-                for a in aliados
-                if a.esta_viva() and a.salud < self._salud_max.get(a, a.salud)
-            ]
-            if not heridos:
-                continue
-
-            aliado = self._objetivo_cercano(unidad, heridos)
-            ux, uy = self.posicion(unidad)
-            ax, ay = self.posicion(aliado)
-            if abs(ux - ax) + abs(uy - ay) <= unidad.alcance:
+            aliados, _ = self._bandos(unidad, ejercito_a, ejercito_b)
+            # Solo interesa el herido más cercano si está al alcance
+            aliado = self._objetivo_cercano(unidad, aliados, herido, unidad.alcance)
+            if aliado is not None:
+                ux, uy = self.posicion(unidad)
+                ax, ay = self.posicion(aliado)
                 cantidad = accion_curar.ejecutar(aliado)
                 self._estadisticas["curacion_total"] += cantidad
                 acciones.append(
@@ -221,22 +397,19 @@ class CampoBatalla:
 
         acciones: list[dict] = []
         actuaron: Set[Unidad] = set()
+        self._asignar_equipos(ejercito_a, ejercito_b)
         for unidad in orden:
             if unidad in unidades_excluidas or not unidad.esta_viva():
                 continue
 
-            enemigos = (
-                ejercito_b.unidades if unidad in ejercito_a.unidades else ejercito_a.unidades
+            _, enemigos = self._bandos(unidad, ejercito_a, ejercito_b)
+            objetivo = self._objetivo_cercano(
+                unidad, enemigos, Unidad.esta_viva, unidad.alcance
             )
-            enemigos = [e for e in enemigos if e.esta_viva()]
-            if not enemigos:
+            if objetivo is None:
                 continue
-            objetivo = self._objetivo_cercano(unidad, enemigos)
             ux, uy = self.posicion(unidad)
             ox, oy = self.posicion(objetivo)
-            dist = abs(ux - ox) + abs(uy - oy)
-            if dist > unidad.alcance:
-                continue
 
             accion_atacar = unidad.acciones.get("atacar")
             if accion_atacar is None:
@@ -279,26 +452,36 @@ class CampoBatalla:
         válidas.
         """
 
+        if self.modo_movimiento == "flujo":
+            return self._mover_por_flujo(ejercito_a, ejercito_b, orden, unidades_excluidas)
+        if self.modo_movimiento == "incremental":
+            return self._mover_incremental(ejercito_a, ejercito_b, orden, unidades_excluidas)
+
         acciones: list[dict] = []
+        self._asignar_equipos(ejercito_a, ejercito_b)
+        instrumentacion = self._instrumentacion
         for unidad in orden:
             if unidad in unidades_excluidas or not unidad.esta_viva():
                 continue
 
-            enemigos = (
-                ejercito_b.unidades if unidad in ejercito_a.unidades else ejercito_a.unidades
-            )
-            enemigos = [e for e in enemigos if e.esta_viva()]
-            if not enemigos:
+            _, enemigos = self._bandos(unidad, ejercito_a, ejercito_b)
+            objetivo = self._objetivo_cercano(unidad, enemigos, Unidad.esta_viva)
+            if objetivo is None:
                 continue
 
-            objetivo = self._objetivo_cercano(unidad, enemigos)
             destino = self.posicion(objetivo)
             actual = self.posicion(unidad)
 
             # Recuperar o calcular la ruta hacia el objetivo
             cache = self._ruta_cache.get(unidad)
-            if not cache or cache[0] != destino or not cache[1]:
+            acierto = bool(cache) and cache[0] == destino and bool(cache[1])
+            if instrumentacion is not None:
+                instrumentacion.contar("cache_aciertos" if acierto else "cache_fallos")
+            if not acierto:
+                inicio = perf_counter() if instrumentacion is not None else 0.0
                 ruta = self._buscar_camino(actual, destino)
+                if instrumentacion is not None:
+                    instrumentacion.acumular("caminos", inicio)
                 if ruta and len(ruta) > 1:
                     ruta = ruta[1:]  # Excluir la posición actual
                     self._ruta_cache[unidad] = (destino, ruta)
@@ -331,6 +514,194 @@ class CampoBatalla:
 
         return acciones
 
+    def _mover_por_flujo(
+        self,
+        ejercito_a: Ejercito,
+        ejercito_b: Ejercito,
+        orden: Iterable[Unidad],
+        unidades_excluidas: Set[Unidad],
+    ) -> list[dict]:
+        """Mueve las unidades descendiendo por un campo de distancias.
+
+        Se calcula un único campo por ejército y turno a partir de las
+        posiciones de todos los enemigos vivos. Cada unidad avanza a la
+        celda vecina libre con menor distancia; si ninguna la acerca, se
+        queda en su sitio.
+        """
+
+        acciones: list[dict] = []
+        self._asignar_equipos(ejercito_a, ejercito_b)
+        transitables = None
+        campos: Dict[int, object] = {}
+        instrumentacion = self._instrumentacion
+        for unidad in orden:
+            if unidad in unidades_excluidas or not unidad.esta_viva():
+                continue
+
+            propio, rival = self._bandos(unidad, ejercito_a, ejercito_b)
+            if id(propio) not in campos:
+                fuentes = [
+                    self._posiciones[e]
+                    for e in rival.unidades
+                    if e.esta_viva() and e in self._posiciones
+                ]
+                if fuentes:
+                    if transitables is None:
+                        transitables = self.terreno.transitables()
+                    inicio = perf_counter() if instrumentacion is not None else 0.0
+                    campos[id(propio)] = campo_distancias(transitables, fuentes)
+                    if instrumentacion is not None:
+                        instrumentacion.acumular("caminos", inicio)
+                else:
+                    campos[id(propio)] = None
+            distancias = campos[id(propio)]
+            if distancias is None:
+                continue
+
+            x, y = self._posiciones[unidad]
+            mejor = int(distancias[y, x])
+            if mejor <= 0:
+                continue
+            paso = None
+            for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < self.ancho and 0 <= ny < self.alto):
+                    continue
+                d = int(distancias[ny, nx])
+                if 0 <= d < mejor and self._grid[ny][nx] is None:
+                    mejor = d
+                    paso = (dx, dy)
+            if paso is not None and self.mover_unidad(unidad, *paso):
+                acciones.append(
+                    {
+                        "tipo": "mover",
+                        "unidad": unidad,
+                        "origen": (x, y),
+                        "destino": (x + paso[0], y + paso[1]),
+                    }
+                )
+
+        return acciones
+
+    def _mover_incremental(
+        self,
+        ejercito_a: Ejercito,
+        ejercito_b: Ejercito,
+        orden: Iterable[Unidad],
+        unidades_excluidas: Set[Unidad],
+    ) -> list[dict]:
+        """Mueve las unidades con planes D* Lite que se reparan entre turnos.
+
+        Solo las unidades cercanas bloquean el paso (ver
+        :class:`PlanIncremental`), así que antes de avanzar cada plan recibe
+        las celdas próximas cuya ocupación cambió desde su última
+        actualización. Si el objetivo se desplazó pocas casillas la raíz
+        de la búsqueda se traslada; si se eligió un objetivo lejano o el
+        plan es demasiado antiguo se crea uno nuevo.
+        """
+
+        acciones: list[dict] = []
+        self._asignar_equipos(ejercito_a, ejercito_b)
+        if self._version_terreno != self.terreno.version:
+            # Los planes apuntan a las filas del mapa anterior
+            self._filas_transitables = self.terreno.transitables().tolist()
+            self._version_terreno = self.terreno.version
+            self._planes.clear()
+
+        # Descartar del registro lo que ya conocen todos los planes, sin
+        # conservar nunca más de unas pocas pantallas de cambios
+        registro = self._registro_celdas
+        base = self._registro_base
+        fin = base + len(registro)
+        conservar = min((p.sincronizado for p in self._planes.values()), default=fin)
+        conservar = max(conservar, fin - max(4096, 2 * self.ancho * self.alto))
+        del registro[: conservar - base]
+        base = self._registro_base = conservar
+        cambios = np.array(registro, dtype=np.int64).reshape(-1, 2)
+        instrumentacion = self._instrumentacion
+
+        for unidad in orden:
+            if unidad in unidades_excluidas or not unidad.esta_viva():
+                continue
+
+            _, enemigos = self._bandos(unidad, ejercito_a, ejercito_b)
+            objetivo = self._objetivo_cercano(unidad, enemigos, Unidad.esta_viva)
+            if objetivo is None:
+                continue
+            destino = self.posicion(objetivo)
+            actual = self.posicion(unidad)
+            # Una unidad rodeada no puede moverse: la búsqueda hacia atrás
+            # recorrería toda la región antes de descubrirlo
+            if not any(
+                (actual[0] + dx, actual[1] + dy) == destino
+                or (
+                    self.es_transitable(actual[0] + dx, actual[1] + dy)
+                    and self._grid[actual[1] + dy][actual[0] + dx] is None
+                )
+                for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+            ):
+                continue
+
+            inicio = perf_counter() if instrumentacion is not None else 0.0
+            plan = self._planes.get(unidad)
+            deriva = restante = 0
+            if plan is not None:
+                deriva = abs(plan.objetivo[0] - destino[0]) + abs(plan.objetivo[1] - destino[1])
+                restante = abs(plan.objetivo[0] - actual[0]) + abs(plan.objetivo[1] - actual[1])
+                if plan.sincronizado < base or (
+                    deriva * _TOLERANCIA_DERIVA > restante and deriva > _SALTO_OBJETIVO_REPARABLE
+                ):
+                    plan = None
+            if plan is None:
+                regiones = self.terreno.componentes_transitables
+                if regiones[actual[1], actual[0]] != regiones[destino[1], destino[0]]:
+                    self._planes.pop(unidad, None)
+                    if instrumentacion is not None:
+                        instrumentacion.acumular("caminos", inicio)
+                    continue
+                plan = PlanIncremental(
+                    self._filas_transitables, self._grid, actual, destino, _RADIO_OCUPACION
+                )
+                self._planes[unidad] = plan
+                if instrumentacion is not None:
+                    instrumentacion.contar("cache_fallos")
+                    instrumentacion.contar("busquedas")
+            else:
+                if instrumentacion is not None:
+                    instrumentacion.contar("cache_aciertos")
+                plan.mover_inicio(actual)
+                pendientes = cambios[plan.sincronizado - base :]
+                if len(pendientes):
+                    cerca = (
+                        np.abs(pendientes - actual).sum(axis=1) <= _RADIO_OCUPACION + 1
+                    )
+                    plan.celdas_cambiadas(map(tuple, pendientes[cerca].tolist()))
+                # Mientras el objetivo esté lejos basta con dirigirse a donde
+                # estaba; al acercarse se traslada la raíz de la búsqueda
+                if deriva * _TOLERANCIA_DERIVA > restante:
+                    plan.mover_objetivo(destino)
+            plan.sincronizado = fin
+
+            expansiones = plan.expansiones
+            paso = plan.siguiente_paso()
+            if instrumentacion is not None:
+                instrumentacion.contar("nodos_expandidos", plan.expansiones - expansiones)
+                instrumentacion.acumular("caminos", inicio)
+            if paso is None:
+                continue
+            dx, dy = paso[0] - actual[0], paso[1] - actual[1]
+            if self.mover_unidad(unidad, dx, dy):
+                acciones.append(
+                    {
+                        "tipo": "mover",
+                        "unidad": unidad,
+                        "origen": actual,
+                        "destino": paso,
+                    }
+                )
+
+        return acciones
+
     def simular_turno(self, ejercito_a: Ejercito, ejercito_b: Ejercito) -> list[dict]:
         """Avanza un turno completo para ambos ejércitos.
 
@@ -340,8 +711,54 @@ class CampoBatalla:
         relacionados con la acción.
         """
 
-        acciones: list[dict] = []
         self._estadisticas["turno_actual"] += 1
+        instrumentacion = self._instrumentacion
+        if instrumentacion is not None:
+            instrumentacion.iniciar_turno(self._estadisticas["turno_actual"])
+        try:
+            if self.motor == "vectorial":
+                acciones = self._turno_vectorial(ejercito_a, ejercito_b)
+            else:
+                acciones = self._turno_objetos(ejercito_a, ejercito_b)
+
+            if self._escritor_replay is not None:
+                self._escritor_replay.escribir_turno(self._estadisticas["turno_actual"], acciones)
+            else:
+                self._replay.append(
+                    {
+                        "turno": self._estadisticas["turno_actual"],
+                        "acciones": list(acciones),
+                    }
+                )
+        except BaseException:
+            # El perfil no debe quedar activo si el turno falla
+            if instrumentacion is not None:
+                instrumentacion.cancelar_turno()
+            raise
+        if instrumentacion is not None:
+            instrumentacion.marcar("registro")
+            instrumentacion.terminar_turno(len(acciones))
+        return acciones
+
+    def _turno_vectorial(self, ejercito_a: Ejercito, ejercito_b: Ejercito) -> list[dict]:
+        """Resuelve un turno con :class:`MotorVectorial`.
+
+        Las columnas se reconstruyen solo si el campo se modificó fuera del
+        motor o cambian los ejércitos enfrentados.
+        """
+
+        motor = self._motor_vectorial
+        if motor is None or not motor.vigente(ejercito_a, ejercito_b):
+            motor = self._motor_vectorial = MotorVectorial(self, ejercito_a, ejercito_b)
+        if self._instrumentacion is not None:
+            self._instrumentacion.marcar("iniciativa")
+        return motor.simular_turno()
+
+    def _turno_objetos(self, ejercito_a: Ejercito, ejercito_b: Ejercito) -> list[dict]:
+        """Resuelve un turno recorriendo las unidades en orden de iniciativa."""
+
+        acciones: list[dict] = []
+        instrumentacion = self._instrumentacion
 
         # Limpiar unidades que hayan muerto en turnos previos
         for unidad in list(self.unidades()):
@@ -349,27 +766,31 @@ class CampoBatalla:
                 self.eliminar_unidad(unidad)
                 ejercito_a.eliminar_unidad(unidad)
                 ejercito_b.eliminar_unidad(unidad)
+        if instrumentacion is not None:
+            instrumentacion.marcar("limpieza")
         # Cola de iniciativas basada en la velocidad de las unidades
         orden = self.cola_iniciativa()
+        if instrumentacion is not None:
+            instrumentacion.marcar("iniciativa")
+            instrumentacion.contar("unidades", len(orden))
 
         curaciones, actuaron = self.resolver_curaciones(ejercito_a, ejercito_b, orden)
         acciones.extend(curaciones)
+        if instrumentacion is not None:
+            instrumentacion.marcar("curaciones")
         ataques, atacantes = self.resolver_ataques(
             ejercito_a, ejercito_b, orden, actuaron
         )
         acciones.extend(ataques)
         actuaron.update(atacantes)
+        if instrumentacion is not None:
+            instrumentacion.marcar("ataques")
         movimientos = self.resolver_movimientos(
             ejercito_a, ejercito_b, orden, actuaron
         )
         acciones.extend(movimientos)
-
-        self._replay.append(
-            {
-                "turno": self._estadisticas["turno_actual"],
-                "acciones": list(acciones),
-            }
-        )
+        if instrumentacion is not None:
+            instrumentacion.marcar("movimientos")
         return acciones
 
     def simular(self, ejercito_a: Ejercito, ejercito_b: Ejercito, turnos: int = 10) -> None:
@@ -381,11 +802,58 @@ class CampoBatalla:
                 break
 
     def obtener_estadisticas(self) -> dict:
-        """Devuelve un resumen de la simulación realizada."""
+        """Devuelve un resumen de la simulación realizada.
+
+        Con la instrumentación activa incluye además sus totales bajo la
+        clave ``"rendimiento"``.
+        """
         stats = dict(self._estadisticas)
         stats["daño_por_unidad"] = dict(self._estadisticas["daño_por_unidad"])
+        if self._instrumentacion is not None:
+            stats["rendimiento"] = self._instrumentacion.resumen()
         return stats
 
+    def instantanea(self) -> Instantanea:
+        """Captura el estado de la batalla para poder volver a él.
+
+        Ver :mod:`batalla.instantanea`. La captura no copia unidades ni
+        ejércitos: guarda sus estadísticas, posiciones y bandos, los
+        contadores de :meth:`obtener_estadisticas` y el turno en un array
+        plano.
+        """
+
+        return capturar(self)
+
+    def restaurar(self, instantanea: Instantanea) -> None:
+        """Devuelve la batalla al estado de ``instantanea``.
+
+        Las unidades y ejércitos capturados se modifican en el sitio y el
+        registro en memoria se recorta al turno de la instantánea, de modo
+        que puede retrocederse o explorar varias continuaciones desde el
+        mismo punto.
+        """
+
+        restaurar(self, instantanea)
+
+    def activar_instrumentacion(
+        self, trazador: Callable[[dict], None] | None = None, perfilar: bool = False
+    ) -> Instrumentacion:
+        """Empieza a medir cada fase de los turnos siguientes.
+
+        ``trazador`` recibe el diccionario de métricas de cada turno al
+        terminarlo; con ``perfilar=True`` los turnos se ejecutan además bajo
+        :mod:`cProfile`. Devuelve la :class:`Instrumentacion` creada.
+        """
+
+        self._instrumentacion = Instrumentacion(trazador, perfilar)
+        return self._instrumentacion
+
+    def desactivar_instrumentacion(self) -> Instrumentacion | None:
+        """Deja de medir los turnos y devuelve la instrumentación anterior."""
+
+        instrumentacion, self._instrumentacion = self._instrumentacion, None
+        return instrumentacion
+
     def exportar_replay(self, ruta: str) -> None:
         """Guarda en ``ruta`` el registro completo de acciones realizadas.
 
@@ -395,23 +863,40 @@ class CampoBatalla:
         batalla paso a paso.
         """
 
-        datos = []
-        for turno in self._replay:
-            acciones = []
-            for acc in turno["acciones"]:
-                item = dict(acc)
-                if "unidad" in item:
-                    u = item["unidad"]
-                    item["unidad"] = {"id": str(u.id), "tipo": u.__class__.__name__}
-                if "objetivo" in item:
-                    o = item["objetivo"]
-                    item["objetivo"] = {"id": str(o.id), "tipo": o.__class__.__name__}
-                if "origen" in item:
-                    item["origen"] = list(item["origen"])
-                if "destino" in item:
-                    item["destino"] = list(item["destino"])
-                acciones.append(item)
-            datos.append({"turno": turno["turno"], "acciones": acciones})
+        datos = [serializar_turno(t["turno"], t["acciones"]) for t in self._replay]
 
         with open(ruta, "w", encoding="utf-8") as fh:
             json.dump(datos, fh, ensure_ascii=False, indent=2)
+
+    def exportar_replay_binario(self, ruta: str) -> None:
+        """Guarda el registro de acciones en el formato binario compacto.
+
+        El archivo puede leerse con
+        :class:`batalla.replay_binario.LectorReplayBinario`, que permite
+        acceder directamente a cualquier turno.
+        """
+
+        with EscritorReplayBinario(ruta) as escritor:
+            for turno in self._replay:
+                escritor.escribir_turno(turno["turno"], turno["acciones"])
+
+    def transmitir_replay(self, destino, intervalo_volcado: int = 10) -> EscritorReplayJSONL:
+        """Escribe cada turno en ``destino`` en formato JSONL al simularlo.
+
+        ``destino`` puede ser una ruta o un flujo de texto abierto. Mientras
+        la transmisión está activa los turnos no se acumulan en memoria, por
+        lo que :meth:`exportar_replay` solo incluye los turnos anteriores.
+        Los turnos pueden leerse después con
+        :func:`batalla.replay.leer_replay_jsonl`.
+        """
+
+        self.cerrar_replay()
+        self._escritor_replay = EscritorReplayJSONL(destino, intervalo_volcado)
+        return self._escritor_replay
+
+    def cerrar_replay(self) -> None:
+        """Finaliza la transmisión del registro si estaba activa."""
+
+        if self._escritor_replay is not None:
+            self._escritor_replay.cerrar()
+            self._escritor_replay = None
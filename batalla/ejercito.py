@@ -15,20 +15,77 @@ from .unidad import (
 )
 
 
+class ConjuntoUnidades:
+    """Secuencia de unidades con pertenencia y borrado en tiempo constante.
+
+    Conserva el orden de inserción como una lista, pero se apoya en un
+    diccionario para que ``in`` y :meth:`quitar` no recorran las unidades.
+    El acceso por índice usa una lista que se construye en el primer acceso
+    tras cada cambio; :meth:`primera` no necesita construirla. Se compara
+    igual a cualquier secuencia con los mismos elementos en el mismo orden y,
+    como una lista, no es hashable.
+    """
+
+    __hash__ = None
+
+    def __init__(self, unidades=()):
+        self._unidades = dict.fromkeys(unidades)
+        self._lista: list[Unidad] | None = None
+
+    def agregar(self, unidad: Unidad) -> None:
+        """Añade ``unidad`` al final si no estaba ya presente."""
+        if unidad not in self._unidades:
+            self._unidades[unidad] = None
+            self._lista = None
+
+    append = agregar
+
+    def quitar(self, unidad: Unidad) -> None:
+        """Elimina ``unidad`` si está presente."""
+        if unidad in self._unidades:
+            del self._unidades[unidad]
+            self._lista = None
+
+    def primera(self) -> Unidad | None:
+        """Devuelve la unidad más antigua o ``None`` si no hay ninguna."""
+        return next(iter(self._unidades), None)
+
+    def __contains__(self, unidad) -> bool:
+        return unidad in self._unidades
+
+    def __iter__(self):
+        return iter(self._unidades)
+
+    def __len__(self) -> int:
+        return len(self._unidades)
+
+    def __getitem__(self, indice):
+        if self._lista is None:
+            self._lista = list(self._unidades)
+        return self._lista[indice]
+
+    def __eq__(self, otro) -> bool:
+        if isinstance(otro, (ConjuntoUnidades, list, tuple)):
+            return len(self) == len(otro) and all(a is b or a == b for a, b in zip(self, otro))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ConjuntoUnidades({list(self._unidades)!r})"
+
+
 class Ejercito:
     """Colección de unidades con capacidad ofensiva."""
 
     def __init__(self):
-        self.unidades = []
+        self.unidades = ConjuntoUnidades()
 
     def agregar_unidad(self, unidad: Unidad):
         """Añade una unidad al ejército."""
-        self.unidades.append(unidad)
+        self.unidades.agregar(unidad)
 
     def eliminar_unidad(self, unidad: Unidad):
         """Elimina una unidad del ejército si está presente."""
-        if unidad in self.unidades:
-            self.unidades.remove(unidad)
+        self.unidades.quitar(unidad)
 
     def puntaje_total(self):
         """Calcula el puntaje agregado del ejército.
@@ -52,7 +109,7 @@ class Ejercito:
             elif isinstance(objetivo, Ejercito):
                 if not objetivo.unidades:
                     break
-                defensor = objetivo.unidades[0]
+                defensor = objetivo.unidades.primera()
                 defensor.recibir_daño(atacante.ataque)
                 if not defensor.esta_viva():
                     objetivo.eliminar_unidad(defensor)
@@ -0,0 +1,64 @@
+"""Campos de distancia para el movimiento colectivo de los ejércitos.
+
+En lugar de buscar una ruta por unidad, se calcula una única matriz de
+distancias desde todas las posiciones enemigas. Cada unidad avanza hacia la
+celda vecina con menor distancia, por lo que el coste por turno depende del
+tamaño del mapa y no de la cantidad de unidades.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Tuple
+
+import numpy as np
+
+
+def campo_distancias(
+    transitables: np.ndarray, fuentes: Iterable[Tuple[int, int]]
+) -> np.ndarray:
+    """Calcula la distancia en pasos desde cualquier celda a la fuente más cercana.
+
+    Parameters
+    ----------
+    transitables:
+        Array booleano ``(alto, ancho)`` con las celdas que pueden recorrerse.
+    fuentes:
+        Posiciones ``(x, y)`` desde las que se propaga la búsqueda en
+        anchura. Las fuentes siempre tienen distancia ``0`` aunque su celda
+        no sea transitable.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array ``int32`` con la distancia de cada celda; ``-1`` indica que la
+        celda no puede alcanzar ninguna fuente.
+    """
+
+    alto, ancho = transitables.shape
+    libres = transitables.reshape(-1)
+    distancias = np.full(alto * ancho, -1, dtype=np.int32)
+    frontera = np.unique(
+        np.array([y * ancho + x for x, y in fuentes], dtype=np.int64)
+    )
+    distancias[frontera] = 0
+    marca = np.empty(alto * ancho, dtype=np.int64)
+    nivel = 0
+    # Búsqueda en anchura procesando toda la frontera de cada nivel a la vez
+    while frontera.size:
+        nivel += 1
+        columnas = frontera % ancho
+        vecinos = np.concatenate(
+            (
+                frontera[columnas < ancho - 1] + 1,
+                frontera[columnas > 0] - 1,
+                frontera[frontera < (alto - 1) * ancho] + ancho,
+                frontera[frontera >= ancho] - ancho,
+            )
+        )
+        vecinos = vecinos[libres[vecinos] & (distancias[vecinos] < 0)]
+        # Elimina duplicados: solo se conserva la última escritura de cada celda
+        orden = np.arange(len(vecinos))
+        marca[vecinos] = orden
+        frontera = vecinos[marca[vecinos] == orden]
+        distancias[frontera] = nivel
+    return distancias.reshape(alto, ancho)
@@ -0,0 +1,144 @@
+"""Índice espacial de unidades basado en una cuadrícula de cubetas."""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Set, Tuple
+
+from .unidad import Unidad
+
+
+class IndiceEspacial:
+    """Agrupa las unidades en cubetas cuadradas de ``tam_cubeta`` celdas.
+
+    Las consultas de vecino más cercano recorren anillos de cubetas
+    alrededor del punto consultado y se detienen en cuanto ningún anillo
+    restante puede contener una unidad más próxima. En caso de empate se
+    devuelve la unidad insertada primero, de modo que los resultados son
+    deterministas.
+    """
+
+    def __init__(self, tam_cubeta: int = 8):
+        self.tam_cubeta = tam_cubeta
+        self._cubetas: Dict[Tuple[int, int], Set[Unidad]] = {}
+        # Posición y número de inserción de cada unidad
+        self._datos: Dict[Unidad, Tuple[int, int, int]] = {}
+        self._insertadas = 0
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+    def __contains__(self, unidad: Unidad) -> bool:
+        return unidad in self._datos
+
+    def _cubeta(self, x: int, y: int) -> Tuple[int, int]:
+        return x // self.tam_cubeta, y // self.tam_cubeta
+
+    def insertar(self, unidad: Unidad, x: int, y: int, orden: int | None = None) -> None:
+        """Registra ``unidad`` en la celda ``(x, y)``.
+
+        ``orden`` fija la prioridad de desempate; por defecto se usa el
+        número de inserción en este índice.
+        """
+
+        if orden is None:
+            orden = self._insertadas
+        self._datos[unidad] = (x, y, orden)
+        self._insertadas += 1
+        self._cubetas.setdefault(self._cubeta(x, y), set()).add(unidad)
+
+    def mover(self, unidad: Unidad, x: int, y: int) -> None:
+        """Actualiza la posición de una unidad ya registrada."""
+
+        ox, oy, orden = self._datos[unidad]
+        self._datos[unidad] = (x, y, orden)
+        origen = self._cubeta(ox, oy)
+        destino = self._cubeta(x, y)
+        if origen != destino:
+            self._quitar_de_cubeta(unidad, origen)
+            self._cubetas.setdefault(destino, set()).add(unidad)
+
+    def quitar(self, unidad: Unidad) -> Tuple[int, int, int] | None:
+        """Elimina ``unidad`` del índice si está presente.
+
+        Devuelve la posición y el orden que tenía registrados.
+        """
+
+        datos = self._datos.pop(unidad, None)
+        if datos is not None:
+            self._quitar_de_cubeta(unidad, self._cubeta(datos[0], datos[1]))
+        return datos
+
+    def orden(self, unidad: Unidad) -> int:
+        """Devuelve la prioridad de desempate registrada para ``unidad``."""
+
+        return self._datos[unidad][2]
+
+    def _quitar_de_cubeta(self, unidad: Unidad, clave: Tuple[int, int]) -> None:
+        cubeta = self._cubetas[clave]
+        cubeta.discard(unidad)
+        if not cubeta:
+            del self._cubetas[clave]
+
+    def mas_cercano(
+        self,
+        x: int,
+        y: int,
+        filtro: Callable[[Unidad], bool] | None = None,
+        radio: int | None = None,
+    ) -> Unidad | None:
+        """Devuelve la unidad más cercana a ``(x, y)`` en distancia Manhattan.
+
+        Parameters
+        ----------
+        x, y:
+            Celda desde la que se mide la distancia.
+        filtro:
+            Función opcional que indica si una unidad es candidata.
+        radio:
+            Distancia máxima admitida. ``None`` no impone límite.
+
+        Returns
+        -------
+        Unidad | None
+            La unidad candidata más próxima o ``None`` si no hay ninguna.
+        """
+
+        mejor: Unidad | None = None
+        clave_mejor = (float("inf"), 0)
+
+        def evaluar(unidad: Unidad) -> None:
+            nonlocal mejor, clave_mejor
+            ux, uy, orden = self._datos[unidad]
+            dist = abs(ux - x) + abs(uy - y)
+            if radio is not None and dist > radio:
+                return
+            if (dist, orden) < clave_mejor and (filtro is None or filtro(unidad)):
+                mejor = unidad
+                clave_mejor = (dist, orden)
+
+        bx, by = self._cubeta(x, y)
+        k = 0
+        while True:
+            # Distancia mínima posible a cualquier celda del anillo ``k``
+            cota = 0 if k == 0 else (k - 1) * self.tam_cubeta + 1
+            if cota > clave_mejor[0] or (radio is not None and cota > radio):
+                return mejor
+            if (2 * k + 1) ** 2 > 4 * len(self._datos):
+                # El anillo ya es más grande que el número de unidades:
+                # resulta más barato revisar todas las restantes.
+                for unidad in self._datos:
+                    ux, uy, _ = self._datos[unidad]
+                    if max(abs(ux // self.tam_cubeta - bx), abs(uy // self.tam_cubeta - by)) >= k:
+                        evaluar(unidad)
+                return mejor
+            if k == 0:
+                claves = [(bx, by)]
+            else:
+                claves = [(bx + i, by - k) for i in range(-k, k + 1)]
+                claves += [(bx + i, by + k) for i in range(-k, k + 1)]
+                claves += [(bx - k, by + j) for j in range(-k + 1, k)]
+                claves += [(bx + k, by + j) for j in range(-k + 1, k)]
+            for clave in claves:
+                for unidad in self._cubetas.get(clave, ()):
+                    evaluar(unidad)
+            k += 1
@@ -0,0 +1,286 @@
+"""Instantáneas compactas del estado de un :class:`CampoBatalla`.
+
+Una :class:`Instantanea` guarda el estado mutable de la batalla en un único
+array de enteros: la cabecera con los contadores y el turno, una fila por
+unidad con sus estadísticas, posición, bando y orden de colocación, el daño
+acumulado por unidad, la composición de cada ejército y las rutas pendientes
+del modo ``"ruta"``. Los objetos :class:`Unidad` y :class:`Ejercito` se
+referencian por su índice en dos tuplas, de modo que capturar y restaurar no
+copia ningún objeto.
+
+Los planes del modo ``"incremental"`` guardan un estado de búsqueda que
+decide los empates entre caminos, así que se copian aparte junto con el
+registro de celdas cambiadas que aún no han aplicado.
+
+Al restaurar, las unidades recuperan sus estadísticas y posiciones, los
+ejércitos sus miembros, los planes su estado y el registro en memoria se
+recorta al turno de la instantánea. Las columnas del motor vectorial se
+descartan y se reconstruyen en el siguiente turno. El terreno no forma parte
+de la instantánea y debe ser el mismo que al capturarla.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Tuple
+
+import numpy as np
+
+from .ejercito import ConjuntoUnidades
+
+if TYPE_CHECKING:
+    from .campo import CampoBatalla
+    from .ejercito import Ejercito
+    from .replanificador import PlanIncremental
+    from .unidad import Unidad
+
+# Campos de la cabecera, en orden
+CABECERA = (
+    "turno_actual",
+    "daño_total",
+    "curacion_total",
+    "colocadas",
+    "turnos_registro",
+    "version_terreno",
+    "unidades",
+    "daños",
+    "ejercitos",
+    "rutas",
+)
+# Columnas de la fila de cada unidad. Las unidades fuera del campo tienen
+# ``x = y = -1``; ``equipo`` es el índice de su ejército o -1 si no tiene.
+COLUMNAS = (
+    "salud",
+    "ataque",
+    "defensa",
+    "velocidad",
+    "alcance",
+    "x",
+    "y",
+    "salud_max",
+    "equipo",
+    "orden",
+)
+_ESTADISTICAS = ("salud", "ataque", "defensa", "velocidad", "alcance")
+
+
+class Instantanea:
+    """Estado de un campo de batalla en un turno concreto.
+
+    Parameters
+    ----------
+    unidades:
+        Unidades referenciadas por las filas de ``datos``. Las presentes en
+        el campo van primero, en el orden en que se registraron.
+    ejercitos:
+        Ejércitos referenciados por la columna ``equipo``.
+    planes:
+        Pares ``(índice de unidad, plan)`` del modo ``"incremental"``. Los
+        planes son copias sin mapa ni cuadrícula.
+    registro:
+        ``(base, celdas)`` con el registro de ocupación del modo
+        ``"incremental"``.
+    datos:
+        Array plano de ``int64`` con la cabecera, el tamaño de cada
+        ejército, las filas de unidades, los pares ``(unidad, daño)``, los
+        miembros de cada ejército y las rutas como ``(unidad, destino_x,
+        destino_y, pasos, x1, y1, ...)``.
+    """
+
+    __slots__ = ("unidades", "ejercitos", "datos", "planes", "registro")
+
+    def __init__(
+        self,
+        unidades: Tuple[Unidad, ...],
+        ejercitos: Tuple[Ejercito, ...],
+        datos: np.ndarray,
+        planes: Tuple[Tuple[int, PlanIncremental], ...] = (),
+        registro: Tuple[int, Tuple[Tuple[int, int], ...]] = (0, ()),
+    ):
+        self.unidades = unidades
+        self.ejercitos = ejercitos
+        self.datos = datos
+        self.planes = planes
+        self.registro = registro
+
+    @property
+    def turno(self) -> int:
+        return int(self.datos[0])
+
+    @property
+    def nbytes(self) -> int:
+        return self.datos.nbytes
+
+    def cabecera(self) -> dict:
+        return dict(zip(CABECERA, self.datos[: len(CABECERA)].tolist()))
+
+    def _secciones(self):
+        n_cab = len(CABECERA)
+        n_unidades, n_daños, n_ejercitos, n_rutas = self.datos[n_cab - 4 : n_cab].tolist()
+        inicio = n_cab + n_ejercitos
+        filas = self.datos[inicio : inicio + n_unidades * len(COLUMNAS)]
+        inicio += filas.size
+        daños = self.datos[inicio : inicio + 2 * n_daños]
+        inicio += daños.size
+        tamaños = self.datos[n_cab : n_cab + n_ejercitos].tolist()
+        miembros = []
+        for tamaño in tamaños:
+            miembros.append(self.datos[inicio : inicio + tamaño].tolist())
+            inicio += tamaño
+        resto = self.datos[inicio:].tolist()
+        rutas = []
+        i = 0
+        for _ in range(n_rutas):
+            unidad, dx, dy, pasos = resto[i : i + 4]
+            coordenadas = resto[i + 4 : i + 4 + 2 * pasos]
+            rutas.append((unidad, (dx, dy), list(zip(coordenadas[::2], coordenadas[1::2]))))
+            i += 4 + 2 * pasos
+        return (
+            filas.reshape(n_unidades, len(COLUMNAS)).tolist(),
+            daños.tolist(),
+            miembros,
+            rutas,
+        )
+
+
+def capturar(campo: CampoBatalla) -> Instantanea:
+    """Crea una :class:`Instantanea` del estado actual de ``campo``."""
+
+    ejercitos = tuple(e for e in campo._indices if e is not None)
+    equipo_de = {e: i for i, e in enumerate(ejercitos)}
+    daños = campo._estadisticas["daño_por_unidad"]
+
+    unidades = list(campo._posiciones)
+    indice = {u: i for i, u in enumerate(unidades)}
+    for origen in (daños, *(e.unidades for e in ejercitos)):
+        for unidad in origen:
+            if unidad not in indice:
+                indice[unidad] = len(unidades)
+                unidades.append(unidad)
+
+    filas = []
+    for unidad in unidades:
+        fila = [getattr(unidad, c) for c in _ESTADISTICAS]
+        posicion = campo._posiciones.get(unidad)
+        if posicion is None:
+            fila += [-1, -1, -1, -1, -1]
+        else:
+            equipo = campo._equipos.get(unidad)
+            fila += [
+                posicion[0],
+                posicion[1],
+                campo._salud_max.get(unidad, unidad.salud),
+                equipo_de[equipo] if equipo is not None else -1,
+                campo._indices[equipo].orden(unidad),
+            ]
+        filas.append(fila)
+
+    rutas = [(u, r) for u, r in campo._ruta_cache.items() if u in campo._posiciones]
+    stats = campo._estadisticas
+    cabecera = [
+        stats["turno_actual"],
+        stats["daño_total"],
+        stats["curacion_total"],
+        campo._colocadas,
+        len(campo._replay),
+        campo.terreno.version,
+        len(unidades),
+        len(daños),
+        len(ejercitos),
+        len(rutas),
+    ]
+    miembros = [indice[u] for e in ejercitos for u in e.unidades]
+    datos = np.fromiter(
+        (
+            *cabecera,
+            *(len(e.unidades) for e in ejercitos),
+            *(v for fila in filas for v in fila),
+            *(v for u, d in daños.items() for v in (indice[u], d)),
+            *miembros,
+            *(
+                v
+                for u, (destino, pasos) in rutas
+                for v in (indice[u], *destino, len(pasos), *(c for p in pasos for c in p))
+            ),
+        ),
+        dtype=np.int64,
+    )
+    planes = tuple(
+        (indice[u], plan.copiar(None, None))
+        for u, plan in campo._planes.items()
+        if u in campo._posiciones
+    )
+    registro = (campo._registro_base, tuple(campo._registro_celdas))
+    return Instantanea(tuple(unidades), ejercitos, datos, planes, registro)
+
+
+def restaurar(campo: CampoBatalla, instantanea: Instantanea) -> None:
+    """Devuelve ``campo``, sus unidades y sus ejércitos al estado capturado."""
+
+    cabecera = instantanea.cabecera()
+    if cabecera["version_terreno"] != campo.terreno.version:
+        raise ValueError("El terreno cambió desde que se capturó la instantánea")
+    filas, daños, miembros, rutas = instantanea._secciones()
+    unidades = instantanea.unidades
+    ejercitos = instantanea.ejercitos
+
+    grid = campo._grid
+    for x, y in campo._posiciones.values():
+        grid[y][x] = None
+    campo._posiciones = {}
+    campo._equipos = {}
+    campo._sin_equipo = set()
+    campo._salud_max = {}
+    campo._indices = {}
+    for ejercito in ejercitos:
+        campo._indice_de(ejercito)
+
+    for unidad, fila in zip(unidades, filas):
+        (
+            unidad.salud,
+            unidad.ataque,
+            unidad.defensa,
+            unidad.velocidad,
+            unidad.alcance,
+            x,
+            y,
+            salud_max,
+            equipo,
+            orden,
+        ) = fila
+        if x < 0:
+            continue
+        ejercito = ejercitos[equipo] if equipo >= 0 else None
+        grid[y][x] = unidad
+        campo._posiciones[unidad] = (x, y)
+        campo._equipos[unidad] = ejercito
+        if ejercito is None:
+            campo._sin_equipo.add(unidad)
+        campo._indice_de(ejercito).insertar(unidad, x, y, orden)
+        campo._salud_max[unidad] = salud_max
+
+    for ejercito, indices in zip(ejercitos, miembros):
+        ejercito.unidades = ConjuntoUnidades(unidades[i] for i in indices)
+
+    stats = campo._estadisticas
+    stats["turno_actual"] = cabecera["turno_actual"]
+    stats["daño_total"] = cabecera["daño_total"]
+    stats["curacion_total"] = cabecera["curacion_total"]
+    stats["daño_por_unidad"] = {
+        unidades[daños[i]]: daños[i + 1] for i in range(0, len(daños), 2)
+    }
+    campo._colocadas = cabecera["colocadas"]
+    del campo._replay[cabecera["turnos_registro"] :]
+
+    campo._ruta_cache = {unidades[i]: (destino, pasos) for i, destino, pasos in rutas}
+    if instantanea.planes and campo._version_terreno != campo.terreno.version:
+        campo._filas_transitables = campo.terreno.transitables().tolist()
+        campo._version_terreno = campo.terreno.version
+    campo._planes = {
+        unidades[i]: plan.copiar(campo._filas_transitables, grid)
+        for i, plan in instantanea.planes
+    }
+    campo._registro_base, celdas = instantanea.registro
+    campo._registro_celdas = list(celdas)
+    # Las columnas del motor vectorial se reconstruyen en el siguiente turno
+    campo._motor_vectorial = None
+    campo._version += 1
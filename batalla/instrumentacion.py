@@ -0,0 +1,147 @@
+"""Métricas por fase de los turnos de :class:`CampoBatalla`.
+
+La instrumentación está desactivada por defecto: el campo solo comprueba si
+tiene una :class:`Instrumentacion` asociada al final de cada fase y de cada
+búsqueda de camino. Una vez activada con
+:meth:`CampoBatalla.activar_instrumentacion` se registra por turno:
+
+* el tiempo de cada fase (``limpieza``, ``iniciativa``, ``curaciones``,
+  ``ataques``, ``movimientos`` y ``registro``; el motor vectorial añade
+  ``sincronizacion`` y agrupa la limpieza con la iniciativa),
+* el tiempo de búsqueda de caminos (``caminos``: A*, planes incrementales y
+  campos de distancias), descontado de la fase en la que se produce para
+  que las fases sigan sumando el tiempo del turno,
+* las búsquedas A* y los nodos expandidos por ellas,
+* los aciertos y fallos de la caché de rutas (en el modo incremental, los
+  planes reparados y los creados de nuevo),
+* las unidades procesadas y las acciones generadas.
+
+Cada turno terminado se entrega al ``trazador`` indicado, si lo hay, y se
+acumula en los totales que devuelve :meth:`CampoBatalla.obtener_estadisticas`
+bajo la clave ``"rendimiento"``.
+"""
+
+from __future__ import annotations
+
+import cProfile
+from time import perf_counter
+from typing import Callable
+
+# Contadores de cada turno además de los tiempos por fase
+CONTADORES = (
+    "busquedas",
+    "nodos_expandidos",
+    "cache_aciertos",
+    "cache_fallos",
+    "unidades",
+    "acciones",
+)
+
+
+class Instrumentacion:
+    """Acumula los tiempos por fase y los contadores de cada turno.
+
+    Parameters
+    ----------
+    trazador:
+        Función que recibe el diccionario de métricas de cada turno al
+        terminarlo.
+    perfilar:
+        Si es ``True`` los turnos se ejecutan bajo :mod:`cProfile` y el
+        perfil acumulado queda en ``perfil``, listo para
+        :class:`pstats.Stats`.
+    """
+
+    def __init__(self, trazador: Callable[[dict], None] | None = None, perfilar: bool = False):
+        self.trazador = trazador
+        self.perfil = cProfile.Profile() if perfilar else None
+        self.turnos = 0
+        self.tiempo = 0.0
+        self.fases: dict[str, float] = {}
+        self.totales = dict.fromkeys(CONTADORES, 0)
+        self.ultimo: dict | None = None
+        self._turno: dict | None = None
+        self._inicio = self._marca = 0.0
+
+    # ------------------------------------------------------------------
+    # Llamadas desde el campo
+    # ------------------------------------------------------------------
+    def iniciar_turno(self, turno: int) -> None:
+        self._turno = {"turno": turno, "fases": {}, **dict.fromkeys(CONTADORES, 0)}
+        if self.perfil is not None:
+            self.perfil.enable()
+        self._inicio = self._marca = perf_counter()
+
+    def marcar(self, fase: str) -> None:
+        """Atribuye a ``fase`` el tiempo transcurrido desde la marca anterior."""
+
+        if self._turno is None:
+            return
+        ahora = perf_counter()
+        fases = self._turno["fases"]
+        fases[fase] = fases.get(fase, 0.0) + ahora - self._marca
+        self._marca = ahora
+
+    def acumular(self, fase: str, inicio: float) -> None:
+        """Atribuye a ``fase`` el tiempo desde ``inicio`` (de :func:`time.perf_counter`).
+
+        Ese tiempo se descuenta de la fase en curso, que termina en la
+        siguiente llamada a :meth:`marcar`.
+        """
+
+        if self._turno is None:
+            return
+        segundos = perf_counter() - inicio
+        fases = self._turno["fases"]
+        fases[fase] = fases.get(fase, 0.0) + segundos
+        self._marca += segundos
+
+    def contar(self, contador: str, cantidad: int = 1) -> None:
+        """Suma ``cantidad`` al contador del turno en curso, si lo hay."""
+
+        if self._turno is not None:
+            self._turno[contador] += cantidad
+
+    def cancelar_turno(self) -> None:
+        """Descarta el turno en curso, por ejemplo si falló, y para el perfil."""
+
+        if self.perfil is not None and self._turno is not None:
+            self.perfil.disable()
+        self._turno = None
+
+    def terminar_turno(self, acciones: int) -> dict:
+        ahora = perf_counter()
+        if self.perfil is not None:
+            self.perfil.disable()
+        turno, self._turno = self._turno, None
+        turno["acciones"] = acciones
+        turno["tiempo"] = ahora - self._inicio
+        self.turnos += 1
+        self.tiempo += turno["tiempo"]
+        for fase, segundos in turno["fases"].items():
+            self.fases[fase] = self.fases.get(fase, 0.0) + segundos
+        for contador in CONTADORES:
+            self.totales[contador] += turno[contador]
+        self.ultimo = turno
+        if self.trazador is not None:
+            self.trazador(turno)
+        return turno
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+    def resumen(self) -> dict:
+        """Totales acumulados, medias por turno y tasa de aciertos de caché."""
+
+        consultas = self.totales["cache_aciertos"] + self.totales["cache_fallos"]
+        turnos = self.turnos or 1
+        return {
+            "turnos": self.turnos,
+            "tiempo": self.tiempo,
+            "fases": dict(self.fases),
+            **self.totales,
+            "tasa_aciertos_cache": self.totales["cache_aciertos"] / consultas if consultas else 0.0,
+            "tiempo_medio_turno": self.tiempo / turnos,
+            "unidades_por_turno": self.totales["unidades"] / turnos,
+            "ultimo_turno": self.ultimo,
+        }
@@ -0,0 +1,333 @@
+"""Motor de combate vectorizado con estructura de columnas.
+
+Las estadísticas de todas las unidades se guardan en arrays de NumPy y cada
+fase del turno (curaciones, ataques, muertes y movimiento) se resuelve con
+operaciones sobre arrays completos en lugar de un bucle por unidad.
+
+A diferencia del motor por objetos, las unidades con la misma ``velocidad``
+actúan de forma simultánea: todas eligen objetivo con el estado del inicio
+de su tramo de iniciativa y después se aplican los efectos. Los tramos se
+resuelven en orden de velocidad descendente, de modo que una unidad abatida
+por otra más rápida ya no actúa. El movimiento siempre sigue un campo de
+distancias por ejército (ver :mod:`batalla.flujo`) y dos unidades nunca se
+mueven a la misma celda en un turno.
+"""
+
+from __future__ import annotations
+
+from time import perf_counter
+from typing import TYPE_CHECKING, Callable, List
+
+import numpy as np
+
+from .flujo import campo_distancias
+
+if TYPE_CHECKING:
+    from .campo import CampoBatalla
+    from .ejercito import Ejercito
+    from .unidad import Unidad
+
+# Orden de preferencia de los pasos, igual que en el movimiento por flujo
+_PASOS = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)])
+
+
+def _desplazamientos(radio: int) -> np.ndarray:
+    """Desplazamientos ``(dx, dy, distancia)`` ordenados por distancia Manhattan."""
+
+    filas = [
+        (dx, dy, abs(dx) + abs(dy))
+        for dy in range(-radio, radio + 1)
+        for dx in range(-radio, radio + 1)
+        if abs(dx) + abs(dy) <= radio
+    ]
+    filas.sort(key=lambda f: (f[2], f[1], f[0]))
+    return np.array(filas, dtype=np.int64).reshape(-1, 3)
+
+
+class MotorVectorial:
+    """Resuelve turnos de un :class:`CampoBatalla` con arrays por columna.
+
+    Las columnas se construyen a partir de las unidades del campo y se
+    mantienen como fuente de verdad mientras el campo no se modifique desde
+    fuera. Tras cada turno se actualizan los objetos :class:`Unidad`, las
+    posiciones del campo y los ejércitos solo para las unidades afectadas.
+    """
+
+    def __init__(self, campo: CampoBatalla, ejercito_a: Ejercito, ejercito_b: Ejercito):
+        self.campo = campo
+        self.ejercitos = (ejercito_a, ejercito_b)
+        for unidad in list(campo.unidades()):
+            if not unidad.esta_viva():
+                campo.eliminar_unidad(unidad)
+                ejercito_a.eliminar_unidad(unidad)
+                ejercito_b.eliminar_unidad(unidad)
+
+        # Las columnas siguen el orden de la cola de iniciativa
+        self.unidades: List[Unidad] = campo.cola_iniciativa()
+        campo._asignar_equipos(ejercito_a, ejercito_b)
+        posiciones = [campo.posicion(u) for u in self.unidades]
+        self.salud = np.array([u.salud for u in self.unidades], dtype=np.int64)
+        self.salud_max = np.array(
+            [campo._salud_max.get(u, u.salud) for u in self.unidades], dtype=np.int64
+        )
+        self.ataque = np.array([u.ataque for u in self.unidades], dtype=np.int64)
+        self.defensa = np.array([u.defensa for u in self.unidades], dtype=np.int64)
+        self.velocidad = np.array([u.velocidad for u in self.unidades], dtype=np.int64)
+        self.alcance = np.array([u.alcance for u in self.unidades], dtype=np.int64)
+        self.equipo = np.array(
+            [campo.ejercito_de(u) is not ejercito_a for u in self.unidades], dtype=np.int8
+        )
+        self.x = np.array([p[0] for p in posiciones], dtype=np.int64)
+        self.y = np.array([p[1] for p in posiciones], dtype=np.int64)
+        self.curacion = np.array(
+            [getattr(u.acciones.get("curar"), "cantidad", 0) for u in self.unidades],
+            dtype=np.int64,
+        )
+        self.puede_atacar = np.array(
+            ["atacar" in u.acciones for u in self.unidades], dtype=bool
+        )
+        self.viva = np.ones(len(self.unidades), dtype=bool)
+
+        self.ocupante = np.full((campo.alto, campo.ancho), -1, dtype=np.int64)
+        self.ocupante[self.y, self.x] = np.arange(len(self.unidades))
+        self.transitables = campo.terreno.transitables()
+        radio = int(self.alcance.max()) if len(self.unidades) else 0
+        self._desplazamientos = _desplazamientos(radio)
+        # Límites de cada tramo de iniciativa (unidades con igual velocidad)
+        cortes = np.flatnonzero(np.diff(self.velocidad)) + 1
+        self._tramos = list(zip(np.r_[0, cortes], np.r_[cortes, len(self.unidades)]))
+        self.version = campo._version
+        self.version_terreno = campo.terreno.version
+
+    def vigente(self, ejercito_a: Ejercito, ejercito_b: Ejercito) -> bool:
+        """Indica si las columnas siguen reflejando el estado del campo y del terreno."""
+
+        return (
+            self.ejercitos == (ejercito_a, ejercito_b)
+            and self.version == self.campo._version
+            and self.version_terreno == self.campo.terreno.version
+        )
+
+    # ------------------------------------------------------------------
+    # Búsquedas vectorizadas
+    # ------------------------------------------------------------------
+    def _buscar(
+        self,
+        buscadores: np.ndarray,
+        condicion: Callable[[np.ndarray, np.ndarray], np.ndarray],
+        incluir_propia: bool,
+    ) -> np.ndarray:
+        """Devuelve para cada buscador la unidad más cercana que cumple ``condicion``.
+
+        Se recorren los desplazamientos en orden de distancia creciente y
+        cada buscador se queda con la primera unidad válida dentro de su
+        ``alcance``. ``-1`` indica que no se encontró ninguna.
+        """
+
+        objetivo = np.full(len(buscadores), -1, dtype=np.int64)
+        pendientes = np.arange(len(buscadores))
+        alto, ancho = self.ocupante.shape
+        for dx, dy, distancia in self._desplazamientos:
+            if distancia == 0 and not incluir_propia:
+                continue
+            pendientes = pendientes[self.alcance[buscadores[pendientes]] >= distancia]
+            if not len(pendientes):
+                break
+            b = buscadores[pendientes]
+            cx = self.x[b] + dx
+            cy = self.y[b] + dy
+            dentro = (0 <= cx) & (cx < ancho) & (0 <= cy) & (cy < alto)
+            candidato = np.full(len(b), -1, dtype=np.int64)
+            candidato[dentro] = self.ocupante[cy[dentro], cx[dentro]]
+            valido = candidato >= 0
+            valido[valido] = condicion(b[valido], candidato[valido])
+            objetivo[pendientes[valido]] = candidato[valido]
+            pendientes = pendientes[~valido]
+        return objetivo
+
+    # ------------------------------------------------------------------
+    # Fases del turno
+    # ------------------------------------------------------------------
+    def _curaciones(self, acciones: list[dict], actuaron: np.ndarray) -> None:
+        for inicio, fin in self._tramos:
+            tramo = np.arange(inicio, fin)
+            sanadores = tramo[self.viva[tramo] & (self.curacion[tramo] > 0)]
+            if not len(sanadores):
+                continue
+            herida = self.viva & (self.salud < self.salud_max)
+            objetivo = self._buscar(
+                sanadores,
+                lambda b, c: herida[c] & (self.equipo[c] == self.equipo[b]),
+                incluir_propia=True,
+            )
+            hay = objetivo >= 0
+            sanadores, objetivo = sanadores[hay], objetivo[hay]
+            cantidades = self.curacion[sanadores]
+            np.add.at(self.salud, objetivo, cantidades)
+            actuaron[sanadores] = True
+            self.campo._estadisticas["curacion_total"] += int(cantidades.sum())
+            for s, o, c in zip(sanadores.tolist(), objetivo.tolist(), cantidades.tolist()):
+                acciones.append(
+                    {
+                        "tipo": "curar",
+                        "unidad": self.unidades[s],
+                        "objetivo": self.unidades[o],
+                        "origen": (int(self.x[s]), int(self.y[s])),
+                        "destino": (int(self.x[o]), int(self.y[o])),
+                        "cantidad": c,
+                    }
+                )
+
+    def _ataques(self, acciones: list[dict], actuaron: np.ndarray) -> np.ndarray:
+        """Resuelve los ataques y devuelve los índices de las unidades abatidas."""
+
+        abatidas = []
+        daño_por_unidad = self.campo._estadisticas["daño_por_unidad"]
+        for inicio, fin in self._tramos:
+            tramo = np.arange(inicio, fin)
+            atacantes = tramo[self.viva[tramo] & ~actuaron[tramo] & self.puede_atacar[tramo]]
+            if not len(atacantes):
+                continue
+            objetivo = self._buscar(
+                atacantes,
+                lambda b, c: self.viva[c] & (self.equipo[c] != self.equipo[b]),
+                incluir_propia=False,
+            )
+            hay = objetivo >= 0
+            atacantes, objetivo = atacantes[hay], objetivo[hay]
+            # Mismo cálculo que ``Unidad.recibir_daño``
+            daños = np.maximum(self.ataque[atacantes] - self.defensa[objetivo], 0)
+            np.subtract.at(self.salud, objetivo, daños)
+            actuaron[atacantes] = True
+            self.campo._estadisticas["daño_total"] += int(daños.sum())
+            for a, o, d in zip(atacantes.tolist(), objetivo.tolist(), daños.tolist()):
+                unidad = self.unidades[a]
+                daño_por_unidad[unidad] = daño_por_unidad.get(unidad, 0) + d
+                acciones.append(
+                    {
+                        "tipo": "atacar",
+                        "unidad": unidad,
+                        "objetivo": self.unidades[o],
+                        "origen": (int(self.x[a]), int(self.y[a])),
+                        "destino": (int(self.x[o]), int(self.y[o])),
+                        "daño": d,
+                    }
+                )
+            # Las bajas se retiran antes del siguiente tramo de iniciativa
+            muertas = np.unique(objetivo[self.salud[objetivo] <= 0])
+            muertas = muertas[self.viva[muertas]]
+            self.viva[muertas] = False
+            self.ocupante[self.y[muertas], self.x[muertas]] = -1
+            abatidas.append(muertas)
+        return np.concatenate(abatidas) if abatidas else np.empty(0, dtype=np.int64)
+
+    def _movimientos(self, acciones: list[dict], actuaron: np.ndarray) -> np.ndarray:
+        """Calcula un paso por unidad y devuelve los índices de las que se mueven."""
+
+        alto, ancho = self.ocupante.shape
+        instrumentacion = self.campo._instrumentacion
+        movidas = []
+        for equipo in (0, 1):
+            enemigos = self.viva & (self.equipo != equipo)
+            candidatos = np.flatnonzero(self.viva & ~actuaron & (self.equipo == equipo))
+            if not len(candidatos) or not enemigos.any():
+                continue
+            inicio = perf_counter() if instrumentacion is not None else 0.0
+            distancias = campo_distancias(
+                self.transitables, zip(self.x[enemigos].tolist(), self.y[enemigos].tolist())
+            )
+            if instrumentacion is not None:
+                instrumentacion.acumular("caminos", inicio)
+            actual = distancias[self.y[candidatos], self.x[candidatos]]
+            nx = self.x[candidatos, None] + _PASOS[:, 0]
+            ny = self.y[candidatos, None] + _PASOS[:, 1]
+            dentro = (0 <= nx) & (nx < ancho) & (0 <= ny) & (ny < alto)
+            nxc = np.clip(nx, 0, ancho - 1)
+            nyc = np.clip(ny, 0, alto - 1)
+            vecinas = np.where(dentro, distancias[nyc, nxc], -1)
+            libres = dentro & (self.ocupante[nyc, nxc] < 0)
+            validas = libres & (vecinas >= 0) & (vecinas < actual[:, None])
+            vecinas = np.where(validas, vecinas, np.iinfo(np.int32).max)
+            eleccion = vecinas.argmin(axis=1)
+            mueve = validas[np.arange(len(candidatos)), eleccion]
+            movidas.append(
+                np.stack(
+                    (
+                        candidatos[mueve],
+                        nx[mueve, eleccion[mueve]],
+                        ny[mueve, eleccion[mueve]],
+                    ),
+                    axis=1,
+                )
+            )
+        if not movidas:
+            return np.empty((0, 3), dtype=np.int64)
+        movidas = np.concatenate(movidas)
+        movidas = movidas[np.argsort(movidas[:, 0], kind="stable")]
+        # Si varias unidades eligen la misma celda se mueve la de mayor iniciativa
+        _, primeras = np.unique(movidas[:, 2] * ancho + movidas[:, 1], return_index=True)
+        movidas = movidas[np.sort(primeras)]
+        indices, destino_x, destino_y = movidas.T
+        self.ocupante[self.y[indices], self.x[indices]] = -1
+        self.ocupante[destino_y, destino_x] = indices
+        for i, nx_, ny_ in movidas.tolist():
+            acciones.append(
+                {
+                    "tipo": "mover",
+                    "unidad": self.unidades[i],
+                    "origen": (int(self.x[i]), int(self.y[i])),
+                    "destino": (nx_, ny_),
+                }
+            )
+        self.x[indices] = destino_x
+        self.y[indices] = destino_y
+        return movidas
+
+    # ------------------------------------------------------------------
+    # Turno completo
+    # ------------------------------------------------------------------
+    def simular_turno(self) -> list[dict]:
+        """Resuelve un turno y sincroniza los cambios con el campo."""
+
+        campo = self.campo
+        instrumentacion = campo._instrumentacion
+        acciones: list[dict] = []
+        actuaron = np.zeros(len(self.unidades), dtype=bool)
+        salud_previa = self.salud.copy()
+        if instrumentacion is not None:
+            instrumentacion.contar("unidades", int(self.viva.sum()))
+        self._curaciones(acciones, actuaron)
+        if instrumentacion is not None:
+            instrumentacion.marcar("curaciones")
+        abatidas = self._ataques(acciones, actuaron)
+        if instrumentacion is not None:
+            instrumentacion.marcar("ataques")
+        movidas = self._movimientos(acciones, actuaron)
+        if instrumentacion is not None:
+            instrumentacion.marcar("movimientos")
+
+        for i in np.flatnonzero(self.salud != salud_previa).tolist():
+            self.unidades[i].salud = int(self.salud[i])
+        for i in abatidas.tolist():
+            unidad = self.unidades[i]
+            campo.eliminar_unidad(unidad)
+            for ejercito in self.ejercitos:
+                ejercito.eliminar_unidad(unidad)
+        rechazadas = set()
+        for i, nx, ny in movidas.tolist():
+            unidad = self.unidades[i]
+            x, y = campo.posicion(unidad)
+            if not campo.mover_unidad(unidad, nx - x, ny - y):
+                rechazadas.add(unidad)
+        if rechazadas:
+            # Las columnas ya no coinciden con el campo: se reconstruyen en
+            # el siguiente turno y no se informa de movimientos que no ocurrieron
+            acciones[:] = [
+                a for a in acciones if a["tipo"] != "mover" or a["unidad"] not in rechazadas
+            ]
+            self.version = -1
+        else:
+            self.version = campo._version
+        if instrumentacion is not None:
+            instrumentacion.marcar("sincronizacion")
+        return acciones
@@ -0,0 +1,313 @@
+"""Replanificación incremental de rutas con D* Lite.
+
+Cada :class:`PlanIncremental` conserva el estado de búsqueda de una unidad
+(valores ``g``/``rhs`` y la cola de prioridad) entre turnos. La búsqueda se
+hace hacia atrás, desde el objetivo hasta la unidad, de modo que cuando la
+unidad avanza solo cambia el término ``km`` de las claves. Cuando cambia la
+ocupación de alguna celda se reparan únicamente los valores afectados y, si
+el objetivo se desplaza, la raíz de la búsqueda se traslada a su nueva celda
+como en *Moving Target D* Lite*.
+
+Las celdas ocupadas se consideran infranqueables salvo la del objetivo, igual
+que en :meth:`CampoBatalla._buscar_camino`. Con ``radio_ocupacion`` solo
+cuentan las ocupadas a esa distancia de la unidad: las unidades lejanas
+habrán cambiado de sitio cuando se llegue a ellas, y así los cambios lejanos
+no obligan a reparar nada ni aíslan a la unidad tras una multitud.
+"""
+
+from __future__ import annotations
+
+from heapq import heappop, heappush
+from typing import Iterable, List, Tuple
+
+INF = float("inf")
+_VECINOS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+_VECINOS_Y_PROPIA = _VECINOS + ((0, 0),)
+Celda = Tuple[int, int]
+
+
+class PlanIncremental:
+    """Ruta de una unidad hacia su objetivo que se repara entre turnos.
+
+    Parameters
+    ----------
+    transitables:
+        Filas ``[y][x]`` que indican si el terreno permite ocupar la celda.
+    ocupacion:
+        Filas ``[y][x]`` con la unidad que ocupa cada celda o ``None``. Se
+        consulta en vivo, por lo que debe ser la cuadrícula del campo.
+    inicio, objetivo:
+        Celdas de la unidad y de su objetivo.
+    radio_ocupacion:
+        Distancia Manhattan a la unidad dentro de la cual las celdas
+        ocupadas bloquean el paso. ``None`` las tiene en cuenta todas.
+
+    El llamador debe notificar con :meth:`celdas_cambiadas` las celdas cuya
+    ocupación cambie; con ``radio_ocupacion`` basta con las que estén a
+    ``radio_ocupacion + 1`` o menos de la unidad.
+    """
+
+    def __init__(
+        self,
+        transitables,
+        ocupacion,
+        inicio: Celda,
+        objetivo: Celda,
+        radio_ocupacion: int | None = None,
+    ):
+        self._transitables = transitables
+        self._ocupacion = ocupacion
+        self.radio_ocupacion = radio_ocupacion
+        self.alto = len(transitables)
+        self.ancho = len(transitables[0]) if self.alto else 0
+        self.inicio = inicio
+        self.objetivo = objetivo
+        self._km = 0
+        self._g: dict[Celda, float] = {}
+        self._rhs: dict[Celda, float] = {objetivo: 0}
+        self._cola: list = []
+        self._en_cola: dict[Celda, Tuple[float, float]] = {}
+        # Número de celdas expandidas desde la creación del plan
+        self.expansiones = 0
+        # Posición del registro de cambios del campo ya aplicada al plan
+        self.sincronizado = 0
+        self._encolar(objetivo)
+
+    # ------------------------------------------------------------------
+    # Utilidades de D* Lite
+    # ------------------------------------------------------------------
+    def _coste(self, celda: Celda) -> float:
+        """Coste de entrar en ``celda`` desde una vecina."""
+
+        x, y = celda
+        if not (0 <= x < self.ancho and 0 <= y < self.alto) or not self._transitables[y][x]:
+            return INF
+        if self._ocupacion[y][x] is None or celda == self.objetivo:
+            return 1
+        radio = self.radio_ocupacion
+        if radio is not None and abs(x - self.inicio[0]) + abs(y - self.inicio[1]) > radio:
+            return 1
+        return INF
+
+    def _clave(self, celda: Celda) -> Tuple[float, float]:
+        minimo = min(self._g.get(celda, INF), self._rhs.get(celda, INF))
+        h = abs(celda[0] - self.inicio[0]) + abs(celda[1] - self.inicio[1])
+        return (minimo + h + self._km, minimo)
+
+    def _encolar(self, celda: Celda) -> None:
+        clave = self._clave(celda)
+        self._en_cola[celda] = clave
+        heappush(self._cola, (clave, celda))
+
+    def _calcular_rhs(self, celda: Celda) -> float:
+        x, y = celda
+        mejor = INF
+        for dx, dy in _VECINOS:
+            vecina = (x + dx, y + dy)
+            g = self._g.get(vecina, INF)
+            if g + 1 < mejor and self._coste(vecina) == 1:
+                mejor = g + 1
+        return mejor
+
+    def _en_terreno(self, celda: Celda) -> bool:
+        x, y = celda
+        return 0 <= x < self.ancho and 0 <= y < self.alto and self._transitables[y][x]
+
+    def _reparar(self, celda: Celda) -> None:
+        """Recalcula ``rhs`` de ``celda`` y la reencola si es necesario."""
+
+        if celda == self.objetivo or not self._en_terreno(celda):
+            return
+        rhs = self._calcular_rhs(celda)
+        if rhs != self._rhs.get(celda, INF):
+            self._rhs[celda] = rhs
+        self._actualizar_vertice(celda)
+
+    def _actualizar_vertice(self, celda: Celda) -> None:
+        if self._g.get(celda, INF) != self._rhs.get(celda, INF):
+            self._encolar(celda)
+        else:
+            self._en_cola.pop(celda, None)
+
+    def _cima(self):
+        """Descarta entradas obsoletas y devuelve la clave mínima vigente."""
+
+        cola = self._cola
+        while cola:
+            clave, celda = cola[0]
+            if self._en_cola.get(celda) == clave:
+                return clave, celda
+            heappop(cola)
+        return (INF, INF), None
+
+    def _calcular(self) -> None:
+        g, rhs = self._g, self._rhs
+        cola, en_cola = self._cola, self._en_cola
+        inicio, km, objetivo = self.inicio, self._km, self.objetivo
+        ix, iy = inicio
+        while True:
+            clave, u = self._cima()
+            g_inicio = g.get(inicio, INF)
+            rhs_inicio = rhs.get(inicio, INF)
+            minimo = g_inicio if g_inicio < rhs_inicio else rhs_inicio
+            if u is None or (clave >= (minimo + km, minimo) and rhs_inicio <= g_inicio):
+                return
+            heappop(cola)
+            nueva = self._clave(u)
+            if clave < nueva:
+                en_cola[u] = nueva
+                heappush(cola, (nueva, u))
+                continue
+            del en_cola[u]
+            self.expansiones += 1
+            x, y = u
+            g_u = g.get(u, INF)
+            if g_u > rhs.get(u, INF):
+                # Sobreconsistente: fijar ``g`` y relajar a las vecinas
+                g_u = g[u] = rhs[u]
+                if self._coste(u) == INF:
+                    continue
+                paso = g_u + 1
+                for dx, dy in _VECINOS:
+                    s = (x + dx, y + dy)
+                    if paso < rhs.get(s, INF) and s != objetivo and self._en_terreno(s):
+                        rhs[s] = paso
+                        g_s = g.get(s, INF)
+                        if g_s == paso:
+                            en_cola.pop(s, None)
+                            continue
+                        m = g_s if g_s < paso else paso
+                        nueva = (m + abs(s[0] - ix) + abs(s[1] - iy) + km, m)
+                        en_cola[s] = nueva
+                        heappush(cola, (nueva, s))
+            else:
+                # Infraconsistente: invalidar ``g`` y recalcular dependientes
+                g_anterior = g_u
+                g[u] = INF
+                for dx, dy in _VECINOS_Y_PROPIA:
+                    s = (x + dx, y + dy)
+                    if s == u or rhs.get(s, INF) == g_anterior + 1:
+                        self._reparar(s)
+
+    # ------------------------------------------------------------------
+    # Interfaz pública
+    # ------------------------------------------------------------------
+    def celdas_cambiadas(self, celdas: Iterable[Celda]) -> None:
+        """Repara los valores que dependen de la ocupación de ``celdas``."""
+
+        g, rhs = self._g, self._rhs
+        for celda in celdas:
+            g_celda = g.get(celda, INF)
+            if g_celda == INF:
+                # Ninguna vecina puede estar usando esta celda
+                continue
+            x, y = celda
+            libre = self._coste(celda) == 1
+            for dx, dy in _VECINOS:
+                s = (x + dx, y + dy)
+                if libre:
+                    if g_celda + 1 < rhs.get(s, INF) and s != self.objetivo and self._en_terreno(s):
+                        rhs[s] = g_celda + 1
+                        self._actualizar_vertice(s)
+                elif rhs.get(s, INF) == g_celda + 1:
+                    self._reparar(s)
+
+    def mover_inicio(self, inicio: Celda) -> None:
+        """Registra que la unidad se encuentra ahora en ``inicio``."""
+
+        anterior = self.inicio
+        if inicio == anterior:
+            return
+        self.inicio = inicio
+        salto = abs(inicio[0] - anterior[0]) + abs(inicio[1] - anterior[1])
+        self._km += salto
+        radio = self.radio_ocupacion
+        if radio is None:
+            return
+        # Las celdas ocupadas que entran o salen del radio cambian de coste
+        cambiadas = []
+        alcance = radio + salto
+        x0, y0 = inicio
+        for dy in range(-alcance, alcance + 1):
+            y = y0 + dy
+            if not 0 <= y < self.alto:
+                continue
+            resto = alcance - abs(dy)
+            fila = self._ocupacion[y]
+            for x in range(max(0, x0 - resto), min(self.ancho, x0 + resto + 1)):
+                if fila[x] is None:
+                    continue
+                dentro = abs(x - x0) + abs(dy) <= radio
+                antes = abs(x - anterior[0]) + abs(y - anterior[1]) <= radio
+                if dentro != antes:
+                    cambiadas.append((x, y))
+        self.celdas_cambiadas(cambiadas)
+
+    def mover_objetivo(self, objetivo: Celda) -> None:
+        """Traslada la raíz de la búsqueda a la nueva celda del objetivo."""
+
+        anterior = self.objetivo
+        if objetivo == anterior:
+            return
+        self.objetivo = objetivo
+        self._reparar(anterior)
+        self._rhs[objetivo] = 0
+        self._actualizar_vertice(objetivo)
+        # Las dos celdas cambian de coste: una deja de admitir entrar en
+        # ella y la otra pasa a admitirlo aunque esté ocupada
+        self.celdas_cambiadas((anterior, objetivo))
+
+    def copiar(self, transitables, ocupacion) -> PlanIncremental:
+        """Devuelve un plan independiente con el mismo estado de búsqueda.
+
+        El mapa y la cuadrícula no pertenecen al plan: la copia usa
+        ``transitables`` y ``ocupacion``, que pueden ser ``None`` mientras no
+        vaya a avanzarse.
+        """
+
+        copia = object.__new__(PlanIncremental)
+        copia.__dict__.update(self.__dict__)
+        copia._transitables = transitables
+        copia._ocupacion = ocupacion
+        copia._g = dict(self._g)
+        copia._rhs = dict(self._rhs)
+        copia._cola = list(self._cola)
+        copia._en_cola = dict(self._en_cola)
+        return copia
+
+    def distancia(self) -> float:
+        """Longitud del camino más corto actual (``INF`` si no existe)."""
+
+        self._calcular()
+        return min(self._g.get(self.inicio, INF), self._rhs.get(self.inicio, INF))
+
+    def siguiente_paso(self) -> Celda | None:
+        """Devuelve la siguiente celda del camino o ``None`` si no hay."""
+
+        self._calcular()
+        x, y = self.inicio
+        mejor, paso = INF, None
+        for dx, dy in _VECINOS:
+            vecina = (x + dx, y + dy)
+            valor = self._g.get(vecina, INF) + self._coste(vecina)
+            if valor < mejor:
+                mejor, paso = valor, vecina
+        return paso
+
+    def camino(self, limite: int | None = None) -> List[Celda] | None:
+        """Reconstruye el camino completo desde ``inicio`` hasta el objetivo."""
+
+        self._calcular()
+        if self.distancia() == INF:
+            return None
+        camino = [self.inicio]
+        actual = self.inicio
+        limite = limite or self.ancho * self.alto
+        while actual != self.objetivo and len(camino) <= limite:
+            x, y = actual
+            actual = min(
+                ((x + dx, y + dy) for dx, dy in _VECINOS),
+                key=lambda c: self._g.get(c, INF) + self._coste(c),
+            )
+            camino.append(actual)
+        return camino
@@ -0,0 +1,101 @@
+"""Serialización y transmisión del registro de acciones de una batalla.
+
+Además del volcado completo que realiza :meth:`CampoBatalla.exportar_replay`,
+el módulo ofrece un formato JSONL en el que cada línea es un turno
+``{"turno": n, "acciones": [...]}``. Los turnos se escriben a medida que se
+simulan y pueden leerse de uno en uno, de modo que la memoria necesaria no
+depende de la duración de la batalla.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import IO, Iterator
+
+
+def serializar_accion(accion: dict) -> dict:
+    """Convierte una acción de la simulación en un diccionario serializable.
+
+    Las unidades se sustituyen por su identificador y su clase, y las
+    posiciones por listas ``[x, y]``.
+    """
+
+    item = dict(accion)
+    for clave in ("unidad", "objetivo"):
+        if clave in item:
+            u = item[clave]
+            item[clave] = {"id": str(u.id), "tipo": u.__class__.__name__}
+    for clave in ("origen", "destino"):
+        if clave in item:
+            item[clave] = list(item[clave])
+    return item
+
+
+def serializar_turno(turno: int, acciones: list[dict]) -> dict:
+    """Devuelve el registro serializable de un turno completo."""
+
+    return {"turno": turno, "acciones": [serializar_accion(a) for a in acciones]}
+
+
+class EscritorReplayJSONL:
+    """Escribe los turnos de una batalla en un archivo o flujo JSONL.
+
+    Parameters
+    ----------
+    destino:
+        Ruta del archivo o flujo de texto abierto. Los flujos recibidos no
+        se cierran al terminar.
+    intervalo_volcado:
+        Cantidad de turnos entre llamadas a ``flush`` del destino.
+    """
+
+    def __init__(self, destino: str | Path | IO[str], intervalo_volcado: int = 10):
+        if isinstance(destino, (str, Path)):
+            self._flujo = open(destino, "w", encoding="utf-8")
+            self._propio = True
+        else:
+            self._flujo = destino
+            self._propio = False
+        self.intervalo_volcado = max(1, intervalo_volcado)
+        self._pendientes = 0
+
+    def escribir_turno(self, turno: int, acciones: list[dict]) -> None:
+        """Serializa y escribe un turno como una única línea JSON."""
+
+        linea = json.dumps(serializar_turno(turno, acciones), ensure_ascii=False)
+        self._flujo.write(linea + "\n")
+        self._pendientes += 1
+        if self._pendientes >= self.intervalo_volcado:
+            self.volcar()
+
+    def volcar(self) -> None:
+        """Fuerza la escritura de los turnos pendientes."""
+
+        self._flujo.flush()
+        self._pendientes = 0
+
+    def cerrar(self) -> None:
+        """Vuelca los datos pendientes y cierra el archivo si es propio."""
+
+        self.volcar()
+        if self._propio:
+            self._flujo.close()
+
+    def __enter__(self) -> "EscritorReplayJSONL":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+
+def leer_replay_jsonl(origen: str | Path | IO[str]) -> Iterator[dict]:
+    """Itera perezosamente los turnos de un registro JSONL."""
+
+    if isinstance(origen, (str, Path)):
+        with open(origen, "r", encoding="utf-8") as archivo:
+            yield from leer_replay_jsonl(archivo)
+        return
+    for linea in origen:
+        if linea.strip():
+            yield json.loads(linea)
@@ -0,0 +1,266 @@
+"""Formato binario compacto para el registro de batallas.
+
+Estructura del archivo (enteros little-endian)::
+
+    cabecera   "RPLB" + versión (u16)
+    turnos     por turno: número (u32), cantidad de acciones (u32) y un
+               registro de 24 bytes por acción
+    unidades   tabla de tipos y tabla de unidades (id y tipo)
+    índice     por turno: número (u32), desplazamiento (u64), acciones (u32)
+    pie        desplazamiento de la tabla de unidades (u64), del índice
+               (u64) y "RPLE"
+
+Cada acción referencia a las unidades por su posición en la tabla, guarda
+el origen en coordenadas absolutas y el destino como desplazamiento respecto
+al origen. El índice del pie permite leer el turno ``T`` sin recorrer los
+anteriores.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+from pathlib import Path
+from typing import IO, Iterator
+
+MAGIA = b"RPLB"
+MAGIA_FIN = b"RPLE"
+VERSION = 1
+
+TIPOS_ACCION = ("mover", "atacar", "curar")
+# Clave en la que cada tipo de acción guarda su valor numérico
+_CLAVE_VALOR = {"atacar": "daño", "curar": "cantidad"}
+
+_CABECERA = struct.Struct("<4sH")
+_TURNO = struct.Struct("<II")
+_ACCION = struct.Struct("<BBHIIHHhhi")
+_ENTRADA_INDICE = struct.Struct("<IQI")
+_PIE = struct.Struct("<QQ4s")
+
+# Rangos de los campos de coordenadas de cada acción (u16 y i16)
+_MAX_COORDENADA = 0xFFFF
+_MAX_DESPLAZAMIENTO = 0x7FFF
+
+_CON_OBJETIVO = 1
+_CON_ORIGEN = 2
+_CON_DESTINO = 4
+_CON_VALOR = 8
+
+
+def _clave_unidad(unidad) -> tuple[str, str]:
+    """Devuelve ``(id, tipo)`` de una unidad viva o ya serializada."""
+
+    if isinstance(unidad, dict):
+        return str(unidad["id"]), unidad["tipo"]
+    return str(unidad.id), unidad.__class__.__name__
+
+
+class EscritorReplayBinario:
+    """Escribe turnos en el formato binario de forma incremental.
+
+    Acepta tanto las acciones devueltas por :meth:`CampoBatalla.simular_turno`
+    como las ya serializadas de ``replay.json``. La tabla de unidades y el
+    índice se escriben al llamar a :meth:`cerrar`.
+    """
+
+    def __init__(self, destino: str | Path | IO[bytes]):
+        if isinstance(destino, (str, Path)):
+            self._flujo = open(destino, "wb")
+            self._propio = True
+        else:
+            self._flujo = destino
+            self._propio = False
+        self._unidades: dict[tuple[str, str], int] = {}
+        self._indice: list[tuple[int, int, int]] = []
+        self._posicion = self._flujo.write(_CABECERA.pack(MAGIA, VERSION))
+
+    def _indice_unidad(self, unidad) -> int:
+        clave = _clave_unidad(unidad)
+        if clave not in self._unidades:
+            self._unidades[clave] = len(self._unidades)
+        return self._unidades[clave]
+
+    def _codificar(self, accion: dict) -> bytes:
+        tipo = accion["tipo"]
+        if tipo not in TIPOS_ACCION:
+            raise ValueError(f"Tipo de acción desconocido: {tipo}")
+        banderas = 0
+        objetivo = 0
+        if "objetivo" in accion:
+            banderas |= _CON_OBJETIVO
+            objetivo = self._indice_unidad(accion["objetivo"])
+        ox = oy = 0
+        if "origen" in accion:
+            banderas |= _CON_ORIGEN
+            ox, oy = accion["origen"]
+        dx = dy = 0
+        if "destino" in accion:
+            banderas |= _CON_DESTINO
+            dx = accion["destino"][0] - ox
+            dy = accion["destino"][1] - oy
+        if not (0 <= ox <= _MAX_COORDENADA and 0 <= oy <= _MAX_COORDENADA):
+            raise ValueError(f"Origen fuera del rango del formato binario: {(ox, oy)}")
+        if not (
+            -_MAX_DESPLAZAMIENTO - 1 <= dx <= _MAX_DESPLAZAMIENTO
+            and -_MAX_DESPLAZAMIENTO - 1 <= dy <= _MAX_DESPLAZAMIENTO
+        ):
+            raise ValueError(f"Desplazamiento fuera del rango del formato binario: {(dx, dy)}")
+        valor = 0
+        clave_valor = _CLAVE_VALOR.get(tipo)
+        if clave_valor in accion:
+            banderas |= _CON_VALOR
+            valor = accion[clave_valor]
+        return _ACCION.pack(
+            TIPOS_ACCION.index(tipo),
+            banderas,
+            0,
+            self._indice_unidad(accion["unidad"]),
+            objetivo,
+            ox,
+            oy,
+            dx,
+            dy,
+            valor,
+        )
+
+    def escribir_turno(self, turno: int, acciones: list[dict]) -> None:
+        """Añade un turno completo al archivo."""
+
+        datos = _TURNO.pack(turno, len(acciones)) + b"".join(
+            self._codificar(a) for a in acciones
+        )
+        self._indice.append((turno, self._posicion, len(acciones)))
+        self._posicion += self._flujo.write(datos)
+
+    def cerrar(self) -> None:
+        """Escribe la tabla de unidades, el índice y el pie."""
+
+        tipos = sorted({tipo for _, tipo in self._unidades})
+        partes = [struct.pack("<H", len(tipos))]
+        for tipo in tipos:
+            nombre = tipo.encode("utf-8")
+            partes.append(struct.pack("<B", len(nombre)) + nombre)
+        partes.append(struct.pack("<I", len(self._unidades)))
+        for id_, tipo in self._unidades:
+            codigo = id_.encode("utf-8")
+            partes.append(struct.pack("<BB", tipos.index(tipo), len(codigo)) + codigo)
+        inicio_unidades = self._posicion
+        self._posicion += self._flujo.write(b"".join(partes))
+
+        inicio_indice = self._posicion
+        indice = [struct.pack("<I", len(self._indice))]
+        indice.extend(_ENTRADA_INDICE.pack(*entrada) for entrada in self._indice)
+        self._flujo.write(b"".join(indice))
+        self._flujo.write(_PIE.pack(inicio_unidades, inicio_indice, MAGIA_FIN))
+        self._flujo.flush()
+        if self._propio:
+            self._flujo.close()
+
+    def __enter__(self) -> "EscritorReplayBinario":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+
+class LectorReplayBinario:
+    """Lee un registro binario con acceso directo a cualquier turno.
+
+    Los turnos se devuelven con la misma estructura que ``replay.json``.
+    """
+
+    def __init__(self, ruta: str | Path):
+        self._archivo = open(ruta, "rb")
+        try:
+            self._leer_tablas()
+        except BaseException:
+            self._archivo.close()
+            raise
+
+    def _leer_tablas(self) -> None:
+        magia, version = _CABECERA.unpack(self._archivo.read(_CABECERA.size))
+        if magia != MAGIA or version != VERSION:
+            raise ValueError("El archivo no es un registro binario compatible")
+        self._archivo.seek(-_PIE.size, 2)
+        inicio_unidades, inicio_indice, magia_fin = _PIE.unpack(self._archivo.read(_PIE.size))
+        if magia_fin != MAGIA_FIN:
+            raise ValueError("Registro binario incompleto")
+
+        self._archivo.seek(inicio_unidades)
+        datos = self._archivo.read(inicio_indice - inicio_unidades)
+        (n_tipos,) = struct.unpack_from("<H", datos, 0)
+        pos = 2
+        tipos = []
+        for _ in range(n_tipos):
+            largo = datos[pos]
+            tipos.append(datos[pos + 1 : pos + 1 + largo].decode("utf-8"))
+            pos += 1 + largo
+        (n_unidades,) = struct.unpack_from("<I", datos, pos)
+        pos += 4
+        self.unidades: list[dict] = []
+        for _ in range(n_unidades):
+            tipo, largo = struct.unpack_from("<BB", datos, pos)
+            id_ = datos[pos + 2 : pos + 2 + largo].decode("utf-8")
+            self.unidades.append({"id": id_, "tipo": tipos[tipo]})
+            pos += 2 + largo
+
+        (n_turnos,) = struct.unpack("<I", self._archivo.read(4))
+        entradas = self._archivo.read(n_turnos * _ENTRADA_INDICE.size)
+        self._indice = {
+            turno: (desplazamiento, acciones)
+            for turno, desplazamiento, acciones in _ENTRADA_INDICE.iter_unpack(entradas)
+        }
+
+    def __len__(self) -> int:
+        return len(self._indice)
+
+    def __iter__(self) -> Iterator[dict]:
+        for turno in self.turnos():
+            yield self.turno(turno)
+
+    def turnos(self) -> list[int]:
+        """Números de turno presentes en el registro, en orden."""
+
+        return list(self._indice)
+
+    def turno(self, numero: int) -> dict:
+        """Devuelve el turno ``numero`` sin leer los anteriores."""
+
+        desplazamiento, cantidad = self._indice[numero]
+        self._archivo.seek(desplazamiento + _TURNO.size)
+        datos = self._archivo.read(cantidad * _ACCION.size)
+        acciones = []
+        for tipo, banderas, _, unidad, objetivo, ox, oy, dx, dy, valor in _ACCION.iter_unpack(
+            datos
+        ):
+            nombre = TIPOS_ACCION[tipo]
+            accion = {"tipo": nombre, "unidad": dict(self.unidades[unidad])}
+            if banderas & _CON_OBJETIVO:
+                accion["objetivo"] = dict(self.unidades[objetivo])
+            if banderas & _CON_ORIGEN:
+                accion["origen"] = [ox, oy]
+            if banderas & _CON_DESTINO:
+                accion["destino"] = [ox + dx, oy + dy]
+            if banderas & _CON_VALOR:
+                accion[_CLAVE_VALOR[nombre]] = valor
+            acciones.append(accion)
+        return {"turno": numero, "acciones": acciones}
+
+    def cerrar(self) -> None:
+        self._archivo.close()
+
+    def __enter__(self) -> "LectorReplayBinario":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+
+def convertir_replay_json(ruta_json: str | Path, ruta_binaria: str | Path) -> None:
+    """Convierte un ``replay.json`` existente al formato binario."""
+
+    with open(ruta_json, "r", encoding="utf-8") as archivo:
+        datos = json.load(archivo)
+    with EscritorReplayBinario(ruta_binaria) as escritor:
+        for turno in datos:
+            escritor.escribir_turno(turno["turno"], turno["acciones"])
@@ -0,0 +1,256 @@
+"""Simulación de batallas en un hilo separado del bucle de dibujo.
+
+:class:`SimulacionEnHilo` avanza un :class:`CampoBatalla` en un hilo de
+trabajo y deja cada turno terminado en una cola acotada. Quien dibuja
+consume los turnos a su ritmo con :meth:`SimulacionEnHilo.siguiente_turno`
+y controla el hilo con órdenes (pausar, reanudar, avanzar un turno,
+agrupar varios turnos por entrega o detener), de modo que un turno lento
+nunca bloquea la interfaz.
+
+Mientras el hilo está activo el campo solo debe modificarse desde él. Cada
+turno entregado incluye por ello una instantánea de las unidades (posición,
+salud y estadísticas) que puede dibujarse sin acceder al campo.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+if TYPE_CHECKING:
+    from .campo import CampoBatalla
+    from .ejercito import Ejercito
+
+# Turnos que el hilo puede adelantarse a quien los consume
+MAX_TURNOS_EN_COLA = 2
+# Cada cuánto comprueba el hilo si debe detenerse mientras la cola está llena
+_ESPERA_COLA = 0.05
+
+
+class EstadoUnidad(NamedTuple):
+    """Copia de una unidad tal como estaba al cerrar un turno.
+
+    Reúne todo lo que se dibuja de la unidad (posición, barra de salud,
+    bando y tooltip) para que el hilo de dibujo no lea nunca la unidad viva,
+    que el hilo de simulación sigue modificando. ``unidad`` solo se conserva
+    como identificador.
+    """
+
+    unidad: Any
+    x: int
+    y: int
+    salud: int
+    salud_max: int
+    ataque: int
+    defensa: int
+    velocidad: int
+    alcance: int
+    bando: int
+
+
+class SimulacionEnHilo:
+    """Simula una batalla en segundo plano y publica sus turnos en una cola.
+
+    Parameters
+    ----------
+    campo:
+        Campo con ambos ejércitos ya colocados.
+    ejercito_a, ejercito_b:
+        Ejércitos enfrentados.
+    max_turnos_en_cola:
+        Turnos simulados que pueden esperar a ser consumidos. Con la cola
+        llena el hilo espera, por lo que nunca se adelanta más que esto.
+    pausada:
+        Si es ``True`` el hilo arranca en pausa y solo simula los turnos
+        pedidos con :meth:`avanzar`.
+    turnos_por_entrega:
+        Turnos que se simulan seguidos antes de publicar una entrega (ver
+        :meth:`fijar_turnos_por_entrega`).
+    """
+
+    def __init__(
+        self,
+        campo: CampoBatalla,
+        ejercito_a: Ejercito,
+        ejercito_b: Ejercito,
+        max_turnos_en_cola: int = MAX_TURNOS_EN_COLA,
+        pausada: bool = False,
+        turnos_por_entrega: int | None = 1,
+    ):
+        if max_turnos_en_cola < 1:
+            raise ValueError("La cola debe admitir al menos un turno")
+        if turnos_por_entrega is not None and turnos_por_entrega < 1:
+            raise ValueError("Cada entrega debe incluir al menos un turno")
+        self.campo = campo
+        self.ejercito_a = ejercito_a
+        self.ejercito_b = ejercito_b
+        self.error: BaseException | None = None
+        self._turnos: queue.Queue[dict] = queue.Queue(max_turnos_en_cola)
+        self._ordenes: queue.Queue[tuple] = queue.Queue()
+        self._detenida = threading.Event()
+        # Estado propio del hilo de trabajo
+        self._pausada = pausada
+        self._pasos = 0
+        self._turnos_por_entrega = turnos_por_entrega
+        self._hilo = threading.Thread(
+            target=self._ejecutar, name="simulacion-batalla", daemon=True
+        )
+
+    # ------------------------------------------------------------------
+    # Control desde el hilo principal
+    # ------------------------------------------------------------------
+    def iniciar(self) -> None:
+        self._hilo.start()
+
+    def pausar(self) -> None:
+        self._ordenes.put(("pausar", None))
+
+    def reanudar(self) -> None:
+        self._ordenes.put(("reanudar", None))
+
+    def avanzar(self) -> None:
+        """Pide un turno más aunque la simulación esté en pausa."""
+
+        self._ordenes.put(("avanzar", None))
+
+    def fijar_turnos_por_entrega(self, turnos: int | None) -> None:
+        """Agrupa ``turnos`` turnos en cada entrega; ``None`` hasta el final.
+
+        Los turnos de una entrega se simulan seguidos y solo se publica la
+        instantánea de unidades del último, lo que permite avanzar rápido sin
+        que la cola frene al hilo. Una pausa corta la entrega en curso.
+        """
+
+        if turnos is not None and turnos < 1:
+            raise ValueError("Cada entrega debe incluir al menos un turno")
+        self._ordenes.put(("turnos_por_entrega", turnos))
+
+    def detener(self, espera: float | None = None) -> None:
+        """Detiene el hilo y espera a que termine como mucho ``espera`` segundos.
+
+        El turno que se esté simulando se completa antes de salir.
+        """
+
+        self._detenida.set()
+        self._ordenes.put(("detener", None))
+        if self._hilo.is_alive() and self._hilo is not threading.current_thread():
+            self._hilo.join(espera)
+
+    @property
+    def activa(self) -> bool:
+        return self._hilo.is_alive()
+
+    @property
+    def terminada(self) -> bool:
+        """``True`` cuando el hilo acabó y se consumieron todos sus turnos."""
+
+        return self._hilo.ident is not None and not self._hilo.is_alive() and self._turnos.empty()
+
+    def siguiente_turno(self) -> dict | None:
+        """Devuelve el siguiente turno simulado o ``None`` si aún no hay ninguno.
+
+        El turno es un diccionario con ``"turno"``, ``"acciones"`` (como las
+        devuelve :meth:`CampoBatalla.simular_turno`), ``"unidades"`` (ver
+        :meth:`estado_unidades`) y ``"fin"``, que indica que uno de los
+        ejércitos fue derrotado. Si la entrega agrupa varios turnos,
+        ``"turnos"`` indica cuántos y el resto de campos corresponden al
+        último. Los errores del hilo se relanzan aquí.
+        """
+
+        try:
+            return self._turnos.get_nowait()
+        except queue.Empty:
+            if self.error is not None:
+                raise self.error
+            return None
+
+    def estado_unidades(self) -> list[EstadoUnidad]:
+        """Instantánea :class:`EstadoUnidad` de cada unidad.
+
+        ``bando`` vale 0 para las unidades de ``ejercito_a`` y 1 para el
+        resto. Solo debe llamarse desde el hilo principal antes de
+        :meth:`iniciar`; después cada turno incluye la suya.
+        """
+
+        campo = self.campo
+        return [
+            EstadoUnidad(
+                unidad,
+                x,
+                y,
+                unidad.salud,
+                campo._salud_max.get(unidad, unidad.salud),
+                unidad.ataque,
+                unidad.defensa,
+                unidad.velocidad,
+                unidad.alcance,
+                int(campo.ejercito_de(unidad) is not self.ejercito_a),
+            )
+            for unidad, (x, y) in campo._posiciones.items()
+        ]
+
+    # ------------------------------------------------------------------
+    # Hilo de trabajo
+    # ------------------------------------------------------------------
+    def _atender_ordenes(self, esperar: bool = True) -> bool:
+        """Aplica las órdenes pendientes y, si ``esperar``, espera mientras esté en pausa.
+
+        Devuelve ``False`` si se pidió detener la simulación.
+        """
+
+        while True:
+            bloquear = esperar and self._pausada and not self._pasos
+            try:
+                orden, valor = self._ordenes.get(block=bloquear)
+            except queue.Empty:
+                return True
+            if orden == "detener":
+                return False
+            if orden == "pausar":
+                self._pausada = True
+            elif orden == "reanudar":
+                self._pausada = False
+            elif orden == "avanzar":
+                self._pasos += 1
+            elif orden == "turnos_por_entrega":
+                self._turnos_por_entrega = valor
+
+    def _entregar(self, turno: dict) -> bool:
+        while not self._detenida.is_set():
+            try:
+                self._turnos.put(turno, timeout=_ESPERA_COLA)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _ejecutar(self) -> None:
+        campo = self.campo
+        try:
+            while self._atender_ordenes():
+                turnos = 0
+                while True:
+                    acciones = campo.simular_turno(self.ejercito_a, self.ejercito_b)
+                    turnos += 1
+                    if self._pasos:
+                        self._pasos -= 1
+                    fin = not self.ejercito_a.unidades or not self.ejercito_b.unidades
+                    if fin or not self._atender_ordenes(esperar=False):
+                        break
+                    limite = self._turnos_por_entrega
+                    if (self._pausada and not self._pasos) or (
+                        limite is not None and turnos >= limite
+                    ):
+                        break
+                turno = {
+                    "turno": campo._estadisticas["turno_actual"],
+                    "turnos": turnos,
+                    "acciones": acciones,
+                    "unidades": self.estado_unidades(),
+                    "fin": fin,
+                }
+                if not self._entregar(turno) or fin:
+                    return
+        except BaseException as exc:  # se relanza en el hilo principal
+            self.error = exc
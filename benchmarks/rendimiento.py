@@ -0,0 +1,288 @@
+"""Pruebas de rendimiento de los puntos críticos de la simulación.
+
+Mide la generación de terreno, la búsqueda de caminos y la simulación de
+turnos sin necesidad de pygame. Los resultados se guardan en un archivo
+JSON y pueden compararse con una línea base para detectar regresiones::
+
+    python benchmarks/rendimiento.py --base benchmarks/linea_base.json
+
+El proceso termina con código 1 si alguna medición supera la línea base en
+más de la tolerancia indicada y además en más de ``--margen-ms``
+milisegundos. Con ``--actualizar-base`` las mediciones
+obtenidas se escriben además en la línea base, sustituyendo a las que ya
+tuviera con el mismo nombre, de modo que puede volver a registrarse solo un
+subconjunto::
+
+    python benchmarks/rendimiento.py --base benchmarks/linea_base.json \
+        --actualizar-base --unidades 10000 --modos ruta
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import pathlib
+import platform
+import random
+import sys
+import time
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+from terreno import Terreno
+from batalla.campo import CampoBatalla, MODOS_MOVIMIENTO
+from batalla.ejercito import crear_ejercito
+
+TAMAÑOS_MAPA = (100, 500, 1000, 2000)
+TAMAÑO_CAMINOS = 200
+UNIDADES_POR_BANDO = (10, 100, 1000, 10000)
+# Modos que calculan una ruta por unidad. Por encima de
+# ``UNIDADES_TURNO_UNICO`` unidades por bando tardan cerca de un minuto por
+# turno, así que solo se mide un turno.
+MODOS_POR_UNIDAD = ("ruta", "incremental")
+UNIDADES_TURNO_UNICO = 1000
+# Empeoramiento absoluto por debajo del cual no se marca una regresión: en
+# las mediciones de microsegundos un 25 % es ruido del planificador
+MARGEN_ABSOLUTO = 0.001
+
+
+def medir(funcion, repeticiones: int) -> dict:
+    """Ejecuta ``funcion`` varias veces y devuelve los tiempos en segundos."""
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return {
+        "minimo": min(tiempos),
+        "media": sum(tiempos) / len(tiempos),
+        "repeticiones": repeticiones,
+    }
+
+
+def _terreno_vacio(lado: int) -> Terreno:
+    return Terreno(lado, lado, densidad=0.0, densidad_bosque=0.0, num_rios=0, semilla=0)
+
+
+def terreno_laberinto(lado: int, semilla: int = 0) -> Terreno:
+    """Crea un laberinto perfecto con pasillos de una celda de ancho."""
+
+    terreno = _terreno_vacio(lado)
+    for y in range(lado):
+        for x in range(lado):
+            terreno.fijar_tile(x, y, "PARED")
+    rnd = random.Random(semilla)
+    pila = [(0, 0)]
+    terreno.fijar_tile(0, 0, "SUELO")
+    while pila:
+        x, y = pila[-1]
+        vecinos = [
+            (x + dx, y + dy, x + dx // 2, y + dy // 2)
+            for dx, dy in ((2, 0), (-2, 0), (0, 2), (0, -2))
+            if 0 <= x + dx < lado and 0 <= y + dy < lado and terreno.mapa[y + dy][x + dx] == "PARED"
+        ]
+        if not vecinos:
+            pila.pop()
+            continue
+        nx, ny, mx, my = rnd.choice(vecinos)
+        terreno.fijar_tile(mx, my, "SUELO")
+        terreno.fijar_tile(nx, ny, "SUELO")
+        pila.append((nx, ny))
+    return terreno
+
+
+def terreno_sin_camino(lado: int) -> Terreno:
+    """Crea un mapa abierto dividido por una pared vertical completa."""
+
+    terreno = _terreno_vacio(lado)
+    for y in range(lado):
+        terreno.fijar_tile(lado // 2, y, "PARED")
+    return terreno
+
+
+def bench_generacion(tamaños, repeticiones: int) -> dict:
+    resultados = {}
+    for lado in tamaños:
+        terreno = Terreno(lado, lado, semilla=1)
+        resultados[f"generar/{lado}x{lado}"] = medir(terreno.generar, repeticiones)
+    return resultados
+
+
+def bench_caminos(lado: int, repeticiones: int) -> dict:
+    mapas = {
+        "abierto": _terreno_vacio(lado),
+        "laberinto": terreno_laberinto(lado),
+        "sin_camino": terreno_sin_camino(lado),
+    }
+    # Esquinas opuestas; en el laberinto ambas son celdas de pasillo
+    ultimo = lado - 1 if lado % 2 else lado - 2
+    origen, destino = (0, 0), (ultimo, ultimo)
+    resultados = {}
+    for nombre, terreno in mapas.items():
+        # Se vacía la caché de caminos para medir siempre la búsqueda
+        cache = terreno.cache_caminos
+        resultados[f"calcular_camino/{nombre}"] = medir(
+            lambda: (cache.vaciar(), terreno.calcular_camino(origen, destino)), repeticiones
+        )
+        # La primera repetición incluye la construcción del grafo abstracto
+        resultados[f"calcular_camino_jerarquico/{nombre}"] = medir(
+            lambda: (cache.vaciar(), terreno.calcular_camino(origen, destino, jerarquico=True)),
+            repeticiones,
+        )
+        resultados[f"calcular_camino_cache/{nombre}"] = medir(
+            lambda: terreno.calcular_camino(origen, destino), repeticiones
+        )
+        campo = CampoBatalla(terreno)
+        resultados[f"buscar_camino/{nombre}"] = medir(
+            lambda: campo._buscar_camino(origen, destino), repeticiones
+        )
+    return resultados
+
+
+def _preparar_batalla(unidades: int, modo: str, motor: str = "objetos"):
+    config = [
+        {"tipo": "Infanteria", "cantidad": unidades - unidades * 3 // 10 - unidades // 5},
+        {"tipo": "Arqueria", "cantidad": unidades * 3 // 10},
+        {"tipo": "Soporte", "cantidad": unidades // 5},
+    ]
+    # Mapa con unas cuatro celdas libres por unidad
+    lado = max(40, math.ceil(math.sqrt(unidades * 8)))
+    terreno = Terreno(lado, lado, densidad=0.05, densidad_bosque=0.1, num_rios=0, semilla=3)
+    campo = CampoBatalla(terreno, modo, motor)
+    ejercito_a = crear_ejercito(config)
+    ejercito_b = crear_ejercito(config)
+    campo.colocar_ejercito(ejercito_a)
+    campo.colocar_ejercito(ejercito_b, desde_derecha=True)
+    return campo, ejercito_a, ejercito_b
+
+
+def bench_turnos(cantidades, modos, turnos: int, max_unidades_ruta: int | None = None) -> dict:
+    """Mide ``simular_turno`` con cada número de unidades y modo.
+
+    ``max_unidades_ruta`` permite omitir los modos de :data:`MODOS_POR_UNIDAD`
+    por encima de ese número de unidades; por defecto se miden todos.
+    """
+
+    resultados = {}
+    for modo in modos:
+        for unidades in cantidades:
+            repeticiones = turnos
+            if modo in MODOS_POR_UNIDAD:
+                if max_unidades_ruta is not None and unidades > max_unidades_ruta:
+                    continue
+                if unidades > UNIDADES_TURNO_UNICO:
+                    repeticiones = 1
+            campo, ejercito_a, ejercito_b = _preparar_batalla(unidades, modo)
+            resultados[f"simular_turno/{modo}/{unidades}"] = medir(
+                lambda: campo.simular_turno(ejercito_a, ejercito_b), repeticiones
+            )
+    # El motor vectorial siempre se desplaza por campos de flujo
+    for unidades in cantidades:
+        campo, ejercito_a, ejercito_b = _preparar_batalla(unidades, "flujo", "vectorial")
+        resultados[f"simular_turno/vectorial/{unidades}"] = medir(
+            lambda: campo.simular_turno(ejercito_a, ejercito_b), turnos
+        )
+    return resultados
+
+
+def comparar(
+    resultados: dict, base: dict, tolerancia: float, margen: float = MARGEN_ABSOLUTO
+) -> list[str]:
+    """Devuelve las mediciones cuyo mínimo empeora más que ``tolerancia``.
+
+    Solo cuentan los empeoramientos de más de ``margen`` segundos.
+    """
+
+    regresiones = []
+    for nombre, medicion in sorted(resultados.items()):
+        referencia = base.get(nombre)
+        if referencia is None:
+            print(f"{nombre:40s} {medicion['minimo'] * 1000:10.2f} ms  (sin referencia)")
+            continue
+        cambio = medicion["minimo"] / referencia["minimo"] - 1 if referencia["minimo"] else 0.0
+        marca = ""
+        if cambio > tolerancia and medicion["minimo"] - referencia["minimo"] > margen:
+            regresiones.append(nombre)
+            marca = "  REGRESIÓN"
+        print(
+            f"{nombre:40s} {medicion['minimo'] * 1000:10.2f} ms  "
+            f"base {referencia['minimo'] * 1000:10.2f} ms  {cambio:+7.1%}{marca}"
+        )
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el rendimiento de la simulación")
+    parser.add_argument("--salida", default="rendimiento.json", help="Archivo JSON de resultados")
+    parser.add_argument("--base", help="Línea base JSON con la que comparar")
+    parser.add_argument(
+        "--actualizar-base",
+        action="store_true",
+        help="Escribe las mediciones obtenidas en la línea base indicada con --base",
+    )
+    parser.add_argument(
+        "--tolerancia", type=float, default=0.25, help="Empeoramiento relativo admitido"
+    )
+    parser.add_argument(
+        "--margen-ms",
+        type=float,
+        default=MARGEN_ABSOLUTO * 1000,
+        help="Empeoramiento absoluto, en milisegundos, por debajo del cual se ignora",
+    )
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por medición")
+    parser.add_argument(
+        "--tamaños", type=int, nargs="*", default=list(TAMAÑOS_MAPA), help="Lados de mapa a generar"
+    )
+    parser.add_argument(
+        "--unidades",
+        type=int,
+        nargs="*",
+        default=list(UNIDADES_POR_BANDO),
+        help="Unidades por bando en la simulación de turnos",
+    )
+    parser.add_argument(
+        "--modos", nargs="*", choices=MODOS_MOVIMIENTO, default=list(MODOS_MOVIMIENTO)
+    )
+    parser.add_argument(
+        "--max-unidades-ruta",
+        type=int,
+        help="Omite los modos ruta e incremental por encima de estas unidades por bando",
+    )
+    args = parser.parse_args()
+    if args.actualizar_base and not args.base:
+        parser.error("--actualizar-base necesita --base")
+
+    resultados = {}
+    resultados.update(bench_generacion(args.tamaños, args.repeticiones))
+    resultados.update(bench_caminos(TAMAÑO_CAMINOS, args.repeticiones))
+    resultados.update(
+        bench_turnos(args.unidades, args.modos, args.repeticiones, args.max_unidades_ruta)
+    )
+
+    datos = {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "resultados": resultados,
+    }
+    with open(args.salida, "w", encoding="utf-8") as archivo:
+        json.dump(datos, archivo, ensure_ascii=False, indent=2)
+
+    base = {}
+    if args.base and pathlib.Path(args.base).exists():
+        with open(args.base, "r", encoding="utf-8") as archivo:
+            base = json.load(archivo)["resultados"]
+    regresiones = comparar(resultados, base, args.tolerancia, args.margen_ms / 1000)
+    if args.actualizar_base:
+        datos["resultados"] = {**base, **resultados}
+        with open(args.base, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo, ensure_ascii=False, indent=2)
+        print(f"\nLínea base actualizada en {args.base}")
+    elif regresiones:
+        print(f"\n{len(regresiones)} regresiones respecto a {args.base}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Caché acotada de caminos para :class:`terreno.Terreno`.
+
+Los caminos se indexan por ``(origen, destino, jerarquico)`` y se descartan
+en orden LRU cuando la memoria estimada de las entradas supera el
+presupuesto. Cada caché recuerda la versión del terreno con la que se
+llenó; al consultarla con otra versión se vacía, de modo que nunca devuelve
+caminos calculados sobre un mapa que ya cambió.
+"""
+
+from __future__ import annotations
+
+import sys
+from collections import OrderedDict
+
+# Memoria por defecto reservada a la caché de cada terreno
+PRESUPUESTO_CACHE_CAMINOS = 4 * 1024 * 1024
+
+# Estimación del coste de cada entrada: una tupla ``(x, y)`` por celda con
+# sus dos enteros y su puntero, más la tupla del camino, la clave y el nodo
+# del diccionario
+_BYTES_CELDA = sys.getsizeof((0, 0)) + 2 * sys.getsizeof(1000) + 8
+_BYTES_ENTRADA = sys.getsizeof(()) + 3 * _BYTES_CELDA + 100
+
+
+class CacheCaminos:
+    """Memoriza caminos entre celdas con expulsión LRU.
+
+    Parameters
+    ----------
+    presupuesto:
+        Memoria máxima aproximada, en bytes, que pueden ocupar los caminos
+        almacenados. Con 0 la caché no guarda nada.
+    """
+
+    def __init__(self, presupuesto=PRESUPUESTO_CACHE_CAMINOS):
+        if presupuesto < 0:
+            raise ValueError("El presupuesto de memoria no puede ser negativo")
+        self.presupuesto = presupuesto
+        self.version = None
+        self.memoria = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self._entradas = OrderedDict()
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __contains__(self, clave):
+        return clave in self._entradas
+
+    @staticmethod
+    def _tamaño(camino):
+        return _BYTES_ENTRADA + len(camino) * _BYTES_CELDA
+
+    def _sincronizar(self, version):
+        if version != self.version:
+            self.vaciar()
+            self.version = version
+
+    def obtener(self, clave, version):
+        """Devuelve el camino de ``clave`` o ``None`` si no está guardado.
+
+        El resultado es una lista nueva que el llamador puede modificar.
+        """
+
+        self._sincronizar(version)
+        camino = self._entradas.get(clave)
+        if camino is None:
+            self.fallos += 1
+            return None
+        self._entradas.move_to_end(clave)
+        self.aciertos += 1
+        return list(camino)
+
+    def guardar(self, clave, camino, version):
+        """Almacena ``camino`` y expulsa los menos usados si no cabe."""
+
+        self._sincronizar(version)
+        tamaño = self._tamaño(camino)
+        if tamaño > self.presupuesto:
+            return
+        anterior = self._entradas.pop(clave, None)
+        if anterior is not None:
+            self.memoria -= self._tamaño(anterior)
+        self._entradas[clave] = tuple(camino)
+        self.memoria += tamaño
+        while self.memoria > self.presupuesto:
+            _, expulsado = self._entradas.popitem(last=False)
+            self.memoria -= self._tamaño(expulsado)
+
+    def vaciar(self):
+        """Elimina todas las entradas sin reiniciar los contadores."""
+
+        self._entradas.clear()
+        self.memoria = 0
+
+    def estadisticas(self):
+        """Resumen con el tamaño, la memoria estimada y los aciertos."""
+
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": len(self._entradas),
+            "memoria": self.memoria,
+            "presupuesto": self.presupuesto,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+        }
@@ -0,0 +1,330 @@
+"""Búsqueda de caminos jerárquica (HPA*) sobre la máscara de colisiones.
+
+El mapa se divide en clusters cuadrados de ``tam_cluster`` tiles. En cada
+tramo libre de la frontera entre dos clusters se colocan una o dos
+entradas, que forman los nodos de un grafo abstracto. Los nodos de un mismo
+cluster se unen con su distancia real dentro de él, calculada la primera vez
+que la búsqueda lo visita, y los de clusters vecinos con una arista de coste
+uno. Una consulta busca primero en ese grafo y después refina cada tramo con
+búsquedas locales confinadas a un cluster.
+
+Los caminos obtenidos son válidos pero pueden ser algo más largos que los
+óptimos. Si no existe camino la búsqueda lo detecta igualmente.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from heapq import heappop, heappush
+
+import numpy as np
+
+# Tramos de frontera de esta longitud o mayor reciben una entrada en cada
+# extremo en lugar de una sola en el centro
+_LONGITUD_DOBLE_ENTRADA = 6
+_VECINOS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+_ORIGEN = -1
+_DESTINO = -2
+
+
+def _tramos_frontera(libre, tam):
+    """Devuelve las entradas de un conjunto de fronteras.
+
+    Parameters
+    ----------
+    libre:
+        Array booleano ``(fronteras, largo)`` con las posiciones de cada
+        frontera libres a ambos lados.
+    tam:
+        Tamaño del cluster; los tramos se cortan en sus límites.
+
+    Returns
+    -------
+    tuple[numpy.ndarray, numpy.ndarray]
+        Índice de frontera y posición a lo largo de ella de cada entrada.
+    """
+
+    largo = libre.shape[1]
+    pos = np.arange(largo)
+    anterior = np.zeros_like(libre)
+    anterior[:, 1:] = libre[:, :-1]
+    anterior[:, pos % tam == 0] = False
+    siguiente = np.zeros_like(libre)
+    siguiente[:, :-1] = libre[:, 1:]
+    siguiente[:, (pos + 1) % tam == 0] = False
+    # ``nonzero`` recorre en orden de fila, así que inicios y finales se
+    # emparejan uno a uno
+    fi, inicios = np.nonzero(libre & ~anterior)
+    _, finales = np.nonzero(libre & ~siguiente)
+    dobles = finales - inicios + 1 >= _LONGITUD_DOBLE_ENTRADA
+    medios = (inicios + finales) // 2
+    fronteras = np.concatenate([fi[~dobles], fi[dobles], fi[dobles]])
+    posiciones = np.concatenate([medios[~dobles], inicios[dobles], finales[dobles]])
+    return fronteras, posiciones
+
+
+def _como_bits(mascara):
+    """Convierte una máscara booleana en un entero con un bit por celda."""
+
+    datos = np.packbits(mascara, axis=None, bitorder="little").tobytes()
+    return int.from_bytes(datos, "little")
+
+
+class GrafoJerarquico:
+    """Grafo abstracto de entradas entre clusters de una máscara de colisiones.
+
+    Parameters
+    ----------
+    colisiones:
+        Array booleano ``(alto, ancho)`` con las celdas no transitables. El
+        grafo no detecta cambios posteriores: debe reconstruirse si la
+        máscara se modifica.
+    tam_cluster:
+        Lado en tiles de cada cluster.
+    """
+
+    def __init__(self, colisiones, tam_cluster=16):
+        self.colisiones = colisiones
+        self.tam_cluster = tam_cluster
+        self.alto, self.ancho = colisiones.shape
+        # Celda de cada nodo y nodo de cada celda de entrada
+        self._celdas = []
+        self._nodos = {}
+        self._por_cluster = {}
+        # Aristas entre clusters (coste 1) y, calculadas bajo demanda,
+        # distancias entre los nodos de cada cluster
+        self._externas = {}
+        self._internas = {}
+        self._crear_entradas()
+
+    # ------------------------------------------------------------------
+    # Construcción
+    # ------------------------------------------------------------------
+    def cluster(self, x, y):
+        """Devuelve la clave ``(cx, cy)`` del cluster que contiene la celda."""
+
+        return x // self.tam_cluster, y // self.tam_cluster
+
+    def _nodo(self, celda):
+        nodo = self._nodos.get(celda)
+        if nodo is None:
+            nodo = self._nodos[celda] = len(self._celdas)
+            self._celdas.append(celda)
+            self._por_cluster.setdefault(self.cluster(*celda), []).append(nodo)
+        return nodo
+
+    def _enlazar(self, a, b):
+        na, nb = self._nodo(a), self._nodo(b)
+        self._externas.setdefault(na, []).append((nb, 1))
+        self._externas.setdefault(nb, []).append((na, 1))
+
+    def _crear_entradas(self):
+        tam = self.tam_cluster
+        libres = ~self.colisiones
+        # Fronteras verticales: columna ``x`` a la izquierda y ``x + 1``
+        xs = np.arange(tam - 1, self.ancho - 1, tam)
+        if len(xs):
+            libre = (libres[:, xs] & libres[:, xs + 1]).T
+            fronteras, ys = _tramos_frontera(libre, tam)
+            for x, y in zip(xs[fronteras].tolist(), ys.tolist()):
+                self._enlazar((x, y), (x + 1, y))
+        # Fronteras horizontales: fila ``y`` arriba e ``y + 1``
+        ys = np.arange(tam - 1, self.alto - 1, tam)
+        if len(ys):
+            libre = libres[ys] & libres[ys + 1]
+            fronteras, xs = _tramos_frontera(libre, tam)
+            for y, x in zip(ys[fronteras].tolist(), xs.tolist()):
+                self._enlazar((x, y), (x, y + 1))
+
+    # ------------------------------------------------------------------
+    # Búsquedas locales
+    # ------------------------------------------------------------------
+    def _explorar(self, origen, destino=None):
+        """Recorre en anchura el cluster de ``origen`` sin salir de él.
+
+        Devuelve las distancias y los predecesores de cada celda alcanzada.
+        Si se indica ``destino`` el recorrido se detiene al alcanzarlo.
+        """
+
+        cx, cy = self.cluster(*origen)
+        x0, y0 = cx * self.tam_cluster, cy * self.tam_cluster
+        x1 = min(x0 + self.tam_cluster, self.ancho)
+        y1 = min(y0 + self.tam_cluster, self.alto)
+        # Se copia la región para no indexar el array completo celda a celda
+        bloqueadas = self.colisiones[y0:y1, x0:x1].tolist()
+        distancias = {origen: 0}
+        previas = {}
+        pendientes = deque([origen])
+        while pendientes:
+            actual = pendientes.popleft()
+            if actual == destino:
+                break
+            x, y = actual
+            siguiente = distancias[actual] + 1
+            for dx, dy in _VECINOS:
+                nx, ny = x + dx, y + dy
+                if (
+                    x0 <= nx < x1
+                    and y0 <= ny < y1
+                    and not bloqueadas[ny - y0][nx - x0]
+                    and (nx, ny) not in distancias
+                ):
+                    distancias[(nx, ny)] = siguiente
+                    previas[(nx, ny)] = actual
+                    pendientes.append((nx, ny))
+        return distancias, previas
+
+    def _aristas_internas(self, clave):
+        """Distancias entre los nodos de un cluster, calculadas una vez.
+
+        Cada recorrido en anchura avanza un nivel completo por iteración
+        representando el cluster como un entero de ``ancho * alto`` bits.
+        """
+
+        aristas = self._internas.get(clave)
+        if aristas is not None:
+            return aristas
+        nodos = self._por_cluster.get(clave, [])
+        x0, y0 = clave[0] * self.tam_cluster, clave[1] * self.tam_cluster
+        x1 = min(x0 + self.tam_cluster, self.ancho)
+        y1 = min(y0 + self.tam_cluster, self.alto)
+        ancho = x1 - x0
+        libres = ~self.colisiones[y0:y1, x0:x1]
+        libre = _como_bits(libres)
+        columnas = np.zeros(libres.shape, dtype=bool)
+        columnas[:, 0] = True
+        primera = _como_bits(columnas)
+        ultima = primera << (ancho - 1)
+        bits = {}
+        for nodo in nodos:
+            x, y = self._celdas[nodo]
+            bits[nodo] = 1 << ((y - y0) * ancho + x - x0)
+        por_bit = {b: n for n, b in bits.items()}
+        todos = sum(bits.values())
+
+        aristas = {}
+        for nodo in nodos:
+            frente = visitadas = bits[nodo]
+            pendientes = todos & ~frente
+            vecinos = []
+            distancia = 0
+            while frente and pendientes:
+                distancia += 1
+                frente = (
+                    ((frente << 1) & ~primera)
+                    | ((frente >> 1) & ~ultima)
+                    | (frente << ancho)
+                    | (frente >> ancho)
+                ) & libre & ~visitadas
+                visitadas |= frente
+                alcanzados = frente & pendientes
+                pendientes &= ~alcanzados
+                while alcanzados:
+                    bit = alcanzados & -alcanzados
+                    vecinos.append((por_bit[bit], distancia))
+                    alcanzados ^= bit
+            aristas[nodo] = vecinos
+        self._internas[clave] = aristas
+        return aristas
+
+    def _tramo(self, a, b):
+        """Camino local de ``a`` a ``b`` sin incluir ``a``."""
+
+        if a == b:
+            return []
+        if abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1:
+            return [b]
+        _, previas = self._explorar(a, b)
+        tramo = [b]
+        while tramo[-1] in previas and previas[tramo[-1]] != a:
+            tramo.append(previas[tramo[-1]])
+        tramo.reverse()
+        return tramo
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+    def buscar(self, origen, destino):
+        """Calcula un camino de ``origen`` a ``destino``.
+
+        Parameters
+        ----------
+        origen, destino:
+            Tuplas ``(x, y)`` en coordenadas de tiles.
+
+        Returns
+        -------
+        list[tuple[int, int]] | None
+            Celdas del camino, incluidos los extremos, o ``None`` si alguno
+            de ellos está bloqueado o no existe camino.
+        """
+
+        for x, y in (origen, destino):
+            if not (0 <= x < self.ancho and 0 <= y < self.alto) or self.colisiones[y, x]:
+                return None
+        if origen == destino:
+            return [origen]
+
+        cluster_destino = self.cluster(*destino)
+        distancias_origen, _ = self._explorar(origen)
+        distancias_destino, _ = self._explorar(destino)
+        salidas = [
+            (nodo, distancias_origen[self._celdas[nodo]])
+            for nodo in self._por_cluster.get(self.cluster(*origen), [])
+            if self._celdas[nodo] in distancias_origen
+        ]
+        if destino in distancias_origen:
+            salidas.append((_DESTINO, distancias_origen[destino]))
+        llegadas = {
+            nodo: distancias_destino[self._celdas[nodo]]
+            for nodo in self._por_cluster.get(cluster_destino, [])
+            if self._celdas[nodo] in distancias_destino
+        }
+
+        def celda(nodo):
+            if nodo == _ORIGEN:
+                return origen
+            if nodo == _DESTINO:
+                return destino
+            return self._celdas[nodo]
+
+        def heuristica(nodo):
+            x, y = celda(nodo)
+            return abs(x - destino[0]) + abs(y - destino[1])
+
+        coste = {_ORIGEN: 0}
+        previos = {}
+        # A igual ``f`` se expande antes el nodo con mayor coste acumulado,
+        # es decir, el más próximo al destino
+        abiertos = [(heuristica(_ORIGEN), 0, _ORIGEN)]
+        while abiertos:
+            _, g, nodo = heappop(abiertos)
+            g = -g
+            if nodo == _DESTINO:
+                break
+            if g > coste[nodo]:
+                continue
+            if nodo == _ORIGEN:
+                vecinos = salidas
+            else:
+                vecinos = list(self._externas.get(nodo, ()))
+                vecinos += self._aristas_internas(self.cluster(*self._celdas[nodo]))[nodo]
+                if nodo in llegadas:
+                    vecinos.append((_DESTINO, llegadas[nodo]))
+            for vecino, paso in vecinos:
+                tentativo = g + paso
+                if tentativo < coste.get(vecino, float("inf")):
+                    coste[vecino] = tentativo
+                    previos[vecino] = nodo
+                    heappush(abiertos, (tentativo + heuristica(vecino), -tentativo, vecino))
+        else:
+            return None
+
+        abstracto = [_DESTINO]
+        while abstracto[-1] != _ORIGEN:
+            abstracto.append(previos[abstracto[-1]])
+        abstracto.reverse()
+        camino = [origen]
+        for a, b in zip(abstracto, abstracto[1:]):
+            camino.extend(self._tramo(celda(a), celda(b)))
+        return camino
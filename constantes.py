@@ -12,6 +12,9 @@ ALTO = ALTO_PANEL + ANCHO
 # Tamaño de cada celda de terreno (puede modificarse en tiempo de ejecución)
 TAM_CELDA = int(20 * 1.15)
 
+# Lado en tiles de cada bloque pre-renderizado del terreno
+TAM_CHUNK = 32
+
 # Factor de escala para el tamaño inicial del mapa
 FACTOR_MAPA = 2
 
@@ -1,20 +1,248 @@
-"""Genera un terreno y un ejército desde la línea de comandos."""
+"""Genera terrenos y ejércitos desde la línea de comandos.
+
+Sin opciones genera un único terreno y un ejército de prueba::
+
+    python generar_terreno.py 20 15 42
+
+Con ``--semillas`` genera en paralelo un corpus de mapas para cada
+combinación de semilla, tamaño, densidad de paredes, densidad de bosque y
+número de ríos. Los mapas se escriben en fragmentos JSON Lines dentro de
+``--salida`` junto a un ``manifiesto.json`` que describe el lote::
+
+    python generar_terreno.py --semillas 0 1000 --tamaños 40x40 80x60 \\
+        --densidades 0.05 0.1 --rios 1 2 --salida corpus
+"""
+
+from __future__ import annotations
 
 import argparse
-from terreno import Terreno
+import itertools
+import json
+import os
+import pathlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from terreno import PUENTE, TIPOS_TILE, Terreno, etiquetar_componentes
 from batalla.facciones import EjercitoMagia
 
+MANIFIESTO = "manifiesto.json"
+MAPAS_POR_FRAGMENTO = 1000
+ESTADISTICAS = ("fraccion_transitable", "puentes", "regiones", "tiempo")
+
+
+def generar_mapa(
+    semilla: int,
+    ancho: int,
+    alto: int,
+    densidad: float = 0.1,
+    densidad_bosque: float = 0.1,
+    num_rios: int = 1,
+) -> dict:
+    """Genera un mapa y devuelve un registro serializable con sus estadísticas.
+
+    Cada fila del mapa se guarda como una cadena con un dígito por tile: el
+    índice de su bloque en ``TIPOS_TILE``.
+    """
+
+    inicio = time.perf_counter()
+    terreno = Terreno(ancho, alto, densidad, densidad_bosque, num_rios, semilla=semilla)
+    tiempo = time.perf_counter() - inicio
+    codigos = terreno.codigos
+    transitable = float((~terreno.mascara_colisiones).mean()) if codigos.size else 0.0
+    digitos = (codigos + ord("0")).astype(np.uint8).tobytes().decode("ascii")
+    return {
+        "semilla": semilla,
+        "ancho": ancho,
+        "alto": alto,
+        "densidad": densidad,
+        "densidad_bosque": densidad_bosque,
+        "num_rios": num_rios,
+        "tiempo": tiempo,
+        "fraccion_transitable": transitable,
+        # Cada grupo de tiles de puente conectados cuenta como un puente
+        "puentes": int(etiquetar_componentes(codigos == PUENTE).max(initial=0)),
+        "regiones": int(terreno.componentes.max(initial=0)),
+        "mapa": [digitos[y * ancho : (y + 1) * ancho] for y in range(alto)],
+    }
+
+
+def _generar_tarea(tarea: dict) -> dict:
+    return generar_mapa(**tarea)
+
+
+def generar_tareas(semillas, tamaños, densidades, densidades_bosque, rios) -> list[dict]:
+    """Crea una tarea por cada combinación de parámetros y semilla."""
+
+    return [
+        {
+            "semilla": semilla,
+            "ancho": ancho,
+            "alto": alto,
+            "densidad": densidad,
+            "densidad_bosque": bosque,
+            "num_rios": num_rios,
+        }
+        for (ancho, alto), densidad, bosque, num_rios, semilla in itertools.product(
+            tamaños, densidades, densidades_bosque, rios, semillas
+        )
+    ]
+
+
+def resumir_lote(registros: list[dict]) -> dict:
+    """Media, mínimo y máximo de cada estadística de los mapas generados."""
+
+    resumen = {"mapas": len(registros)}
+    for clave in ESTADISTICAS:
+        valores = [r[clave] for r in registros]
+        resumen[clave] = {
+            "media": sum(valores) / len(valores) if valores else 0.0,
+            "minimo": min(valores, default=0.0),
+            "maximo": max(valores, default=0.0),
+        }
+    return resumen
+
+
+def _describir(registro: dict) -> str:
+    return (
+        f"semilla {registro['semilla']} {registro['ancho']}x{registro['alto']} "
+        f"paredes {registro['densidad']:.2f} bosque {registro['densidad_bosque']:.2f} "
+        f"ríos {registro['num_rios']}: {registro['tiempo'] * 1000:.1f} ms | "
+        f"transitable {registro['fraccion_transitable']:.1%} | "
+        f"puentes {registro['puentes']} | regiones {registro['regiones']}"
+    )
+
+
+def generar_lote(
+    tareas: list[dict],
+    salida: str | pathlib.Path,
+    por_fragmento: int = MAPAS_POR_FRAGMENTO,
+    trabajadores: int | None = None,
+    informar=print,
+) -> dict:
+    """Genera los mapas de ``tareas`` en paralelo y los guarda por fragmentos.
+
+    Los registros se escriben en el orden de ``tareas`` a medida que llegan,
+    de modo que la memoria usada no depende del tamaño del lote. El
+    resultado es independiente del número de procesos.
+
+    Returns
+    -------
+    dict
+        El manifiesto escrito en ``salida/manifiesto.json``.
+    """
+
+    if por_fragmento < 1:
+        raise ValueError("Cada fragmento debe contener al menos un mapa")
+    salida = pathlib.Path(salida)
+    salida.mkdir(parents=True, exist_ok=True)
+    trabajadores = max(1, trabajadores or os.cpu_count() or 1)
+    bloque = max(1, len(tareas) // (trabajadores * 4))
+
+    fragmentos: list[dict] = []
+    estadisticas: list[dict] = []
+    archivo = None
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=trabajadores) as ejecutor:
+        for i, registro in enumerate(ejecutor.map(_generar_tarea, tareas, chunksize=bloque)):
+            if i % por_fragmento == 0:
+                if archivo is not None:
+                    archivo.close()
+                nombre = f"mapas-{len(fragmentos):05d}.jsonl"
+                archivo = open(salida / nombre, "w", encoding="utf-8")
+                fragmentos.append({"archivo": nombre, "mapas": 0})
+            archivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            fragmentos[-1]["mapas"] += 1
+            # Solo se conservan las estadísticas para el resumen
+            del registro["mapa"]
+            estadisticas.append(registro)
+            informar(_describir(registro))
+    if archivo is not None:
+        archivo.close()
+
+    manifiesto = {
+        "tipos_tile": list(TIPOS_TILE),
+        "fragmentos": fragmentos,
+        "resumen": resumir_lote(estadisticas),
+        "tiempo_total": time.perf_counter() - inicio,
+        "trabajadores": trabajadores,
+    }
+    with open(salida / MANIFIESTO, "w", encoding="utf-8") as destino:
+        json.dump(manifiesto, destino, ensure_ascii=False, indent=2)
+    return manifiesto
+
+
+def _tamaño(texto: str) -> tuple[int, int]:
+    ancho, _, alto = texto.lower().partition("x")
+    try:
+        return int(ancho), int(alto or ancho)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Tamaño no válido: {texto}") from None
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Genera un terreno y un ejército y los exporta a archivos JSON"
     )
-    parser.add_argument("ancho", type=int, help="Ancho del terreno en tiles")
-    parser.add_argument("alto", type=int, help="Alto del terreno en tiles")
+    parser.add_argument("ancho", type=int, nargs="?", help="Ancho del terreno en tiles")
+    parser.add_argument("alto", type=int, nargs="?", help="Alto del terreno en tiles")
     parser.add_argument(
         "semilla", type=int, nargs="?", default=None, help="Semilla para la generación"
     )
+    lote = parser.add_argument_group("generación por lotes")
+    lote.add_argument(
+        "--semillas",
+        type=int,
+        nargs=2,
+        metavar=("INICIO", "FIN"),
+        help="Genera un lote con las semillas de INICIO a FIN (excluida)",
+    )
+    lote.add_argument(
+        "--tamaños", type=_tamaño, nargs="+", default=[(40, 40)], help="Tamaños ANCHOxALTO"
+    )
+    lote.add_argument(
+        "--densidades", type=float, nargs="+", default=[0.1], help="Densidades de paredes"
+    )
+    lote.add_argument(
+        "--densidades-bosque", type=float, nargs="+", default=[0.1], help="Densidades de bosque"
+    )
+    lote.add_argument("--rios", type=int, nargs="+", default=[1], help="Números de ríos")
+    lote.add_argument("--salida", default="corpus", help="Directorio de los fragmentos")
+    lote.add_argument(
+        "--por-fragmento", type=int, default=MAPAS_POR_FRAGMENTO, help="Mapas por fragmento"
+    )
+    lote.add_argument(
+        "--trabajadores", type=int, default=os.cpu_count(), help="Procesos simultáneos"
+    )
     args = parser.parse_args()
 
+    if args.semillas:
+        tareas = generar_tareas(
+            range(*args.semillas),
+            args.tamaños,
+            args.densidades,
+            args.densidades_bosque,
+            args.rios,
+        )
+        manifiesto = generar_lote(tareas, args.salida, args.por_fragmento, args.trabajadores)
+        resumen = manifiesto["resumen"]
+        print()
+        print(
+            f"{resumen['mapas']} mapas en {len(manifiesto['fragmentos'])} fragmentos "
+            f"({manifiesto['tiempo_total']:.1f} s) en {args.salida}"
+        )
+        for clave in ESTADISTICAS:
+            datos = resumen[clave]
+            print(
+                f"{clave}: media {datos['media']:.4g} | "
+                f"mínimo {datos['minimo']:.4g} | máximo {datos['maximo']:.4g}"
+            )
+        return
+
+    if args.ancho is None or args.alto is None:
+        parser.error("Indica ancho y alto, o --semillas para generar un lote")
     terreno = Terreno(args.ancho, args.alto, semilla=args.semilla)
     terreno.exportar_json("terreno.json")
     ejercito = EjercitoMagia()
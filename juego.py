@@ -1,16 +1,17 @@
 """Punto de entrada del juego y clase principal."""
 
-import random
-
+import numpy as np
 import pygame
 
 import constantes as const
 from terreno import Terreno
 from jugador import Jugador
-from ui import Boton, Selector, dibujar_panel, mostrar_tooltip
+from animaciones import ReproductorAnimaciones
+from ui import Boton, Selector, dibujar_panel, mostrar_tooltip, renderizar_texto
 from batalla.campo import CampoBatalla
 from batalla.facciones import EjercitoMagia, EjercitoAngeles, EjercitoDemonios
 from batalla.carga import leer_ejercito
+from batalla.simulacion_hilo import EstadoUnidad, SimulacionEnHilo
 
 
 class Juego:
@@ -27,7 +28,10 @@ class Juego:
         self.densidad_bosque = 0.1
         self.num_rios = 1
 
-        self.terreno = Terreno(self.ancho_tiles, self.alto_tiles, self.densidad, self.densidad_bosque, self.num_rios)
+        self.terreno = Terreno(
+            self.ancho_tiles, self.alto_tiles, self.densidad, self.densidad_bosque, self.num_rios,
+            max_rutas=1,
+        )
         px, py = self.terreno.posicion_inicial()
         self.jugador = Jugador(px, py, tamaño=const.TAM_CELDA - 4)
 
@@ -72,12 +76,33 @@ class Juego:
         self.ejercito_a = None
         self.ejercito_b = None
         self.simulando = False
-        # Acciones pendientes devueltas por ``CampoBatalla.simular_turno``
-        self.acciones: list[dict] = []
+        # Hilo que simula la batalla y último estado de las unidades recibido
+        self.simulacion: SimulacionEnHilo | None = None
+        self.estado_unidades: list[EstadoUnidad] = []
+        # Columnas de posición del estado recibido para recortar a la
+        # cámara, índice de la unidad de cada celda y superficies cacheadas
+        self._xs_unidades = self._ys_unidades = np.zeros(0, dtype=np.int64)
+        self._celdas_unidades: dict[tuple[int, int], int] = {}
+        self._sprites_unidades: dict[tuple[int, int], pygame.Surface] = {}
+        self._barras_salud: dict[tuple[int, int], pygame.Surface] = {}
+        # Animaciones de las acciones devueltas por ``CampoBatalla.simular_turno``
+        self.animaciones = ReproductorAnimaciones()
         self.pausado = False
         self.avanzar_un_turno = False
         self.ultimo_turno = 0
         self.intervalo_turno = 500  # milisegundos entre turnos
+        # Milisegundos restantes de la cuenta atrás previa al combate
+        self.cuenta_atras = 0
+        # Milisegundos transcurridos en el último fotograma
+        self.dt = 0
+        # Avance rápido: turnos consumidos por fotograma sin animaciones y
+        # redibujado limitado a uno cada ``intervalo_redibujo_turbo`` ms
+        self.turbo = False
+        self.turnos_por_fotograma = 20
+        self.intervalo_redibujo_turbo = 250
+        self.ultimo_redibujo = 0
+        # La ventana cambió de tamaño durante una batalla
+        self.terreno_pendiente = False
 
     # ------------------------------------------------------------------
     # Métodos de utilidades
@@ -88,47 +113,72 @@ class Juego:
         self.cam_x = min(0, max(min_cam_x, self.cam_x))
         self.cam_y = min(0, max(min_cam_y, self.cam_y))
 
+    def terreno_en_uso(self):
+        """Indica si hay una batalla en curso que lee el terreno.
+
+        El hilo de simulación consulta el terreno en cada turno, así que
+        mientras dura el combate no se regenera ni se reemplaza.
+        """
+        return self.estado == "combate"
+
     def regenerar(self, semilla=None):
-        if semilla is not None:
-            random.seed(semilla)
-        self.terreno.generar()
+        if self.terreno_en_uso():
+            return
+        self.terreno.generar(semilla)
         self.jugador.rect.topleft = self.terreno.posicion_inicial()
 
     def densidad_mas(self):
+        if self.terreno_en_uso():
+            return
         self.densidad = min(self.densidad + 0.01, 1.0)
         self.terreno.densidad = self.densidad
         self.regenerar()
 
     def densidad_menos(self):
+        if self.terreno_en_uso():
+            return
         self.densidad = max(self.densidad - 0.01, 0.0)
         self.terreno.densidad = self.densidad
         self.regenerar()
 
     def rios_mas(self):
+        if self.terreno_en_uso():
+            return
         self.num_rios = min(self.num_rios + 1, 3)
         self.terreno.num_rios = self.num_rios
         self.regenerar()
 
     def rios_menos(self):
+        if self.terreno_en_uso():
+            return
         self.num_rios = max(self.num_rios - 1, 1)
         self.terreno.num_rios = self.num_rios
         self.regenerar()
 
     def densidad_bosque_mas(self):
+        if self.terreno_en_uso():
+            return
         self.densidad_bosque = min(self.densidad_bosque + 0.01, 1.0)
         self.terreno.densidad_bosque = self.densidad_bosque
         self.regenerar()
 
     def densidad_bosque_menos(self):
+        if self.terreno_en_uso():
+            return
         self.densidad_bosque = max(self.densidad_bosque - 0.01, 0.0)
         self.terreno.densidad_bosque = self.densidad_bosque
         self.regenerar()
 
     def ajustar_celda(self, delta):
+        if self.terreno_en_uso():
+            return
         const.TAM_CELDA = max(5, const.TAM_CELDA + delta)
         self.ancho_tiles = const.ANCHO // const.TAM_CELDA
         self.alto_tiles = self.ancho_tiles
-        self.terreno = Terreno(self.ancho_tiles, self.alto_tiles, self.densidad, self.densidad_bosque, self.num_rios)
+        self.terreno = Terreno(
+            self.ancho_tiles, self.alto_tiles, self.densidad, self.densidad_bosque, self.num_rios,
+            max_rutas=1,
+        )
         px, py = self.terreno.posicion_inicial()
         self.jugador = Jugador(px, py, tamaño=const.TAM_CELDA - 4)
         self.limitar_camara()
@@ -149,7 +199,13 @@ class Juego:
             self.ruta_b = input("Ruta del archivo para el ejército B: ").strip()
         self.faccion_b = nombre
 
+    def detener_simulacion(self):
+        if self.simulacion is not None:
+            self.simulacion.detener()
+            self.simulacion = None
+
     def iniciar_batalla(self):
+        self.detener_simulacion()
         self.campo = CampoBatalla(self.terreno)
         if self.faccion_a == "Archivo" and self.ruta_a:
             self.ejercito_a = leer_ejercito(self.ruta_a)
@@ -162,14 +218,19 @@ class Juego:
         self._colocar_ejercitos()
         # Calcular rutas iniciales entre los ejércitos (referencia de preparación)
         if self.ejercito_a.unidades and self.ejercito_b.unidades:
-            pos_a = self.campo.posicion(self.ejercito_a.unidades[0])
-            pos_b = self.campo.posicion(self.ejercito_b.unidades[0])
-            self.terreno.calcular_camino(pos_a, pos_b, "A")
-            self.terreno.calcular_camino(pos_b, pos_a, "B")
+            pos_a = self.campo.posicion(self.ejercito_a.unidades.primera())
+            pos_b = self.campo.posicion(self.ejercito_b.unidades.primera())
+            self.terreno.calcular_camino(pos_a, pos_b, "A", jerarquico=True)
+            self.terreno.calcular_camino(pos_b, pos_a, "B", jerarquico=True)
 
         # Preparar combate y mostrar cuenta atrás antes de simular
+        self.simulacion = SimulacionEnHilo(self.campo, self.ejercito_a, self.ejercito_b)
+        self._fijar_estado_unidades(self.simulacion.estado_unidades())
+        self.animaciones.vaciar()
         self.estado = "combate"
         self.simulando = False
+        self.cuenta_atras = 0
+        self.turbo = False
         self.pausado = False
         self.avanzar_un_turno = False
         self.boton_batalla.texto = "Batalla"
@@ -179,126 +240,107 @@ class Juego:
         self.dibujar()
         pygame.image.save(self.superficie_juego, "captura_inicial.png")
 
-        fuente = pygame.font.Font(None, 120)
-        centro = (
-            const.ANCHO // 2,
-            const.ALTO_PANEL + (const.ALTO - const.ALTO_PANEL) // 2,
-        )
-        for contador in range(3, 0, -1):
-            pygame.event.get()  # Limpiar eventos para bloquear la entrada
-            self.dibujar()
-            texto = fuente.render(str(contador), True, (255, 255, 255))
-            rect = texto.get_rect(center=centro)
-            self.superficie_juego.blit(texto, rect)
-            self.pantalla.fill((0, 0, 0))
-            self.pantalla.blit(self.superficie_juego, (self.offset_x, self.offset_y))
-            pygame.display.flip()
-            pygame.time.wait(1000)
-
-        pygame.event.get()
-        self.simulando = True
-        self.ultimo_turno = pygame.time.get_ticks()
+        # La cuenta atrás avanza con el bucle principal mientras el hilo
+        # ya simula los primeros turnos
+        self.cuenta_atras = 3000
+        self.simulacion.iniciar()
 
     def comenzar_combate(self):
         """Método obsoleto mantenido por compatibilidad."""
         self.iniciar_batalla()
 
-    def _buscar_posicion(self, desde_derecha=False):
-        rango_x = (
-            range(self.campo.ancho - 1, -1, -1)
-            if desde_derecha
-            else range(self.campo.ancho)
-        )
-        for x in rango_x:
-            for y in range(self.campo.alto):
-                if self.campo.es_transitable(x, y) and self.campo._grid[y][x] is None:
-                    return x, y
-        raise ValueError("No hay posiciones disponibles")
-
     def _colocar_ejercitos(self):
-        for unidad in self.ejercito_a.unidades:
-            x, y = self._buscar_posicion()
-            self.campo.colocar_unidad(unidad, x, y)
-        for unidad in self.ejercito_b.unidades:
-            x, y = self._buscar_posicion(desde_derecha=True)
-            self.campo.colocar_unidad(unidad, x, y)
+        # Ambos ejércitos en la misma región para que puedan alcanzarse
+        region = self.terreno.componente_principal()
+        self.campo.colocar_ejercito(self.ejercito_a, componente=region)
+        self.campo.colocar_ejercito(self.ejercito_b, desde_derecha=True, componente=region)
+
+    def _fijar_estado_unidades(self, unidades):
+        """Sustituye el estado dibujado por la instantánea ``unidades``.
+
+        El campo pertenece al hilo de simulación mientras la batalla está en
+        curso, así que el dibujo y la unidad bajo el cursor se resuelven con
+        la instantánea del último turno recibido: sus posiciones en columnas
+        y una tabla de la unidad que ocupa cada celda.
+        """
+
+        self.estado_unidades = unidades
+        self._xs_unidades = np.fromiter((u.x for u in unidades), np.int64, len(unidades))
+        self._ys_unidades = np.fromiter((u.y for u in unidades), np.int64, len(unidades))
+        self._celdas_unidades = {(u.x, u.y): i for i, u in enumerate(unidades)}
+
+    def _sprite_unidad(self, bando):
+        clave = (bando, const.TAM_CELDA)
+        sprite = self._sprites_unidades.get(clave)
+        if sprite is None:
+            sprite = pygame.Surface((const.TAM_CELDA, const.TAM_CELDA))
+            sprite.fill((255, 0, 0) if bando == 0 else (0, 0, 255))
+            self._sprites_unidades[clave] = sprite
+        return sprite
+
+    def _barra_salud(self, salud, salud_max):
+        # Hay una barra por cada ancho posible en píxeles, de modo que solo
+        # se renderiza una nueva cuando la salud cambia lo bastante
+        ancho_barra = const.TAM_CELDA
+        ancho_salud = int(ancho_barra * max(salud, 0) / salud_max) if salud_max > 0 else 0
+        clave = (ancho_salud, ancho_barra)
+        barra = self._barras_salud.get(clave)
+        if barra is None:
+            barra = pygame.Surface((ancho_barra, 4))
+            barra.fill((255, 0, 0))
+            barra.fill((0, 255, 0), (0, 0, ancho_salud, 4))
+            self._barras_salud[clave] = barra
+        return barra
 
     def _dibujar_unidades(self):
+        celda = const.TAM_CELDA
+        # Celdas visibles con la cámara actual
+        x0, y0 = -self.cam_x // celda, -self.cam_y // celda
+        x1 = (const.ANCHO - self.cam_x) // celda
+        y1 = (const.ALTO - const.ALTO_PANEL - self.cam_y) // celda
+        xs, ys = self._xs_unidades, self._ys_unidades
+        visibles = np.flatnonzero((xs >= x0) & (xs <= x1) & (ys >= y0) & (ys <= y1))
+
+        origen_y = const.ALTO_PANEL + self.cam_y
+        estado = self.estado_unidades
+        blits = []
+        for i in visibles.tolist():
+            unidad = estado[i]
+            sx = unidad.x * celda + self.cam_x
+            sy = origen_y + unidad.y * celda
+            blits.append((self._sprite_unidad(unidad.bando), (sx, sy)))
+            # Barra de salud sobre la unidad
+            blits.append((self._barra_salud(unidad.salud, unidad.salud_max), (sx, sy - 6)))
+        self.superficie_juego.blits(blits, False)
+
         mx, my = pygame.mouse.get_pos()
         mx -= self.offset_x
         my -= self.offset_y
-        unidad_hover = None
-        for unidad in self.campo.unidades():
-            x, y = self.campo.posicion(unidad)
-            sx = x * const.TAM_CELDA + self.cam_x
-            sy = const.ALTO_PANEL + y * const.TAM_CELDA + self.cam_y
-            rect = pygame.Rect(sx, sy, const.TAM_CELDA, const.TAM_CELDA)
-            color = (255, 0, 0) if unidad in self.ejercito_a.unidades else (0, 0, 255)
-            pygame.draw.rect(self.superficie_juego, color, rect)
-            # Barra de salud sobre la unidad
-            salud_max = self.campo._salud_max.get(unidad, unidad.salud)
-            ancho_barra = const.TAM_CELDA
-            alto_barra = 4
-            bx = sx
-            by = sy - alto_barra - 2
-            fondo = pygame.Rect(bx, by, ancho_barra, alto_barra)
-            pygame.draw.rect(self.superficie_juego, (255, 0, 0), fondo)
-            if salud_max > 0:
-                ancho_salud = int(ancho_barra * max(unidad.salud, 0) / salud_max)
-            else:
-                ancho_salud = 0
-            barra = pygame.Rect(bx, by, ancho_salud, alto_barra)
-            pygame.draw.rect(self.superficie_juego, (0, 255, 0), barra)
-            if rect.collidepoint((mx, my)):
-                unidad_hover = unidad
-        if unidad_hover:
-            mostrar_tooltip(self.superficie_juego, unidad_hover, (mx, my))
+        indice = self._celdas_unidades.get(((mx - self.cam_x) // celda, (my - origen_y) // celda))
+        if indice is not None and my >= const.ALTO_PANEL:
+            mostrar_tooltip(self.superficie_juego, estado[indice], (mx, my))
 
     # ------------------------------------------------------------------
     # Animaciones de acciones de combate
     # ------------------------------------------------------------------
     def reproducir_accion(self, accion: dict) -> None:
-        """Muestra una animación simple para la acción indicada.
+        """Añade la animación de ``accion`` a la tanda pendiente.
 
-        Las animaciones son deliberadamente sencillas: líneas que unen al
-        actor con el objetivo o un pequeño punto que se desplaza al moverse
-        una unidad. Se realiza un breve retardo para que el jugador pueda
-        percibir la acción antes de continuar con la siguiente.
+        No bloquea: las animaciones avanzan en cada fotograma con
+        :meth:`ReproductorAnimaciones.actualizar` y se dibujan en
+        :meth:`dibujar`. Las acciones de un mismo turno se animan a la vez.
         """
 
-        tipo = accion.get("tipo")
-        ox, oy = accion.get("origen", (0, 0))
-        dx, dy = accion.get("destino", (0, 0))
+        self.animaciones.agregar(accion)
 
-        inicio = (
-            ox * const.TAM_CELDA + self.cam_x + const.TAM_CELDA // 2,
-            const.ALTO_PANEL + oy * const.TAM_CELDA + self.cam_y + const.TAM_CELDA // 2,
-        )
-        fin = (
-            dx * const.TAM_CELDA + self.cam_x + const.TAM_CELDA // 2,
-            const.ALTO_PANEL + dy * const.TAM_CELDA + self.cam_y + const.TAM_CELDA // 2,
+    def _dibujar_cuenta_atras(self):
+        centro = (
+            const.ANCHO // 2,
+            const.ALTO_PANEL + (const.ALTO - const.ALTO_PANEL) // 2,
         )
-
-        color = (255, 255, 0)
-        if tipo == "atacar":
-            color = (255, 0, 0)
-        elif tipo == "curar":
-            color = (0, 255, 0)
-
-        pasos = 5
-        for i in range(pasos):
-            self.dibujar()
-            if tipo == "mover":
-                px = inicio[0] + (fin[0] - inicio[0]) * (i + 1) / pasos
-                py = inicio[1] + (fin[1] - inicio[1]) * (i + 1) / pasos
-                pygame.draw.circle(
-                    self.superficie_juego, color, (int(px), int(py)), const.TAM_CELDA // 3
-                )
-            else:
-                pygame.draw.line(self.superficie_juego, color, inicio, fin, 3)
-            self.pantalla.blit(self.superficie_juego, (self.offset_x, self.offset_y))
-            pygame.display.flip()
-            pygame.time.wait(40)
+        segundos = -(-self.cuenta_atras // 1000)
+        texto = renderizar_texto(str(segundos), 120, (255, 255, 255))
+        self.superficie_juego.blit(texto, texto.get_rect(center=centro))
 
     def mostrar_preparacion(self):
         self.terreno.dibujar(self.superficie_juego, self.cam_x, self.cam_y)
@@ -338,8 +380,23 @@ class Juego:
                     self.densidad_menos()
                 elif evento.key == pygame.K_p and self.estado == "combate":
                     self.pausado = not self.pausado
+                    if self.simulacion is not None:
+                        if self.pausado:
+                            self.simulacion.pausar()
+                        else:
+                            self.simulacion.reanudar()
                 elif evento.key == pygame.K_n and self.estado == "combate":
                     self.avanzar_un_turno = True
+                    if self.simulacion is not None and self.pausado:
+                        self.simulacion.avanzar()
+                elif evento.key == pygame.K_PERIOD:
+                    self.animaciones.velocidad = min(self.animaciones.velocidad * 2, 16)
+                elif evento.key == pygame.K_COMMA:
+                    self.animaciones.velocidad = max(self.animaciones.velocidad / 2, 0.25)
+                elif evento.key == pygame.K_t and self.estado == "combate":
+                    self.activar_turbo(not self.turbo)
+                elif evento.key == pygame.K_f and self.estado == "combate":
+                    self.saltar_al_final()
             elif evento.type == pygame.MOUSEBUTTONDOWN and evento.button == 3:
                 self.arrastrando = True
                 self.ultimo_mouse = evento.pos
@@ -359,72 +416,130 @@ class Juego:
                 self.superficie_juego = pygame.Surface((const.ANCHO, const.ALTO))
                 self.offset_x = (evento.w - const.ANCHO) // 2
                 self.offset_y = (evento.h - const.ALTO) // 2
-                self.ancho_tiles = const.ANCHO // const.TAM_CELDA
-                self.alto_tiles = self.ancho_tiles
-                self.terreno = Terreno(self.ancho_tiles, self.alto_tiles, self.densidad, self.densidad_bosque, self.num_rios)
-                self.jugador.rect.topleft = self.terreno.posicion_inicial()
+                # El terreno se ajusta a la ventana al terminar la batalla
+                self.terreno_pendiente = self.terreno_en_uso()
+                if not self.terreno_pendiente:
+                    self.ajustar_terreno_a_ventana()
                 self.limitar_camara()
 
-    def actualizar(self):
+    def ajustar_terreno_a_ventana(self):
+        """Crea un terreno nuevo con tantos tiles como caben en la ventana."""
+
+        self.terreno_pendiente = False
+        self.ancho_tiles = const.ANCHO // const.TAM_CELDA
+        self.alto_tiles = self.ancho_tiles
+        self.terreno = Terreno(
+            self.ancho_tiles, self.alto_tiles, self.densidad, self.densidad_bosque, self.num_rios,
+            max_rutas=1,
+        )
+        self.jugador.rect.topleft = self.terreno.posicion_inicial()
+        self.limitar_camara()
+
+    def activar_turbo(self, activo=True):
+        """Activa o desactiva el avance rápido de la batalla.
+
+        En turbo el hilo agrupa ``turnos_por_fotograma`` turnos en cada
+        entrega, cada fotograma consume una sin esperar ``intervalo_turno`` y
+        no se reproducen animaciones. Al desactivarlo se vuelve a la
+        reproducción normal turno a turno.
+        """
+
+        self.turbo = activo
+        self.animaciones.vaciar()
+        if self.simulacion is not None:
+            self.simulacion.fijar_turnos_por_entrega(self.turnos_por_fotograma if activo else 1)
+
+    def saltar_al_final(self):
+        """Simula sin pausas hasta que uno de los ejércitos sea derrotado."""
+
+        self.activar_turbo()
+        self.cuenta_atras = 0
+        self.simulando = True
+        if self.simulacion is not None:
+            self.simulacion.fijar_turnos_por_entrega(None)
+            if self.pausado:
+                self.pausado = False
+                self.simulacion.reanudar()
+
+    def actualizar(self, dt=0):
         if self.estado == "combate":
-            if self.simulando:
-                if self.acciones:
-                    if not self.pausado or self.avanzar_un_turno:
-                        accion = self.acciones.pop(0)
-                        self.reproducir_accion(accion)
-                        if not self.acciones and self.avanzar_un_turno and self.pausado:
-                            self.avanzar_un_turno = False
-                elif not self.pausado or self.avanzar_un_turno:
-                    ahora = pygame.time.get_ticks()
-                    if self.avanzar_un_turno or ahora - self.ultimo_turno >= self.intervalo_turno:
-                        self.acciones = self.campo.simular_turno(
-                            self.ejercito_a, self.ejercito_b
-                        )
+            self.animaciones.actualizar(dt)
+            if self.cuenta_atras > 0:
+                self.cuenta_atras -= dt
+                if self.cuenta_atras <= 0:
+                    self.cuenta_atras = 0
+                    self.simulando = True
+                    self.ultimo_turno = pygame.time.get_ticks()
+            elif self.simulando and (not self.pausado or self.avanzar_un_turno):
+                ahora = pygame.time.get_ticks()
+                if (
+                    self.turbo
+                    or self.avanzar_un_turno
+                    or ahora - self.ultimo_turno >= self.intervalo_turno
+                ):
+                    # El turno llega del hilo de simulación; si aún no está
+                    # listo se sigue dibujando y atendiendo eventos
+                    turno = self.simulacion.siguiente_turno()
+                    if turno is not None:
+                        if not self.turbo:
+                            self.animaciones.agregar_turno(turno["acciones"])
+                        self._fijar_estado_unidades(turno["unidades"])
                         self.ultimo_turno = ahora
-                        if not self.ejercito_a.unidades or not self.ejercito_b.unidades:
-                            # Obtener estadísticas finales del combate y generar reporte
-                            estadisticas = self.campo.obtener_estadisticas()
-                            ganadores = []
-                            if self.ejercito_a.unidades:
-                                ganadores.append("Ejército A")
-                            if self.ejercito_b.unidades:
-                                ganadores.append("Ejército B")
-                            daños = estadisticas.get("daño_por_unidad", {})
-                            unidad_mvp = max(daños, key=daños.get) if daños else None
-                            with open("reporte_batalla.txt", "w", encoding="utf-8") as reporte:
-                                reporte.write(
-                                    "Ganadores: "
-                                    + (", ".join(ganadores) if ganadores else "Empate")
-                                    + "\n"
-                                )
-                                reporte.write(
-                                    f"Turnos totales: {estadisticas.get('turno_actual', 0)}\n\n"
-                                )
-                                if unidad_mvp:
-                                    reporte.write(
-                                        "MVP: "
-                                        f"{unidad_mvp.__class__.__name__} (ID {unidad_mvp.id}) - Daño infligido: {daños[unidad_mvp]}\n\n"
-                                    )
-                                reporte.write("Resumen por unidad:\n")
-                                for unidad, daño in daños.items():
-                                    linea = (
-                                        f"- {unidad.__class__.__name__} (ID {unidad.id}) - Salud: {unidad.salud} - Daño infligido: {daño}"
-                                    )
-                                    if unidad is unidad_mvp:
-                                        linea += " (MVP)"
-                                    reporte.write(linea + "\n")
-
-                            self.campo.exportar_replay("replay.json")
-
-                            self.estado = "exploracion"
-                            self.boton_batalla.texto = "Batalla"
-                            self.boton_batalla.accion = self.iniciar_batalla
-                            self.simulando = False
-                            self.mostrar_reporte()
+                        self.avanzar_un_turno = False
+                        if turno["fin"]:
+                            self.finalizar_batalla()
         elif self.estado == "exploracion":
             teclas = pygame.key.get_pressed()
             self.jugador.mover(teclas, self.terreno)
 
+    def finalizar_batalla(self):
+        """Genera el reporte y el replay del combate y vuelve a la exploración."""
+
+        # El último turno ya se recibió, así que el hilo ha terminado
+        self.detener_simulacion()
+        # Obtener estadísticas finales del combate y generar reporte
+        estadisticas = self.campo.obtener_estadisticas()
+        ganadores = []
+        if self.ejercito_a.unidades:
+            ganadores.append("Ejército A")
+        if self.ejercito_b.unidades:
+            ganadores.append("Ejército B")
+        daños = estadisticas.get("daño_por_unidad", {})
+        unidad_mvp = max(daños, key=daños.get) if daños else None
+        with open("reporte_batalla.txt", "w", encoding="utf-8") as reporte:
+            reporte.write(
+                "Ganadores: "
+                + (", ".join(ganadores) if ganadores else "Empate")
+                + "\n"
+            )
+            reporte.write(
+                f"Turnos totales: {estadisticas.get('turno_actual', 0)}\n\n"
+            )
+            if unidad_mvp:
+                reporte.write(
+                    "MVP: "
+                    f"{unidad_mvp.__class__.__name__} (ID {unidad_mvp.id}) - Daño infligido: {daños[unidad_mvp]}\n\n"
+                )
+            reporte.write("Resumen por unidad:\n")
+            for unidad, daño in daños.items():
+                linea = (
+                    f"- {unidad.__class__.__name__} (ID {unidad.id}) - Salud: {unidad.salud} - Daño infligido: {daño}"
+                )
+                if unidad is unidad_mvp:
+                    linea += " (MVP)"
+                reporte.write(linea + "\n")
+
+        self.campo.exportar_replay("replay.json")
+
+        self.estado = "exploracion"
+        self.boton_batalla.texto = "Batalla"
+        self.boton_batalla.accion = self.iniciar_batalla
+        self.simulando = False
+        self.turbo = False
+        if self.terreno_pendiente:
+            self.ajustar_terreno_a_ventana()
+        self.mostrar_reporte()
+
     def mostrar_reporte(self, ruta: str = "reporte_batalla.txt") -> None:
         """Limpia la pantalla y muestra el contenido del reporte de batalla.
 
@@ -438,7 +553,6 @@ class Juego:
         except FileNotFoundError:
             lineas = ["Reporte no encontrado."]
 
-        fuente = pygame.font.Font(None, 36)
         mostrando = True
         while mostrando and self.corriendo:
             for evento in pygame.event.get():
@@ -458,11 +572,11 @@ class Juego:
                 color = (255, 255, 255)
                 if linea.startswith("MVP") or "(MVP)" in linea:
                     color = (255, 215, 0)
-                texto = fuente.render(linea.strip(), True, color)
+                texto = renderizar_texto(linea.strip(), 36, color)
                 self.pantalla.blit(texto, (20, y))
                 y += 30
-            instrucciones = fuente.render(
-                "Presiona M para menú o Q para salir", True, (255, 255, 0)
+            instrucciones = renderizar_texto(
+                "Presiona M para menú o Q para salir", 36, (255, 255, 0)
             )
             self.pantalla.blit(instrucciones, (20, y + 20))
             pygame.display.flip()
@@ -477,6 +591,12 @@ class Juego:
             self.terreno.dibujar(self.superficie_juego, self.cam_x, self.cam_y)
             if self.estado == "combate" and self.campo:
                 self._dibujar_unidades()
+                self.animaciones.dibujar(self.superficie_juego, self.cam_x, self.cam_y)
+                if self.cuenta_atras > 0:
+                    self._dibujar_cuenta_atras()
+                if self.turbo:
+                    texto = renderizar_texto("Turbo", 36, (255, 255, 0))
+                    self.superficie_juego.blit(texto, (10, const.ALTO_PANEL + 10))
             else:
                 self.jugador.dibujar(self.superficie_juego, self.cam_x, self.cam_y)
         self.pantalla.fill((0, 0, 0))
@@ -485,10 +605,14 @@ class Juego:
     def run(self):
         while self.corriendo:
             self.manejar_eventos()
-            self.actualizar()
-            self.dibujar()
+            self.actualizar(self.dt)
+            ahora = pygame.time.get_ticks()
+            if not self.turbo or ahora - self.ultimo_redibujo >= self.intervalo_redibujo_turbo:
+                self.dibujar()
+                self.ultimo_redibujo = ahora
             pygame.display.flip()
-            self.reloj.tick(30)
+            self.dt = self.reloj.tick(30)
+        self.detener_simulacion()
         pygame.quit()
 
 
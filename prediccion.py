@@ -0,0 +1,385 @@
+"""Predicción del resultado de una batalla mediante simulaciones de Monte Carlo.
+
+:func:`predecir` bifurca el estado actual de un :class:`CampoBatalla` y lo
+juega hasta el final muchas veces en un conjunto de procesos. Cada
+simulación parte de la misma :class:`batalla.instantanea.Instantanea` y
+perturba de forma aleatoria lo que la simulación deja fijo: el orden en que
+se desempata la iniciativa entre unidades igual de rápidas y, si se pide, la
+posición de cada unidad dentro de un radio. El resultado es la probabilidad
+de victoria de cada ejército con su intervalo de confianza de Wilson; las
+simulaciones se lanzan por lotes y se detienen en cuanto ambos intervalos
+son lo bastante estrechos.
+
+Cada simulación usa una semilla derivada de la semilla global y de su
+índice, y los lotes se evalúan en orden, por lo que el resultado no depende
+del número de procesos.
+
+Ejemplo::
+
+    python prediccion.py Demonios Magia --desde-turno 20 --precision 0.03
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from terreno import Terreno
+from batalla.campo import CampoBatalla, MODOS_MOVIMIENTO
+from torneo import FACCIONES, crear_participante
+
+if TYPE_CHECKING:
+    from batalla.ejercito import Ejercito
+
+# Resultados de una simulación
+VICTORIA_A = 0
+VICTORIA_B = 1
+EMPATE = 2
+# Simulaciones entre comprobaciones de la precisión. No depende del número de
+# procesos para que la parada temprana ocurra siempre en el mismo punto.
+LOTE_SIMULACIONES = 16
+
+
+def intervalo_wilson(exitos: int, n: int, confianza: float = 0.95) -> tuple[float, float]:
+    """Intervalo de confianza de Wilson para una proporción.
+
+    Con ``n = 0`` devuelve ``(0.0, 1.0)``.
+    """
+
+    if not 0 < confianza < 1:
+        raise ValueError("La confianza debe estar entre 0 y 1")
+    if n == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confianza / 2)
+    p = exitos / n
+    denominador = 1 + z * z / n
+    centro = (p + z * z / (2 * n)) / denominador
+    margen = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominador
+    return max(0.0, centro - margen), min(1.0, centro + margen)
+
+
+def bifurcar(campo: CampoBatalla, ejercito_a: Ejercito, ejercito_b: Ejercito) -> bytes:
+    """Serializa el estado de ``campo`` para reproducirlo en otro proceso.
+
+    Solo se guardan los arrays del terreno, la configuración del campo y una
+    instantánea con sus unidades y ejércitos; ni la caché de caminos ni las
+    superficies dibujadas del terreno viajan con ella.
+    """
+
+    terreno = campo.terreno
+    return pickle.dumps(
+        {
+            "codigos": terreno.codigos,
+            "colisiones": terreno.mascara_colisiones,
+            "modo_movimiento": campo.modo_movimiento,
+            "motor": campo.motor,
+            "instantanea": campo.instantanea(),
+            "ejercitos": (ejercito_a, ejercito_b),
+        }
+    )
+
+
+class _Simulaciones:
+    """Copia de una batalla bifurcada que se juega una y otra vez."""
+
+    def __init__(
+        self,
+        bifurcacion: bytes,
+        max_turnos: int,
+        semilla: int,
+        desempatar_iniciativa: bool,
+        dispersion: int,
+    ):
+        datos = pickle.loads(bifurcacion)
+        terreno = Terreno.desde_arrays(datos["codigos"], datos["colisiones"])
+        self.instantanea = datos["instantanea"]
+        # El mapa es el mismo con el que se capturó la instantánea
+        terreno.version = self.instantanea.cabecera()["version_terreno"]
+        self.campo = CampoBatalla(terreno, datos["modo_movimiento"], datos["motor"])
+        self.ejercito_a, self.ejercito_b = datos["ejercitos"]
+        self.max_turnos = max_turnos
+        self.semilla = semilla
+        self.desempatar_iniciativa = desempatar_iniciativa
+        self.dispersion = dispersion
+
+    def _dispersar(self, rng: np.random.Generator) -> None:
+        campo = self.campo
+        unidades = list(campo._posiciones)
+        radio = self.dispersion
+        for i in rng.permutation(len(unidades)).tolist():
+            unidad = unidades[i]
+            dx, dy = rng.integers(-radio, radio + 1, size=2).tolist()
+            if (dx or dy) and campo.mover_unidad(unidad, dx, dy):
+                # La ruta pendiente partía de la casilla anterior
+                campo._ruta_cache.pop(unidad, None)
+
+    def jugar(self, indice: int) -> tuple[int, int]:
+        """Juega la simulación ``indice`` y devuelve ``(resultado, turnos)``."""
+
+        campo = self.campo
+        campo.restaurar(self.instantanea)
+        rng = np.random.default_rng(np.random.SeedSequence(self.semilla, spawn_key=(indice,)))
+        if self.desempatar_iniciativa:
+            # El orden de registro decide los empates de iniciativa
+            posiciones = list(campo._posiciones.items())
+            campo._posiciones = dict(posiciones[i] for i in rng.permutation(len(posiciones)))
+        if self.dispersion:
+            self._dispersar(rng)
+
+        inicio = campo._estadisticas["turno_actual"]
+        campo.simular(self.ejercito_a, self.ejercito_b, turnos=self.max_turnos)
+        turnos = campo._estadisticas["turno_actual"] - inicio
+        vivos_a = bool(self.ejercito_a.unidades)
+        vivos_b = bool(self.ejercito_b.unidades)
+        if vivos_a and not vivos_b:
+            return VICTORIA_A, turnos
+        if vivos_b and not vivos_a:
+            return VICTORIA_B, turnos
+        return EMPATE, turnos
+
+
+_SIMULACIONES: _Simulaciones | None = None
+
+
+def _iniciar_trabajador(*argumentos) -> None:
+    global _SIMULACIONES
+    _SIMULACIONES = _Simulaciones(*argumentos)
+
+
+def _jugar(indice: int) -> tuple[int, int]:
+    return _SIMULACIONES.jugar(indice)
+
+
+def predecir(
+    campo: CampoBatalla,
+    ejercito_a: Ejercito,
+    ejercito_b: Ejercito,
+    max_turnos: int = 300,
+    semilla: int = 0,
+    desempatar_iniciativa: bool = True,
+    dispersion: int = 0,
+    confianza: float = 0.95,
+    precision: float = 0.05,
+    min_simulaciones: int = 20,
+    max_simulaciones: int = 1000,
+    lote: int = LOTE_SIMULACIONES,
+    trabajadores: int | None = 1,
+) -> dict:
+    """Estima la probabilidad de victoria de cada ejército desde el estado actual.
+
+    ``campo`` no se modifica: las simulaciones se juegan sobre copias.
+
+    Parameters
+    ----------
+    campo:
+        Campo con la batalla en curso.
+    ejercito_a, ejercito_b:
+        Ejércitos enfrentados.
+    max_turnos:
+        Turnos que se simulan como mucho en cada continuación antes de
+        declarar empate.
+    semilla:
+        Semilla de la que se derivan las de cada simulación.
+    desempatar_iniciativa:
+        Si es ``True`` cada simulación baraja el orden en que actúan las
+        unidades con la misma velocidad.
+    dispersion:
+        Radio en casillas en el que cada unidad puede desplazarse al azar
+        antes de empezar. Las que caerían en una casilla ocupada o no
+        transitable no se mueven.
+    confianza:
+        Nivel de confianza de los intervalos.
+    precision:
+        Semiancho de los intervalos a partir del cual se deja de simular.
+    min_simulaciones, max_simulaciones:
+        Simulaciones mínimas antes de comprobar la precisión y máximas en
+        total.
+    lote:
+        Simulaciones lanzadas entre comprobaciones. El resultado depende de
+        él, pero no de ``trabajadores``.
+    trabajadores:
+        Procesos simultáneos. Con 1 las simulaciones se juegan en este
+        proceso; con ``None`` se usan todos los núcleos.
+
+    Returns
+    -------
+    dict
+        ``simulaciones``, ``victorias_a``, ``victorias_b``, ``empates``,
+        ``prob_a``/``prob_b`` con ``intervalo_a``/``intervalo_b``,
+        ``turnos_medios``, ``convergida`` (si se alcanzó la precisión) y
+        ``tiempo`` en segundos.
+    """
+
+    if max_turnos < 1:
+        raise ValueError("Cada simulación debe jugar al menos un turno")
+    if dispersion < 0:
+        raise ValueError("La dispersión no puede ser negativa")
+    if precision <= 0:
+        raise ValueError("La precisión debe ser positiva")
+    if not 1 <= min_simulaciones <= max_simulaciones:
+        raise ValueError("Se necesita 1 <= min_simulaciones <= max_simulaciones")
+    if not 0 < confianza < 1:
+        raise ValueError("La confianza debe estar entre 0 y 1")
+    trabajadores = max(1, trabajadores or os.cpu_count() or 1)
+    if lote < 1:
+        raise ValueError("Cada lote debe incluir al menos una simulación")
+
+    inicio = time.perf_counter()
+    argumentos = (
+        bifurcar(campo, ejercito_a, ejercito_b),
+        max_turnos,
+        semilla,
+        desempatar_iniciativa,
+        dispersion,
+    )
+    conteo = [0, 0, 0]
+    turnos = 0
+    n = 0
+    convergida = False
+    ejecutor = None
+    if trabajadores > 1:
+        ejecutor = ProcessPoolExecutor(
+            max_workers=trabajadores, initializer=_iniciar_trabajador, initargs=argumentos
+        )
+        jugar = _jugar
+    else:
+        jugar = _Simulaciones(*argumentos).jugar
+    try:
+        while n < max_simulaciones:
+            indices = range(n, min(n + max(lote, min_simulaciones - n), max_simulaciones))
+            if ejecutor is None:
+                resultados = map(jugar, indices)
+            else:
+                bloque = max(1, len(indices) // (trabajadores * 4))
+                resultados = ejecutor.map(jugar, indices, chunksize=bloque)
+            for resultado, duracion in resultados:
+                conteo[resultado] += 1
+                turnos += duracion
+            n = indices.stop
+            semianchos = [
+                (alto - bajo) / 2
+                for bajo, alto in (
+                    intervalo_wilson(conteo[VICTORIA_A], n, confianza),
+                    intervalo_wilson(conteo[VICTORIA_B], n, confianza),
+                )
+            ]
+            if max(semianchos) <= precision:
+                convergida = True
+                break
+    finally:
+        if ejecutor is not None:
+            ejecutor.shutdown()
+
+    return {
+        "simulaciones": n,
+        "victorias_a": conteo[VICTORIA_A],
+        "victorias_b": conteo[VICTORIA_B],
+        "empates": conteo[EMPATE],
+        "prob_a": conteo[VICTORIA_A] / n,
+        "prob_b": conteo[VICTORIA_B] / n,
+        "intervalo_a": intervalo_wilson(conteo[VICTORIA_A], n, confianza),
+        "intervalo_b": intervalo_wilson(conteo[VICTORIA_B], n, confianza),
+        "turnos_medios": turnos / n,
+        "convergida": convergida,
+        "tiempo": time.perf_counter() - inicio,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Estima por Monte Carlo quién ganará una batalla en curso"
+    )
+    parser.add_argument("ejercito_a", help="Facción predefinida o archivo JSON del ejército A")
+    parser.add_argument("ejercito_b", help="Facción predefinida o archivo JSON del ejército B")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla del terreno")
+    parser.add_argument(
+        "--semilla-simulaciones", type=int, default=0, help="Semilla de las perturbaciones"
+    )
+    parser.add_argument(
+        "--desde-turno", type=int, default=0, help="Turnos jugados antes de predecir"
+    )
+    parser.add_argument("--ancho", type=int, default=30, help="Ancho del terreno en tiles")
+    parser.add_argument("--alto", type=int, default=30, help="Alto del terreno en tiles")
+    parser.add_argument("--densidad", type=float, default=0.1, help="Densidad de paredes")
+    parser.add_argument("--densidad-bosque", type=float, default=0.1, help="Densidad de bosque")
+    parser.add_argument("--rios", type=int, default=1, help="Número de ríos")
+    parser.add_argument("--max-turnos", type=int, default=300, help="Turnos antes de declarar empate")
+    parser.add_argument(
+        "--modo-movimiento", choices=MODOS_MOVIMIENTO, default="ruta", help="Modo de movimiento"
+    )
+    parser.add_argument(
+        "--sin-desempate",
+        action="store_true",
+        help="No barajar el orden de las unidades con la misma iniciativa",
+    )
+    parser.add_argument(
+        "--dispersion", type=int, default=0, help="Radio de desplazamiento aleatorio inicial"
+    )
+    parser.add_argument("--confianza", type=float, default=0.95, help="Nivel de confianza")
+    parser.add_argument(
+        "--precision", type=float, default=0.05, help="Semiancho de intervalo objetivo"
+    )
+    parser.add_argument("--min-simulaciones", type=int, default=20, help="Simulaciones mínimas")
+    parser.add_argument("--max-simulaciones", type=int, default=1000, help="Simulaciones máximas")
+    parser.add_argument(
+        "--lote", type=int, default=LOTE_SIMULACIONES, help="Simulaciones entre comprobaciones"
+    )
+    parser.add_argument(
+        "--trabajadores", type=int, default=os.cpu_count(), help="Procesos simultáneos"
+    )
+    args = parser.parse_args()
+
+    for nombre in (args.ejercito_a, args.ejercito_b):
+        if nombre not in FACCIONES and not os.path.exists(nombre):
+            parser.error(f"Participante desconocido: {nombre}")
+
+    terreno = Terreno(
+        args.ancho, args.alto, args.densidad, args.densidad_bosque, args.rios, semilla=args.semilla
+    )
+    campo = CampoBatalla(terreno, args.modo_movimiento)
+    ejercito_a = crear_participante(args.ejercito_a)
+    ejercito_b = crear_participante(args.ejercito_b)
+    campo.colocar_ejercito(ejercito_a)
+    campo.colocar_ejercito(ejercito_b, desde_derecha=True)
+    if args.desde_turno:
+        campo.simular(ejercito_a, ejercito_b, turnos=args.desde_turno)
+
+    try:
+        resultado = predecir(
+            campo,
+            ejercito_a,
+            ejercito_b,
+            max_turnos=args.max_turnos,
+            semilla=args.semilla_simulaciones,
+            desempatar_iniciativa=not args.sin_desempate,
+            dispersion=args.dispersion,
+            confianza=args.confianza,
+            precision=args.precision,
+            min_simulaciones=args.min_simulaciones,
+            max_simulaciones=args.max_simulaciones,
+            lote=args.lote,
+            trabajadores=args.trabajadores,
+        )
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    turno = campo.obtener_estadisticas()["turno_actual"]
+    print(f"Turno {turno}: {resultado['simulaciones']} simulaciones en {resultado['tiempo']:.1f} s")
+    for clave, nombre in (("a", args.ejercito_a), ("b", args.ejercito_b)):
+        bajo, alto = resultado[f"intervalo_{clave}"]
+        print(f"{nombre}: {resultado[f'prob_{clave}']:.1%} [{bajo:.1%}, {alto:.1%}]")
+    print(f"Empates: {resultado['empates']} | turnos medios {resultado['turnos_medios']:.1f}")
+    if not resultado["convergida"]:
+        print("No se alcanzó la precisión pedida")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,359 @@
 """Generación y representación del terreno del juego."""
 
 import json
-import random
-import pygame
+from collections import deque
+
+import numpy as np
+
+try:  # pygame solo es necesario para dibujar el terreno
+    import pygame
+except ImportError:  # pragma: no cover - ejecución sin interfaz gráfica
+    pygame = None
 
 import constantes as const
+from cache_caminos import PRESUPUESTO_CACHE_CAMINOS, CacheCaminos
+from caminos_jerarquicos import GrafoJerarquico
+
+
+# Códigos enteros de cada tipo de tile. El índice en ``TIPOS_TILE`` es el
+# valor almacenado en :pyattr:`Terreno.codigos`.
+TIPOS_TILE = ("SUELO", "BOSQUE", "PARED", "AGUA", "PUENTE", "HUECO")
+CODIGOS_TILE = {nombre: codigo for codigo, nombre in enumerate(TIPOS_TILE)}
+SUELO, BOSQUE, PARED, AGUA, PUENTE, HUECO = range(len(TIPOS_TILE))
+
+# Bloques que no pueden ser atravesados por unidades ni por el jugador
+BLOQUES_NO_TRANSITABLES = ("PARED", "AGUA", "HUECO")
+# Indica por código de tile si bloquea el paso
+NO_TRANSITABLE = np.array([nombre in BLOQUES_NO_TRANSITABLES for nombre in TIPOS_TILE])
+
+# Capas de la generación; cada una recibe su propio flujo aleatorio
+CAPAS = ("bosque", "paredes", "rios", "puentes")
+
+# Desplazamientos ortogonales utilizados para ensanchar ríos y colocar puentes
+VECINOS = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)])
+
+
+# Color base y variación máxima por canal de cada tipo de tile
+_COLORES_BASE = {
+    "BOSQUE": (20, 100, 20),
+    "PARED": (40, 40, 110),
+    "AGUA": (20, 70, 160),
+    "PUENTE": (160, 100, 40),
+    "HUECO": (70, 20, 90),
+}
+_VARIACION_COLOR = np.array([0, 15, 20, 15, 15, 20])
+
+
+def etiquetar_componentes(libres):
+    """Etiqueta las componentes 4-conexas de ``libres``.
+
+    Une cada par de celdas libres vecinas mediante una unión-búsqueda
+    vectorizada: en cada pasada la raíz mayor de cada par se engancha a la
+    menor y después se comprimen los punteros saltando hasta las raíces.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array ``int32`` con la forma de ``libres``: 0 en las celdas
+        bloqueadas y de 1 a ``n`` en las libres.
+    """
+
+    alto, ancho = libres.shape
+    plano = libres.ravel()
+    indices = np.arange(plano.size)
+    padre = indices.copy()
+    horizontales = np.flatnonzero(libres[:, :-1] & libres[:, 1:])
+    horizontales += horizontales // (ancho - 1) if ancho > 1 else 0
+    verticales = np.flatnonzero(libres[:-1] & libres[1:])
+    a = np.concatenate([horizontales, verticales])
+    b = np.concatenate([horizontales + 1, verticales + ancho])
+    while True:
+        raiz_a = padre[a]
+        raiz_b = padre[b]
+        distintas = raiz_a != raiz_b
+        if not distintas.any():
+            break
+        a, b = a[distintas], b[distintas]
+        raiz_a, raiz_b = raiz_a[distintas], raiz_b[distintas]
+        padre[np.maximum(raiz_a, raiz_b)] = np.minimum(raiz_a, raiz_b)
+        while True:
+            saltos = padre[padre]
+            if np.array_equal(saltos, padre):
+                break
+            padre = saltos
+    raices = (padre == indices) & plano
+    etiquetas = np.cumsum(raices, dtype=np.int32)[padre] * plano
+    return etiquetas.reshape(alto, ancho).astype(np.int32)
+
+
+def flujos_capas(secuencia):
+    """Deriva de ``secuencia`` un generador independiente por capa del mapa.
+
+    Cada capa (ver ``CAPAS``) consume solo su propio flujo, de modo que
+    cambiar por ejemplo la densidad de paredes no altera los ríos generados
+    con la misma semilla.
+    """
+
+    hijas = secuencia.spawn(len(CAPAS))
+    return {capa: np.random.default_rng(hija) for capa, hija in zip(CAPAS, hijas)}
+
+
+def _caminata_acotada(inicio, pasos, maximo):
+    """Acumula ``pasos`` desde ``inicio`` manteniendo el valor en [0, maximo].
+
+    Equivale a sumar cada paso y recortar el resultado en cada iteración,
+    tal como hacían los bucles originales de generación de ríos. Cada
+    recorte depende del valor anterior, así que el recorrido es un bucle
+    secuencial; solo los pasos aleatorios se generan de una vez.
+    """
+
+    valores = np.empty(len(pasos) + 1, dtype=np.int64)
+    valor = int(inicio)
+    valores[0] = valor
+    for i, paso in enumerate(pasos.tolist(), 1):
+        valor = min(maximo, max(0, valor + paso))
+        valores[i] = valor
+    return valores
+
+
+class _FilaVista:
+    """Fila de una vista de compatibilidad indexable por columna."""
+
+    __slots__ = ("_vista", "_y")
+
+    def __init__(self, vista, y):
+        self._vista = vista
+        self._y = y
+
+    def __getitem__(self, x):
+        return self._vista._leer(x, self._y)
+
+    def __setitem__(self, x, valor):
+        self._vista._escribir(x, self._y, valor)
+
+    def __len__(self):
+        return self._vista._terreno.ancho_tiles
+
+    def __iter__(self):
+        return iter(self._vista._fila(self._y))
+
+
+class VistaCuadricula:
+    """Vista ``vista[y][x]`` sobre los arrays de un :class:`Terreno`.
+
+    Permite que el código que trabajaba con listas de listas siga leyendo y
+    modificando el terreno sin conocer su representación interna.
+    """
+
+    def __init__(self, terreno):
+        self._terreno = terreno
+
+    def __getitem__(self, y):
+        if not -len(self) <= y < len(self):
+            raise IndexError("Fila fuera del terreno")
+        return _FilaVista(self, y % len(self))
+
+    def __len__(self):
+        return self._terreno.alto_tiles
+
+    def __iter__(self):
+        return (self[y] for y in range(len(self)))
+
+    def _leer(self, x, y):  # pragma: no cover - interfaz
+        raise NotImplementedError
+
+    def _escribir(self, x, y, valor):  # pragma: no cover - interfaz
+        raise NotImplementedError
+
+    def _fila(self, y):  # pragma: no cover - interfaz
+        raise NotImplementedError
+
+
+class _VistaMapa(VistaCuadricula):
+    """Expone :pyattr:`Terreno.codigos` como nombres de bloque."""
+
+    def _leer(self, x, y):
+        return TIPOS_TILE[self._terreno.codigos[y, x]]
+
+    def _escribir(self, x, y, valor):
+        self._terreno.fijar_tile(x, y, valor)
+
+    def _fila(self, y):
+        return [TIPOS_TILE[c] for c in self._terreno.codigos[y].tolist()]
+
+
+class _VistaColisiones(VistaCuadricula):
+    """Expone :pyattr:`Terreno.mascara_colisiones` como booleanos."""
+
+    def _leer(self, x, y):
+        return bool(self._terreno.mascara_colisiones[y, x])
+
+    def _escribir(self, x, y, valor):
+        self._terreno.fijar_colision(x, y, valor)
+
+    def _fila(self, y):
+        return self._terreno.mascara_colisiones[y].tolist()
+
+
+def trazar_rio(rng, ancho, alto, orient):
+    """Devuelve las coordenadas ``(xs, ys)`` de un río sin puentes."""
+
+    if orient == "vertical":
+        n = alto
+        x = rng.integers(ancho)
+        xs = _caminata_acotada(x, rng.integers(-1, 2, n - 1), ancho - 1)
+        ys = np.arange(n)
+        # Ensanchamiento opcional a izquierda y derecha
+        izquierda, derecha = (rng.random((2, n)) < 0.3)
+        izquierda &= xs > 0
+        derecha &= xs < ancho - 1
+        return (
+            np.concatenate((xs, xs[izquierda] - 1, xs[derecha] + 1)),
+            np.concatenate((ys, ys[izquierda], ys[derecha])),
+        )
+
+    if orient == "horizontal":
+        n = ancho
+        y = rng.integers(alto)
+        ys = _caminata_acotada(y, rng.integers(-1, 2, n - 1), alto - 1)
+        xs = np.arange(n)
+        arriba, abajo = (rng.random((2, n)) < 0.3)
+        arriba &= ys > 0
+        abajo &= ys < alto - 1
+        return (
+            np.concatenate((xs, xs[arriba], xs[abajo])),
+            np.concatenate((ys, ys[arriba] - 1, ys[abajo] + 1)),
+        )
+
+    # diagonal
+    if rng.random() < 0.5:
+        x, dx_dir = 0, 1
+    else:
+        x, dx_dir = ancho - 1, -1
+    n = alto
+    desvios = dx_dir + rng.integers(-1, 2, n - 1)
+    xs = _caminata_acotada(x, desvios, ancho - 1)
+    ys = np.arange(n)
+    vx = xs[:, None] + VECINOS[:, 0]
+    vy = ys[:, None] + VECINOS[:, 1]
+    ensanchar = (
+        (0 <= vx)
+        & (vx < ancho)
+        & (0 <= vy)
+        & (vy < alto)
+        & (rng.random((n, len(VECINOS))) < 0.3)
+    )
+    return (
+        np.concatenate((xs, vx[ensanchar])),
+        np.concatenate((ys, vy[ensanchar])),
+    )
+
+
+class RenderizadoPorChunks:
+    """Dibujo del terreno en bloques pre-renderizados de ``TAM_CHUNK`` tiles.
+
+    Las clases que lo usan definen ``ancho_tiles``, ``alto_tiles``, el
+    diccionario de superficies ``_chunks``, ``_tam_renderizado`` y
+    ``_codigos_region(x0, y0, x1, y1)``.
+    """
+
+    def _colores_region(self, x0, y0, x1, y1):
+        """Devuelve los colores ``(alto, ancho, 3)`` de una región del mapa.
+
+        Cada bloque recibe una variación oscura de su color base que depende
+        solo de su posición y tipo, de modo que se mantiene estable entre
+        fotogramas y regeneraciones parciales.
+        """
+
+        codigos = self._codigos_region(x0, y0, x1, y1)
+        ys, xs = np.mgrid[y0:y1, x0:x1].astype(np.uint32)
+        mezcla = (
+            xs * np.uint32(73856093)
+            ^ ys * np.uint32(19349663)
+            ^ codigos.astype(np.uint32) * np.uint32(83492791)
+        )
+        mezcla = mezcla[..., None] ^ np.arange(3, dtype=np.uint32) * np.uint32(2654435761)
+        mezcla ^= mezcla >> np.uint32(13)
+        mezcla *= np.uint32(0x5BD1E995)
+        mezcla ^= mezcla >> np.uint32(15)
+
+        bases = np.array(
+            [const.COLOR_SUELO] + [_COLORES_BASE[nombre] for nombre in TIPOS_TILE[1:]]
+        )
+        amplitud = _VARIACION_COLOR[codigos][..., None]
+        ruido = mezcla % (2 * amplitud + 1) - amplitud
+        return np.clip(bases[codigos] + ruido, 0, 255).astype(np.uint8)
+
+    def _superficie_chunk(self, cx, cy):
+        """Devuelve, renderizándola si hace falta, la superficie de un chunk."""
 
+        superficie = self._chunks.get((cx, cy))
+        if superficie is None:
+            x0 = cx * const.TAM_CHUNK
+            y0 = cy * const.TAM_CHUNK
+            x1 = min(x0 + const.TAM_CHUNK, self.ancho_tiles)
+            y1 = min(y0 + const.TAM_CHUNK, self.alto_tiles)
+            colores = self._colores_region(x0, y0, x1, y1)
+            # Un píxel por tile escalado sin suavizado a TAM_CELDA
+            base = pygame.surfarray.make_surface(colores.swapaxes(0, 1))
+            superficie = pygame.transform.scale(
+                base, ((x1 - x0) * const.TAM_CELDA, (y1 - y0) * const.TAM_CELDA)
+            )
+            self._chunks[(cx, cy)] = superficie
+        return superficie
 
-def _clamp(valor, minimo=0, maximo=255):
-    """Mantiene un valor dentro del rango [minimo, maximo]."""
-    return max(minimo, min(maximo, valor))
+    def dibujar(self, surface, cam_x=0, cam_y=0):
+        """Dibuja los chunks del mapa que intersectan con ``surface``.
+
+        Los chunks se renderizan una sola vez y se reutilizan entre
+        fotogramas hasta que cambia alguno de sus tiles, se regenera el mapa
+        o se modifica ``TAM_CELDA``.
+        """
+
+        if self._tam_renderizado != const.TAM_CELDA:
+            self._chunks.clear()
+            self._tam_renderizado = const.TAM_CELDA
+        lado = const.TAM_CHUNK * const.TAM_CELDA
+        origen_x = cam_x
+        origen_y = const.ALTO_PANEL + cam_y
+        ancho, alto = surface.get_size()
+        chunks_x = -(-self.ancho_tiles // const.TAM_CHUNK)
+        chunks_y = -(-self.alto_tiles // const.TAM_CHUNK)
+        cx0 = max(0, -origen_x // lado)
+        cy0 = max(0, -origen_y // lado)
+        cx1 = min(chunks_x, (ancho - origen_x) // lado + 1)
+        cy1 = min(chunks_y, (alto - origen_y) // lado + 1)
+        for cy in range(cy0, cy1):
+            for cx in range(cx0, cx1):
+                surface.blit(
+                    self._superficie_chunk(cx, cy),
+                    (origen_x + cx * lado, origen_y + cy * lado),
+                )
+
+
+class Terreno(RenderizadoPorChunks):
+    """Mapa del mundo compuesto por diferentes tipos de tiles.
+
+    El estado se guarda en dos arrays de NumPy de forma ``(alto, ancho)``:
+    ``codigos`` con el código entero de cada tile (ver ``TIPOS_TILE``) y
+    ``mascara_colisiones`` con las celdas no transitables. Los atributos
+    ``mapa`` y ``colisiones`` ofrecen vistas ``[y][x]`` compatibles con las
+    antiguas listas de listas.
 
+    ``version`` aumenta cada vez que el mapa se regenera o se edita una
+    celda a través de :meth:`fijar_tile` o :meth:`fijar_colision`; los datos
+    derivados del mapa (grafo jerárquico, componentes y caché de caminos) se
+    descartan cuando cambia.
 
-class Terreno:
-    """Mapa del mundo compuesto por diferentes tipos de tiles."""
+    Parameters
+    ----------
+    max_rutas:
+        Número de caminos que :meth:`calcular_camino` conserva en ``rutas``
+        por cada ejército. Con 0 (por defecto) no se registra ninguno.
+    presupuesto_cache:
+        Memoria aproximada en bytes de la caché de caminos (ver
+        :class:`cache_caminos.CacheCaminos`).
+    """
 
     def __init__(
         self,
@@ -23,70 +363,123 @@ class Terreno:
         densidad_bosque=0.1,
         num_rios=1,
         semilla=None,
+        max_rutas=0,
+        presupuesto_cache=PRESUPUESTO_CACHE_CAMINOS,
     ):
         self.ancho_tiles = ancho_tiles
         self.alto_tiles = alto_tiles
         self.densidad = densidad
         self.densidad_bosque = densidad_bosque
         self.num_rios = num_rios
-        self.mapa = []
-        self.colisiones = []
-        # Diccionario de rutas calculadas por ejército
+        self.codigos = np.zeros((alto_tiles, ancho_tiles), dtype=np.uint8)
+        self.mascara_colisiones = np.zeros((alto_tiles, ancho_tiles), dtype=bool)
+        self.mapa = _VistaMapa(self)
+        self.colisiones = _VistaColisiones(self)
+        # Últimas rutas calculadas por ejército, solo si ``max_rutas`` > 0
+        self.max_rutas = max_rutas
         self.rutas = {}
-        if semilla is not None:
-            random.seed(semilla)
+        self.version = 0
+        self.cache_caminos = CacheCaminos(presupuesto_cache)
+        # Superficies pre-renderizadas por chunk ``(cx, cy)``
+        self._chunks = {}
+        self._tam_renderizado = None
+        # Grafo de HPA*, construido en la primera búsqueda jerárquica, y
+        # etiquetas de componentes conexas; ambos junto a la versión del mapa
+        # con la que se calcularon
+        self._jerarquia = (None, None)
+        self._componentes = (None, None)
+        self._componentes_transitables = (None, None)
+        # Secuencia de semillas propia: no depende del estado global de
+        # ``random`` y cada llamada a ``generar`` deriva de ella una hija
+        self._secuencia = np.random.SeedSequence(semilla)
+        self.semilla = self._secuencia.entropy
         self.generar()
 
     # ------------------------------------------------------------------
     # Generación del terreno
     # ------------------------------------------------------------------
-    def generar(self):
-        self.mapa = []
-        self.colisiones = [[False] * self.ancho_tiles for _ in range(self.alto_tiles)]
+    def generar(self, semilla=None):
+        """Genera un mapa nuevo.
+
+        Si se indica ``semilla`` la secuencia de la instancia se reinicia
+        con ella; en caso contrario continúa, por lo que dos llamadas
+        consecutivas producen mapas distintos. El resultado solo depende de
+        la semilla, del número de llamadas previas y de los parámetros del
+        mapa, nunca de otros generadores del proceso, así que pueden
+        generarse mapas en paralelo en hilos o procesos distintos.
+
+        La semilla usada, también cuando se eligió al azar, queda en
+        ``self.semilla``.
+        """
+
+        if semilla is not None:
+            self._secuencia = np.random.SeedSequence(semilla)
+            self.semilla = self._secuencia.entropy
+        (mapa,) = self._secuencia.spawn(1)
+        self._flujos = flujos_capas(mapa)
+        forma = (self.alto_tiles, self.ancho_tiles)
+        # SUELO y BOSQUE son transitables por defecto
+        self.codigos = np.where(
+            self._flujos["bosque"].random(forma) < self.densidad_bosque, BOSQUE, SUELO
+        ).astype(np.uint8)
+        self.mascara_colisiones = np.zeros(forma, dtype=bool)
         # Reinicia las rutas por ejército al regenerar el mapa
         self.rutas = {}
-        for y in range(self.alto_tiles):
-            fila = []
-            for x in range(self.ancho_tiles):
-                if random.random() < self.densidad_bosque:
-                    fila.append("BOSQUE")
-                else:
-                    fila.append("SUELO")
-                # SUELO y BOSQUE son transitables por defecto
-            self.mapa.append(fila)
+        self._chunks.clear()
+        self.version += 1
         self._generar_paredes()
         self._generar_rios()
 
     def _generar_paredes(self):
-        """Genera paredes conectadas en grupos."""
+        """Genera paredes conectadas en grupos.
+
+        Los trazos se generan por lotes: cada uno parte de una celda de
+        suelo, avanza en horizontal o vertical entre 2 y 6 celdas y se
+        detiene al encontrar un bloque distinto de suelo.
+        """
         total_celdas = self.ancho_tiles * self.alto_tiles
         objetivo = int(total_celdas * self.densidad)
+        if objetivo <= 0:
+            return
+        max_intentos = objetivo * 5
+        rng = self._flujos["paredes"]
+        pasos = np.arange(6)
+        plano_codigos = self.codigos.reshape(-1)
+        plano_colisiones = self.mascara_colisiones.reshape(-1)
+        primera = np.empty(total_celdas, dtype=np.int64)
         creadas = 0
         intentos = 0
-        max_intentos = objetivo * 5 if objetivo > 0 else total_celdas
         while creadas < objetivo and intentos < max_intentos:
-            intentos += 1
-            x = random.randrange(self.ancho_tiles)
-            y = random.randrange(self.alto_tiles)
-            if self.mapa[y][x] != "SUELO":
-                continue
-            dx, dy = random.choice([(1, 0), (0, 1)])
-            longitud = random.randint(2, 6)
-            for i in range(longitud):
-                nx = x + dx * i
-                ny = y + dy * i
-                if (
-                    0 <= nx < self.ancho_tiles
-                    and 0 <= ny < self.alto_tiles
-                    and self.mapa[ny][nx] == "SUELO"
-                ):
-                    self.mapa[ny][nx] = "PARED"
-                    self.colisiones[ny][nx] = True
-                    creadas += 1
-                    if creadas >= objetivo:
-                        break
-                else:
-                    break
+            # Un trazo aporta en promedio varias celdas
+            lote = min(max_intentos - intentos, (objetivo - creadas) // 3 + 1)
+            intentos += lote
+            xs = rng.integers(0, self.ancho_tiles, lote)
+            ys = rng.integers(0, self.alto_tiles, lote)
+            horizontal = rng.random(lote) < 0.5
+            longitudes = rng.integers(2, 7, lote)
+
+            cx = xs[:, None] + pasos * horizontal[:, None]
+            cy = ys[:, None] + pasos * ~horizontal[:, None]
+            validas = (
+                (cx < self.ancho_tiles)
+                & (cy < self.alto_tiles)
+                & (pasos < longitudes[:, None])
+            )
+            indices = np.minimum(cy, self.alto_tiles - 1) * self.ancho_tiles + np.minimum(
+                cx, self.ancho_tiles - 1
+            )
+            validas &= plano_codigos[indices] == SUELO
+            # Cada trazo se corta en la primera celda que no es suelo
+            validas = np.logical_and.accumulate(validas, axis=1)
+
+            # Conserva la primera aparición de cada celda en orden de trazo
+            candidatas = indices[validas]
+            orden = np.arange(len(candidatas))
+            primera[candidatas[::-1]] = orden[::-1]
+            nuevas = candidatas[primera[candidatas] == orden][: objetivo - creadas]
+            plano_codigos[nuevas] = PARED
+            plano_colisiones[nuevas] = True
+            creadas += len(nuevas)
 
     def _generar_rios(self):
         """Crea ríos con orientación vertical, horizontal o diagonal.
@@ -95,159 +488,198 @@ class Terreno:
         (celdas "PUENTE") para permitir el cruce del mismo.
         """
 
+        if self.ancho_tiles <= 0 or self.alto_tiles <= 0:
+            return
+        rng_rios = self._flujos["rios"]
+        rng_puentes = self._flujos["puentes"]
         direcciones = ["vertical", "horizontal", "diagonal"]
         for _ in range(self.num_rios):
-            orient = random.choice(direcciones)
-            coords = []  # Coordenadas del río actual
-
-            if orient == "vertical":
-                x = random.randrange(self.ancho_tiles)
-                y = 0
-                while y < self.alto_tiles:
-                    self.mapa[y][x] = "AGUA"
-                    self.colisiones[y][x] = True
-                    coords.append((x, y))
-                    if x > 0 and random.random() < 0.3:
-                        self.mapa[y][x - 1] = "AGUA"
-                        self.colisiones[y][x - 1] = True
-                        coords.append((x - 1, y))
-                    if x < self.ancho_tiles - 1 and random.random() < 0.3:
-                        self.mapa[y][x + 1] = "AGUA"
-                        self.colisiones[y][x + 1] = True
-                        coords.append((x + 1, y))
-                    x += random.choice([-1, 0, 1])
-                    x = max(0, min(self.ancho_tiles - 1, x))
-                    y += 1
-
-            elif orient == "horizontal":
-                y = random.randrange(self.alto_tiles)
-                x = 0
-                while x < self.ancho_tiles:
-                    self.mapa[y][x] = "AGUA"
-                    self.colisiones[y][x] = True
-                    coords.append((x, y))
-                    if y > 0 and random.random() < 0.3:
-                        self.mapa[y - 1][x] = "AGUA"
-                        self.colisiones[y - 1][x] = True
-                        coords.append((x, y - 1))
-                    if y < self.alto_tiles - 1 and random.random() < 0.3:
-                        self.mapa[y + 1][x] = "AGUA"
-                        self.colisiones[y + 1][x] = True
-                        coords.append((x, y + 1))
-                    y += random.choice([-1, 0, 1])
-                    y = max(0, min(self.alto_tiles - 1, y))
-                    x += 1
-
-            else:  # diagonal
-                if random.choice([True, False]):
-                    x = 0
-                    dx_dir = 1
-                else:
-                    x = self.ancho_tiles - 1
-                    dx_dir = -1
-                y = 0
-                while 0 <= x < self.ancho_tiles and y < self.alto_tiles:
-                    self.mapa[y][x] = "AGUA"
-                    self.colisiones[y][x] = True
-                    coords.append((x, y))
-                    for dx_off, dy_off in ((1, 0), (-1, 0), (0, 1), (0, -1)):
-                        nx, ny = x + dx_off, y + dy_off
-                        if (
-                            0 <= nx < self.ancho_tiles
-                            and 0 <= ny < self.alto_tiles
-                            and random.random() < 0.3
-                        ):
-                            self.mapa[ny][nx] = "AGUA"
-                            self.colisiones[ny][nx] = True
-                            coords.append((nx, ny))
-                    x += dx_dir + random.choice([-1, 0, 1])
-                    x = max(0, min(self.ancho_tiles - 1, x))
-                    y += 1
-
-            coords = list(set(coords))
-            if coords:
-                num_puentes = random.randint(2, 3)
-                for bx, by in random.sample(coords, min(num_puentes, len(coords))):
-                    self.mapa[by][bx] = "PUENTE"
-                    self.colisiones[by][bx] = False
-                    for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
-                        nx, ny = bx + dx, by + dy
-                        if (
-                            0 <= nx < self.ancho_tiles
-                            and 0 <= ny < self.alto_tiles
-                            and self.mapa[ny][nx] == "AGUA"
-                        ):
-                            self.mapa[ny][nx] = "PUENTE"
-                            self.colisiones[ny][nx] = False
+            orient = direcciones[rng_rios.integers(len(direcciones))]
+            xs, ys = trazar_rio(rng_rios, self.ancho_tiles, self.alto_tiles, orient)
+            self.codigos[ys, xs] = AGUA
+            self.mascara_colisiones[ys, xs] = True
+
+            # Coordenadas únicas del río actual
+            coords = np.unique(ys * self.ancho_tiles + xs)
+            num_puentes = int(rng_puentes.integers(2, 4))
+            elegidas = rng_puentes.choice(
+                coords, min(num_puentes, len(coords)), replace=False
+            )
+            by, bx = np.divmod(elegidas, self.ancho_tiles)
+            self.codigos[by, bx] = PUENTE
+            self.mascara_colisiones[by, bx] = False
+            vx = (bx[:, None] + VECINOS[:, 0]).ravel()
+            vy = (by[:, None] + VECINOS[:, 1]).ravel()
+            dentro = (0 <= vx) & (vx < self.ancho_tiles) & (0 <= vy) & (vy < self.alto_tiles)
+            vx, vy = vx[dentro], vy[dentro]
+            agua = self.codigos[vy, vx] == AGUA
+            self.codigos[vy[agua], vx[agua]] = PUENTE
+            self.mascara_colisiones[vy[agua], vx[agua]] = False
 
     # ------------------------------------------------------------------
-    # Representación
+    # Edición de celdas
     # ------------------------------------------------------------------
-    def _color_tile(self, bloque, x, y):
-        """Devuelve un color con variaciones oscuras para cada bloque."""
-        rnd = random.Random(x * 1000 + y * 100 + ord(bloque[0]))
-        if bloque == "SUELO":
-            return const.COLOR_SUELO
-        elif bloque == "PARED":
-            base = (40, 40, 110)
-            return tuple(_clamp(base[i] + rnd.randint(-20, 20)) for i in range(3))
-        elif bloque == "AGUA":
-            base = (20, 70, 160)
-            return tuple(_clamp(base[i] + rnd.randint(-15, 15)) for i in range(3))
-        elif bloque == "PUENTE":
-            base = (160, 100, 40)
-            return tuple(_clamp(base[i] + rnd.randint(-15, 15)) for i in range(3))
-        elif bloque == "BOSQUE":
-            base = (20, 100, 20)
-            return tuple(_clamp(base[i] + rnd.randint(-15, 15)) for i in range(3))
-        else:  # HUECO
-            base = (70, 20, 90)
-            return tuple(_clamp(base[i] + rnd.randint(-20, 20)) for i in range(3))
+    def fijar_tile(self, x, y, bloque, colision=None):
+        """Cambia el tipo de la celda ``(x, y)``.
 
-    def dibujar(self, surface, cam_x=0, cam_y=0):
-        for y, fila in enumerate(self.mapa):
-            for x, bloque in enumerate(fila):
-                pos = (
-                    x * const.TAM_CELDA + cam_x,
-                    const.ALTO_PANEL + y * const.TAM_CELDA + cam_y,
-                )
-                color = self._color_tile(bloque, x, y)
-                pygame.draw.rect(surface, color, (*pos, const.TAM_CELDA, const.TAM_CELDA))
+        Si no se indica ``colision`` se deduce del tipo de bloque.
+        """
+
+        if colision is None:
+            colision = bloque in BLOQUES_NO_TRANSITABLES
+        self.codigos[y, x] = CODIGOS_TILE[bloque]
+        self.mascara_colisiones[y, x] = colision
+        self._chunks.pop((x // const.TAM_CHUNK, y // const.TAM_CHUNK), None)
+        self.version += 1
+
+    def fijar_colision(self, x, y, valor):
+        """Marca la celda ``(x, y)`` como transitable o bloqueada."""
+
+        self.mascara_colisiones[y, x] = bool(valor)
+        self.version += 1
+
+    # ------------------------------------------------------------------
+    # Representación
+    # ------------------------------------------------------------------
+    def _codigos_region(self, x0, y0, x1, y1):
+        return self.codigos[y0:y1, x0:x1]
 
     # ------------------------------------------------------------------
     # Utilidades
     # ------------------------------------------------------------------
     def posicion_inicial(self):
         """Devuelve la primera celda de suelo disponible."""
-        for y, fila in enumerate(self.mapa):
-            for x, bloque in enumerate(fila):
-                if bloque == "SUELO":
-                    return x * const.TAM_CELDA, const.ALTO_PANEL + y * const.TAM_CELDA
+        suelo = (self.codigos == SUELO).ravel()
+        if suelo.any():
+            y, x = divmod(int(suelo.argmax()), self.ancho_tiles)
+            return x * const.TAM_CELDA, const.ALTO_PANEL + y * const.TAM_CELDA
         return 0, const.ALTO_PANEL
 
+    def es_transitable(self, x, y):
+        """Indica si el tipo de bloque de la celda permite ocuparla."""
+        if 0 <= x < self.ancho_tiles and 0 <= y < self.alto_tiles:
+            return not NO_TRANSITABLE[self.codigos[y, x]]
+        return False
+
+    def transitables(self):
+        """Devuelve un array booleano con las celdas que pueden ocuparse."""
+        return ~NO_TRANSITABLE[self.codigos]
+
     def es_colision(self, x, y):
         """Indica si la celda dada no es transitable."""
         if 0 <= x < self.ancho_tiles and 0 <= y < self.alto_tiles:
-            return self.colisiones[y][x]
+            return bool(self.mascara_colisiones[y, x])
         return True
 
-    def calcular_camino(self, origen, destino, ejercito=None):
+    @property
+    def componentes(self):
+        """Etiquetas de las regiones conectadas de celdas sin colisión.
+
+        Array ``int32`` de forma ``(alto, ancho)`` con 0 en las celdas
+        bloqueadas y el mismo número positivo en todas las celdas
+        alcanzables entre sí. Se calcula la primera vez que se consulta y se
+        conserva hasta que el mapa cambia.
+        """
+
+        version, etiquetas = self._componentes
+        if version != self.version:
+            etiquetas = etiquetar_componentes(~self.mascara_colisiones)
+            self._componentes = (self.version, etiquetas)
+        return etiquetas
+
+    def componente(self, x, y):
+        """Devuelve la etiqueta de la celda o 0 si está bloqueada o fuera."""
+        if 0 <= x < self.ancho_tiles and 0 <= y < self.alto_tiles:
+            return int(self.componentes[y, x])
+        return 0
+
+    @property
+    def componentes_transitables(self):
+        """Como :attr:`componentes`, pero según el tipo de bloque de cada celda.
+
+        Es la vista de las búsquedas del campo de batalla, que avanzan por
+        :meth:`es_transitable`; difiere de :attr:`componentes` cuando se
+        edita la máscara con :meth:`fijar_colision`.
+        """
+
+        version, etiquetas = self._componentes_transitables
+        if version != self.version:
+            etiquetas = etiquetar_componentes(self.transitables())
+            self._componentes_transitables = (self.version, etiquetas)
+        return etiquetas
+
+    def componente_transitable(self, x, y):
+        """Etiqueta de la celda en :attr:`componentes_transitables` (0 si no lo es)."""
+        if 0 <= x < self.ancho_tiles and 0 <= y < self.alto_tiles:
+            return int(self.componentes_transitables[y, x])
+        return 0
+
+    def componente_principal(self):
+        """Devuelve la etiqueta de la región conectada más grande (0 si no hay)."""
+        tamaños = np.bincount(self.componentes.ravel())
+        tamaños[0] = 0
+        return int(tamaños.argmax())
+
+    def conectadas(self, a, b):
+        """Indica si existe un camino entre las celdas ``a`` y ``b``."""
+        componente = self.componente(*a)
+        return componente != 0 and componente == self.componente(*b)
+
+    def calcular_camino(self, origen, destino, ejercito=None, jerarquico=False):
         """Calcula un camino entre dos puntos usando el algoritmo A*.
 
         ``origen`` y ``destino`` deben ser tuplas ``(x, y)`` en coordenadas
-        de tiles. Si se proporciona ``ejercito``, el camino se almacenará bajo
-        esa clave en ``self.rutas`` para poder consultarlo posteriormente por
-        cada ejército. Si no existe un camino válido, devuelve ``None``.
-        """
+        de tiles. Si ``max_rutas`` es positivo, el camino se registra en
+        ``self.rutas`` bajo la clave ``ejercito`` (o ``"global"``) para poder
+        consultarlo posteriormente por cada ejército. Si no existe un camino
+        válido, devuelve ``None``.
 
-        from heapq import heappop, heappush
+        Con ``jerarquico=True`` se usa HPA* (ver :mod:`caminos_jerarquicos`),
+        mucho más rápido en rutas largas sobre mapas grandes a cambio de
+        caminos que pueden ser ligeramente más largos que el óptimo.
+
+        Los caminos se guardan en ``cache_caminos`` y las consultas repetidas
+        se sirven desde ella mientras el mapa no cambie.
+        """
 
-        if self.es_colision(*origen) or self.es_colision(*destino):
+        # Celdas bloqueadas o en regiones distintas: no hay nada que buscar
+        if not self.conectadas(origen, destino):
             return None
+        clave_cache = (tuple(origen), tuple(destino), bool(jerarquico))
+        camino = self.cache_caminos.obtener(clave_cache, self.version)
+        if camino is None:
+            if jerarquico:
+                camino = self._grafo_jerarquico().buscar(origen, destino)
+            else:
+                camino = self._buscar_a_estrella(origen, destino)
+            if camino is None:
+                return None
+            self.cache_caminos.guardar(clave_cache, camino, self.version)
+        if self.max_rutas > 0:
+            clave = ejercito if ejercito is not None else "global"
+            if clave not in self.rutas:
+                self.rutas[clave] = deque(maxlen=self.max_rutas)
+            self.rutas[clave].append(camino)
+        return camino
+
+    def _grafo_jerarquico(self):
+        """Devuelve el grafo de HPA*, construyéndolo si el mapa cambió."""
+
+        version, grafo = self._jerarquia
+        if version != self.version:
+            grafo = GrafoJerarquico(self.mascara_colisiones)
+            self._jerarquia = (self.version, grafo)
+        return grafo
+
+    def _buscar_a_estrella(self, origen, destino):
+        """Búsqueda A* sin caché entre dos celdas de la misma región."""
+
+        from heapq import heappop, heappush
 
         def heuristica(a, b):
             return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
+        colisiones = self.mascara_colisiones
         abiertos = []
         heappush(abiertos, (0, origen))
         came_from = {}
@@ -261,8 +693,6 @@ class Terreno:
                     actual = came_from[actual]
                     camino.append(actual)
                 camino.reverse()
-                clave = ejercito if ejercito is not None else "global"
-                self.rutas.setdefault(clave, []).append(camino)
                 return camino
 
             x, y = actual
@@ -271,7 +701,7 @@ class Terreno:
                 if (
                     0 <= nx < self.ancho_tiles
                     and 0 <= ny < self.alto_tiles
-                    and not self.colisiones[ny][nx]
+                    and not colisiones[ny, nx]
                 ):
                     vecino = (nx, ny)
                     tentativo = g_score[actual] + 1
@@ -283,11 +713,37 @@ class Terreno:
 
         return None
 
+    @classmethod
+    def desde_arrays(cls, codigos, colisiones=None, **opciones):
+        """Crea un terreno con los tiles indicados en lugar de generarlo.
+
+        Parameters
+        ----------
+        codigos:
+            Array ``(alto, ancho)`` con el código de cada tile.
+        colisiones:
+            Máscara de celdas no transitables. Por defecto se deduce de los
+            tipos de bloque.
+        opciones:
+            Argumentos adicionales del constructor, como ``max_rutas``.
+        """
+
+        codigos = np.array(codigos, dtype=np.uint8)
+        alto, ancho = codigos.shape
+        terreno = cls(ancho, alto, densidad=0.0, densidad_bosque=0.0, num_rios=0, **opciones)
+        terreno.codigos = codigos
+        if colisiones is None:
+            terreno.mascara_colisiones = NO_TRANSITABLE[codigos]
+        else:
+            terreno.mascara_colisiones = np.array(colisiones, dtype=bool)
+        terreno.version += 1
+        return terreno
+
     def exportar_json(self, ruta):
         """Guarda el estado del terreno en un archivo JSON."""
         datos = {
-            "mapa": self.mapa,
-            "colisiones": self.colisiones,
+            "mapa": np.array(TIPOS_TILE)[self.codigos].tolist(),
+            "colisiones": self.mascara_colisiones.tolist(),
             "rutas": {
                 str(k): [[list(celda) for celda in ruta] for ruta in rutas]
                 for k, rutas in self.rutas.items()
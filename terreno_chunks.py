@@ -0,0 +1,394 @@
+"""Terreno dividido en chunks que se generan al consultarlos.
+
+:class:`TerrenoPorChunks` no reserva arrays del tamaño del mapa: cada chunk
+de ``TAM_CHUNK`` x ``TAM_CHUNK`` tiles se genera la primera vez que se lee
+a partir de la semilla del mapa y de sus coordenadas, y se descarta cuando
+lleva tiempo sin usarse. Volver a generarlo produce exactamente los mismos
+tiles, así que descartar un chunk no pierde información salvo que se haya
+editado; los chunks editados se conservan siempre.
+
+Para que el mapa no presente cortes en los bordes de los chunks:
+
+* Los trazos de pared parten de su chunk y pueden continuar hasta cinco
+  tiles en el chunk de la derecha o en el de abajo, que los reproduce
+  generando los trazos de sus vecinos.
+* Los ríos se trazan para el mapa completo al generarlo. Solo se guardan sus
+  coordenadas, cuyo tamaño crece con la longitud del río y no con el área,
+  ordenadas por chunk para localizar las de cada uno con una búsqueda
+  binaria.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+import constantes as const
+from terreno import (
+    AGUA,
+    BLOQUES_NO_TRANSITABLES,
+    BOSQUE,
+    CAPAS,
+    CODIGOS_TILE,
+    NO_TRANSITABLE,
+    PARED,
+    PUENTE,
+    SUELO,
+    TIPOS_TILE,
+    VECINOS,
+    RenderizadoPorChunks,
+    Terreno,
+    VistaCuadricula,
+    flujos_capas,
+    trazar_rio,
+)
+
+# Chunks sin editar que se mantienen en memoria como máximo
+MAX_CHUNKS = 64
+
+# Longitud media de los trazos de pared (entre 2 y 6 tiles)
+_LONGITUD_MEDIA_TRAZO = 4
+_PASOS_TRAZO = np.arange(6)
+
+
+class _VistaMapaChunks(VistaCuadricula):
+    """Expone los tiles de un :class:`TerrenoPorChunks` como nombres."""
+
+    def _leer(self, x, y):
+        return TIPOS_TILE[self._terreno.codigo(x, y)]
+
+    def _escribir(self, x, y, valor):
+        self._terreno.fijar_tile(x, y, valor)
+
+    def _fila(self, y):
+        codigos, _ = self._terreno.region(0, y, self._terreno.ancho_tiles, y + 1)
+        return [TIPOS_TILE[c] for c in codigos[0].tolist()]
+
+
+class _VistaColisionesChunks(VistaCuadricula):
+    """Expone las colisiones de un :class:`TerrenoPorChunks` como booleanos."""
+
+    def _leer(self, x, y):
+        return self._terreno.es_colision(x, y)
+
+    def _escribir(self, x, y, valor):
+        self._terreno.fijar_colision(x, y, valor)
+
+    def _fila(self, y):
+        _, colisiones = self._terreno.region(0, y, self._terreno.ancho_tiles, y + 1)
+        return colisiones[0].tolist()
+
+
+class TerrenoPorChunks(RenderizadoPorChunks):
+    """Mapa de gran tamaño generado por chunks bajo demanda.
+
+    Ofrece la misma interfaz de consulta celda a celda que :class:`Terreno`
+    (``mapa``, ``colisiones``, ``es_colision``, ``es_transitable``,
+    ``fijar_tile``, ``fijar_colision``, ``version`` y ``dibujar``), que es
+    la que usan ``Jugador`` y el bucle de dibujo de ``Juego``. Para librar
+    una batalla en una zona del mapa, :meth:`extraer` devuelve esa zona como
+    un :class:`Terreno` normal sobre el que crear un ``CampoBatalla``.
+
+    Los chunks generados no son idénticos a la región equivalente de un
+    :class:`Terreno` con la misma semilla: los trazos de pared pueden cubrir
+    bosque y solaparse entre sí.
+
+    Parameters
+    ----------
+    max_chunks:
+        Número de chunks sin editar que se conservan en memoria. Los menos
+        usados se descartan, junto con su superficie pre-renderizada.
+    """
+
+    def __init__(
+        self,
+        ancho_tiles,
+        alto_tiles,
+        densidad=0.1,
+        densidad_bosque=0.1,
+        num_rios=1,
+        semilla=None,
+        max_chunks=MAX_CHUNKS,
+    ):
+        if max_chunks < 1:
+            raise ValueError("max_chunks debe ser al menos 1")
+        self.ancho_tiles = ancho_tiles
+        self.alto_tiles = alto_tiles
+        self.densidad = densidad
+        self.densidad_bosque = densidad_bosque
+        self.num_rios = num_rios
+        self.max_chunks = max_chunks
+        self.mapa = _VistaMapaChunks(self)
+        self.colisiones = _VistaColisionesChunks(self)
+        self.version = 0
+        # Chunks generados ``(codigos, colisiones)`` en orden de uso y
+        # chunks editados, que no pueden regenerarse
+        self._bloques = OrderedDict()
+        self._editados = {}
+        # Número de chunks generados desde la creación del terreno
+        self.generados = 0
+        # Superficies pre-renderizadas por chunk ``(cx, cy)``
+        self._chunks = {}
+        self._tam_renderizado = None
+        self._secuencia = np.random.SeedSequence(semilla)
+        self.semilla = self._secuencia.entropy
+        self.generar()
+
+    # ------------------------------------------------------------------
+    # Generación
+    # ------------------------------------------------------------------
+    @property
+    def chunks_x(self):
+        return -(-self.ancho_tiles // const.TAM_CHUNK)
+
+    @property
+    def chunks_y(self):
+        return -(-self.alto_tiles // const.TAM_CHUNK)
+
+    @property
+    def chunks_cargados(self):
+        """Número de chunks presentes en memoria, editados incluidos."""
+        return len(self._bloques) + len(self._editados)
+
+    def generar(self, semilla=None):
+        """Descarta el mapa actual y prepara uno nuevo.
+
+        Igual que :meth:`Terreno.generar`, ``semilla`` reinicia la secuencia
+        de la instancia. Solo se trazan los ríos; los chunks se generan al
+        consultarlos.
+        """
+
+        if semilla is not None:
+            self._secuencia = np.random.SeedSequence(semilla)
+            self.semilla = self._secuencia.entropy
+        (self._secuencia_mapa,) = self._secuencia.spawn(1)
+        self._bloques.clear()
+        self._editados.clear()
+        self._chunks.clear()
+        self._trazar_rios()
+        self.version += 1
+
+    def _por_chunk(self, lineales):
+        """Ordena celdas lineales por chunk para buscarlas por su clave."""
+
+        ys, xs = np.divmod(lineales, self.ancho_tiles)
+        claves = (ys // const.TAM_CHUNK) * self.chunks_x + xs // const.TAM_CHUNK
+        orden = np.argsort(claves, kind="stable")
+        return claves[orden], lineales[orden]
+
+    def _trazar_rios(self):
+        """Traza los ríos y sus puentes como en :meth:`Terreno._generar_rios`."""
+
+        self._rios = []
+        if self.ancho_tiles <= 0 or self.alto_tiles <= 0:
+            return
+        flujos = flujos_capas(self._secuencia_mapa)
+        rng_rios, rng_puentes = flujos["rios"], flujos["puentes"]
+        ancho, alto = self.ancho_tiles, self.alto_tiles
+        direcciones = ["vertical", "horizontal", "diagonal"]
+        agua_total = np.empty(0, dtype=np.int64)
+        for _ in range(self.num_rios):
+            orient = direcciones[rng_rios.integers(len(direcciones))]
+            xs, ys = trazar_rio(rng_rios, ancho, alto, orient)
+            coords = np.unique(ys.astype(np.int64) * ancho + xs)
+            agua_total = np.union1d(agua_total, coords)
+
+            num_puentes = int(rng_puentes.integers(2, 4))
+            elegidas = rng_puentes.choice(coords, min(num_puentes, len(coords)), replace=False)
+            by, bx = np.divmod(elegidas, ancho)
+            vx = (bx[:, None] + VECINOS[:, 0]).ravel()
+            vy = (by[:, None] + VECINOS[:, 1]).ravel()
+            dentro = (0 <= vx) & (vx < ancho) & (0 <= vy) & (vy < alto)
+            vecinas = vy[dentro] * ancho + vx[dentro]
+            puentes = np.concatenate((elegidas, vecinas[np.isin(vecinas, agua_total)]))
+            self._rios.append((self._por_chunk(coords), self._por_chunk(puentes)))
+
+    def _limites(self, cx, cy):
+        x0 = cx * const.TAM_CHUNK
+        y0 = cy * const.TAM_CHUNK
+        return (
+            x0,
+            y0,
+            min(x0 + const.TAM_CHUNK, self.ancho_tiles),
+            min(y0 + const.TAM_CHUNK, self.alto_tiles),
+        )
+
+    def _rng_chunk(self, cx, cy, capa):
+        """Generador de una capa del chunk, derivado de la semilla del mapa."""
+
+        mapa = self._secuencia_mapa
+        clave = mapa.spawn_key + (cx, cy, CAPAS.index(capa))
+        return np.random.default_rng(np.random.SeedSequence(mapa.entropy, spawn_key=clave))
+
+    def _trazos(self, cx, cy):
+        """Celdas ``(xs, ys)`` de los trazos de pared que parten del chunk."""
+
+        x0, y0, x1, y1 = self._limites(cx, cy)
+        rng = self._rng_chunk(cx, cy, "paredes")
+        lote = rng.poisson(self.densidad * (x1 - x0) * (y1 - y0) / _LONGITUD_MEDIA_TRAZO)
+        xs = rng.integers(x0, x1, lote)
+        ys = rng.integers(y0, y1, lote)
+        horizontal = rng.random(lote) < 0.5
+        longitudes = rng.integers(2, 7, lote)
+        px = xs[:, None] + _PASOS_TRAZO * horizontal[:, None]
+        py = ys[:, None] + _PASOS_TRAZO * ~horizontal[:, None]
+        validas = (
+            (px < self.ancho_tiles)
+            & (py < self.alto_tiles)
+            & (_PASOS_TRAZO < longitudes[:, None])
+        )
+        return px[validas], py[validas]
+
+    def _generar_chunk(self, cx, cy):
+        x0, y0, x1, y1 = self._limites(cx, cy)
+        rng = self._rng_chunk(cx, cy, "bosque")
+        forma = (y1 - y0, x1 - x0)
+        codigos = np.where(rng.random(forma) < self.densidad_bosque, BOSQUE, SUELO).astype(
+            np.uint8
+        )
+
+        # Trazos propios y los que llegan desde el chunk izquierdo o superior
+        for ox, oy in ((cx, cy), (cx - 1, cy), (cx, cy - 1)):
+            if ox < 0 or oy < 0:
+                continue
+            px, py = self._trazos(ox, oy)
+            dentro = (x0 <= px) & (px < x1) & (y0 <= py) & (py < y1)
+            codigos[py[dentro] - y0, px[dentro] - x0] = PARED
+
+        clave = cy * self.chunks_x + cx
+        for agua, puentes in self._rios:
+            for (claves, lineales), codigo in ((agua, AGUA), (puentes, PUENTE)):
+                inicio, fin = np.searchsorted(claves, [clave, clave + 1])
+                ys, xs = np.divmod(lineales[inicio:fin], self.ancho_tiles)
+                codigos[ys - y0, xs - x0] = codigo
+        self.generados += 1
+        return codigos, NO_TRANSITABLE[codigos]
+
+    def _bloque(self, cx, cy):
+        """Devuelve ``(codigos, colisiones)`` del chunk, generándolo si falta."""
+
+        clave = (cx, cy)
+        bloque = self._editados.get(clave)
+        if bloque is not None:
+            return bloque
+        bloque = self._bloques.get(clave)
+        if bloque is not None:
+            self._bloques.move_to_end(clave)
+            return bloque
+        bloque = self._bloques[clave] = self._generar_chunk(cx, cy)
+        while len(self._bloques) > self.max_chunks:
+            descartado, _ = self._bloques.popitem(last=False)
+            self._chunks.pop(descartado, None)
+        return bloque
+
+    # ------------------------------------------------------------------
+    # Consulta y edición de celdas
+    # ------------------------------------------------------------------
+    def _dentro(self, x, y):
+        return 0 <= x < self.ancho_tiles and 0 <= y < self.alto_tiles
+
+    def _celda(self, x, y):
+        cx, cy = x // const.TAM_CHUNK, y // const.TAM_CHUNK
+        codigos, colisiones = self._bloque(cx, cy)
+        return codigos, colisiones, x - cx * const.TAM_CHUNK, y - cy * const.TAM_CHUNK
+
+    def codigo(self, x, y):
+        """Devuelve el código de tile de la celda ``(x, y)``."""
+        if not self._dentro(x, y):
+            raise IndexError("Celda fuera del terreno")
+        codigos, _, lx, ly = self._celda(x, y)
+        return int(codigos[ly, lx])
+
+    def es_colision(self, x, y):
+        """Indica si la celda dada no es transitable."""
+        if not self._dentro(x, y):
+            return True
+        _, colisiones, lx, ly = self._celda(x, y)
+        return bool(colisiones[ly, lx])
+
+    def es_transitable(self, x, y):
+        """Indica si el tipo de bloque de la celda permite ocuparla."""
+        if not self._dentro(x, y):
+            return False
+        codigos, _, lx, ly = self._celda(x, y)
+        return not NO_TRANSITABLE[codigos[ly, lx]]
+
+    def _editable(self, x, y):
+        """Fija el chunk de la celda en memoria para poder modificarlo."""
+
+        if not self._dentro(x, y):
+            raise IndexError("Celda fuera del terreno")
+        clave = (x // const.TAM_CHUNK, y // const.TAM_CHUNK)
+        if clave not in self._editados:
+            codigos, colisiones = self._bloque(*clave)
+            self._bloques.pop(clave, None)
+            self._editados[clave] = (codigos.copy(), colisiones.copy())
+        self._chunks.pop(clave, None)
+        self.version += 1
+        return self._celda(x, y)
+
+    def fijar_tile(self, x, y, bloque, colision=None):
+        """Cambia el tipo de la celda ``(x, y)``.
+
+        Si no se indica ``colision`` se deduce del tipo de bloque.
+        """
+
+        if colision is None:
+            colision = bloque in BLOQUES_NO_TRANSITABLES
+        codigos, colisiones, lx, ly = self._editable(x, y)
+        codigos[ly, lx] = CODIGOS_TILE[bloque]
+        colisiones[ly, lx] = colision
+
+    def fijar_colision(self, x, y, valor):
+        """Marca la celda ``(x, y)`` como transitable o bloqueada."""
+
+        _, colisiones, lx, ly = self._editable(x, y)
+        colisiones[ly, lx] = bool(valor)
+
+    def region(self, x0, y0, x1, y1):
+        """Copia los códigos y colisiones del rectángulo ``[x0, x1) x [y0, y1)``."""
+
+        if not (0 <= x0 <= x1 <= self.ancho_tiles and 0 <= y0 <= y1 <= self.alto_tiles):
+            raise ValueError("La región debe estar dentro del terreno")
+        codigos = np.empty((y1 - y0, x1 - x0), dtype=np.uint8)
+        colisiones = np.empty((y1 - y0, x1 - x0), dtype=bool)
+        tam = const.TAM_CHUNK
+        for cy in range(y0 // tam, -(-y1 // tam)):
+            for cx in range(x0 // tam, -(-x1 // tam)):
+                bloque_codigos, bloque_colisiones = self._bloque(cx, cy)
+                bx0, by0 = max(x0, cx * tam), max(y0, cy * tam)
+                bx1, by1 = min(x1, (cx + 1) * tam), min(y1, (cy + 1) * tam)
+                origen = (slice(by0 - cy * tam, by1 - cy * tam), slice(bx0 - cx * tam, bx1 - cx * tam))
+                destino = (slice(by0 - y0, by1 - y0), slice(bx0 - x0, bx1 - x0))
+                codigos[destino] = bloque_codigos[origen]
+                colisiones[destino] = bloque_colisiones[origen]
+        return codigos, colisiones
+
+    def extraer(self, x0, y0, ancho, alto):
+        """Devuelve la zona indicada como un :class:`Terreno` independiente."""
+
+        codigos, colisiones = self.region(x0, y0, x0 + ancho, y0 + alto)
+        return Terreno.desde_arrays(codigos, colisiones)
+
+    # ------------------------------------------------------------------
+    # Representación
+    # ------------------------------------------------------------------
+    def _codigos_region(self, x0, y0, x1, y1):
+        return self.region(x0, y0, x1, y1)[0]
+
+    def _superficie_chunk(self, cx, cy):
+        # Un chunk visible se usa en cada fotograma y no debe descartarse
+        self._bloque(cx, cy)
+        return super()._superficie_chunk(cx, cy)
+
+    def posicion_inicial(self):
+        """Devuelve la primera celda de suelo del primer chunk que la tenga."""
+        for cy in range(self.chunks_y):
+            for cx in range(self.chunks_x):
+                suelo = (self._bloque(cx, cy)[0] == SUELO).ravel()
+                if suelo.any():
+                    ancho = self._limites(cx, cy)[2] - cx * const.TAM_CHUNK
+                    ly, lx = divmod(int(suelo.argmax()), ancho)
+                    x = cx * const.TAM_CHUNK + lx
+                    y = cy * const.TAM_CHUNK + ly
+                    return x * const.TAM_CELDA, const.ALTO_PANEL + y * const.TAM_CELDA
+        return 0, const.ALTO_PANEL
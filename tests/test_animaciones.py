@@ -0,0 +1,42 @@
+import types
+import sys
+import pathlib
+
+sys.modules.setdefault("pygame", types.ModuleType("pygame"))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from animaciones import ReproductorAnimaciones
+
+
+def mover(unidad, origen, destino):
+    return {"tipo": "mover", "unidad": unidad, "origen": origen, "destino": destino}
+
+
+def test_turno_completo_se_anima_a_la_vez():
+    reproductor = ReproductorAnimaciones(velocidad=2, duracion=200)
+    a, b = object(), object()
+    reproductor.agregar_turno([mover(a, (0, 0), (1, 0)), mover(b, (5, 0), (4, 0))])
+    assert reproductor.activa and len(reproductor._actual) == 2
+
+    reproductor.actualizar(60)
+    assert reproductor._progreso == pytest.approx(0.6)
+    reproductor.actualizar(40)
+    assert not reproductor.activa
+
+
+def test_tandas_pendientes_se_fusionan():
+    reproductor = ReproductorAnimaciones(max_pendientes=1)
+    a = object()
+    for x in range(4):
+        reproductor.agregar_turno([mover(a, (x, 0), (x + 1, 0))])
+
+    # La primera tanda se reproduce y las otras tres quedan en una sola
+    assert reproductor.pendientes == 1
+    (fusionada,) = reproductor._pendientes[0]
+    assert fusionada["origen"] == (1, 0) and fusionada["destino"] == (4, 0)
+    assert reproductor.descartadas == 2
+
+    reproductor.actualizar(10_000)
+    assert not reproductor.activa
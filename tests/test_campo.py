@@ -69,3 +69,239 @@ def test_movimiento_evita_obstaculos():
 
     assert campo.posicion(u1) == (0, 1)
     assert campo.posicion(u2) == (2, 1)
+
+
+def test_movimiento_por_campo_de_flujo():
+    terreno = Terreno(3, 3, densidad=0.0, densidad_bosque=0.0, num_rios=0, semilla=1)
+    terreno.mapa[0][1] = "PARED"
+    campo = CampoBatalla(terreno, modo_movimiento="flujo")
+    ej_a = Ejercito()
+    ej_b = Ejercito()
+    u1 = Infanteria()
+    u2 = Infanteria()
+    ej_a.agregar_unidad(u1)
+    ej_b.agregar_unidad(u2)
+    campo.colocar_unidad(u1, 0, 0)
+    campo.colocar_unidad(u2, 2, 0)
+
+    acciones = campo.simular_turno(ej_a, ej_b)
+
+    assert [a["tipo"] for a in acciones] == ["mover", "mover"]
+    assert campo.posicion(u1) == (0, 1)
+    assert campo.posicion(u2) == (2, 1)
+
+
+def test_motor_vectorial_resuelve_fases_en_bloque():
+    campo, ej_a, ej_b, herido, enemigo = crear_campo_simple()
+    campo.motor = "vectorial"
+    acciones = campo.simular_turno(ej_a, ej_b)
+    tipos = [a["tipo"] for a in acciones]
+    assert tipos[:2] == ["curar", "atacar"]
+    assert herido.salud == 60
+    assert enemigo.salud == 93
+    assert campo.posicion(enemigo) == (4, 0)
+    estadisticas = campo.obtener_estadisticas()
+    assert estadisticas["curacion_total"] == 10
+    assert estadisticas["daño_total"] == 7
+
+
+def test_motor_vectorial_elimina_bajas():
+    terreno = Terreno(4, 1, densidad=0.0, densidad_bosque=0.0, num_rios=0, semilla=1)
+    campo = CampoBatalla(terreno, motor="vectorial")
+    ej_a = Ejercito()
+    ej_b = Ejercito()
+    atacante = Arqueria()
+    victima = Infanteria()
+    victima.salud = 5
+    ej_a.agregar_unidad(atacante)
+    ej_b.agregar_unidad(victima)
+    campo.colocar_unidad(atacante, 0, 0)
+    campo.colocar_unidad(victima, 3, 0)
+
+    campo.simular(ej_a, ej_b)
+
+    assert not victima.esta_viva()
+    assert ej_b.unidades == []
+    assert list(campo.unidades()) == [atacante]
+
+
+def test_motor_vectorial_respeta_cambios_del_terreno():
+    terreno = Terreno(20, 5, densidad=0.0, densidad_bosque=0.0, num_rios=0, semilla=1)
+    campo = CampoBatalla(terreno, "flujo", "vectorial")
+    ej_a = Ejercito()
+    ej_b = Ejercito()
+    infante = Infanteria()
+    enemigo = Infanteria()
+    ej_a.agregar_unidad(infante)
+    ej_b.agregar_unidad(enemigo)
+    campo.colocar_unidad(infante, 0, 2)
+    campo.colocar_unidad(enemigo, 19, 2)
+
+    campo.simular_turno(ej_a, ej_b)
+    assert campo.posicion(infante) == (1, 2)
+    # Una pared cierra el paso en mitad de la batalla
+    for y in range(5):
+        terreno.fijar_tile(2, y, "PARED")
+    for _ in range(3):
+        campo.simular_turno(ej_a, ej_b)
+        assert campo.posicion(infante)[0] < 2
+        motor = campo._motor_vectorial
+        i = motor.unidades.index(infante)
+        assert (int(motor.x[i]), int(motor.y[i])) == campo.posicion(infante)
+
+
+def test_colocar_ejercito_registra_bando():
+    terreno = Terreno(4, 2, densidad=0.0, densidad_bosque=0.0, num_rios=0, semilla=1)
+    campo = CampoBatalla(terreno)
+    ej_a = Ejercito()
+    ej_b = Ejercito()
+    unidades = [Infanteria(), Arqueria(), Infanteria()]
+    for unidad in unidades:
+        ej_a.agregar_unidad(unidad)
+    suelta = Infanteria()
+    ej_b.agregar_unidad(suelta)
+
+    campo.colocar_ejercito(ej_a)
+    campo.colocar_unidad(suelta, 3, 1)
+
+    assert all(campo.ejercito_de(u) is ej_a for u in unidades)
+    assert campo.ejercito_de(suelta) is None
+    campo.simular_turno(ej_a, ej_b)
+    assert campo.ejercito_de(suelta) is ej_b
+
+    ej_a.eliminar_unidad(unidades[1])
+    assert unidades[1] not in ej_a.unidades
+    assert ej_a.unidades == [unidades[0], unidades[2]]
+    assert ej_a.unidades[0] is unidades[0]
+    assert ej_a.unidades[-1] is unidades[2]
+    assert ej_a.unidades.primera() is unidades[0]
+    ej_a.eliminar_unidad(unidades[0])
+    assert ej_a.unidades[0] is unidades[2]
+    with pytest.raises(TypeError):
+        hash(ej_a.unidades)
+
+
+def test_colocar_ejercito_en_componente():
+    terreno = Terreno(5, 2, densidad=0.0, densidad_bosque=0.0, num_rios=0, semilla=1)
+    terreno.fijar_tile(1, 0, "PARED")
+    terreno.fijar_tile(1, 1, "PARED")
+    campo = CampoBatalla(terreno)
+    ejercito = Ejercito()
+    unidades = [Infanteria(), Infanteria()]
+    for unidad in unidades:
+        ejercito.agregar_unidad(unidad)
+
+    campo.colocar_ejercito(ejercito, componente=terreno.componente_principal())
+
+    assert [campo.posicion(u) for u in unidades] == [(2, 0), (2, 1)]
+    assert campo._buscar_camino((0, 0), (2, 0)) is None
+
+
+def test_buscar_camino_ignora_la_mascara_de_colisiones():
+    # El campo avanza por el tipo de bloque; la máscara no lo bloquea
+    terreno = Terreno(7, 3, densidad=0.0, densidad_bosque=0.0, num_rios=0, semilla=1)
+    for y in range(3):
+        terreno.fijar_colision(3, y, True)
+    campo = CampoBatalla(terreno)
+
+    assert not terreno.conectadas((0, 0), (6, 0))
+    camino = campo._buscar_camino((0, 0), (6, 0))
+    assert camino is not None and camino[-1] == (6, 0)
+
+
+def test_movimiento_incremental_reutiliza_el_plan():
+    terreno = Terreno(5, 3, densidad=0.0, densidad_bosque=0.0, num_rios=0, semilla=1)
+    terreno.fijar_tile(2, 0, "PARED")
+    terreno.fijar_tile(2, 1, "PARED")
+    campo = CampoBatalla(terreno, modo_movimiento="incremental")
+    ej_a = Ejercito()
+    ej_b = Ejercito()
+    u1 = Infanteria()
+    u2 = Infanteria()
+    ej_a.agregar_unidad(u1)
+    ej_b.agregar_unidad(u2)
+    campo.colocar_unidad(u1, 0, 0)
+    campo.colocar_unidad(u2, 4, 0)
+
+    campo.simular_turno(ej_a, ej_b)
+    plan = campo._planes[u1]
+    campo.simular_turno(ej_a, ej_b)
+    campo.simular_turno(ej_a, ej_b)
+
+    assert campo._planes[u1] is plan
+    assert campo.posicion(u1) == (1, 2)
+    assert campo.posicion(u2) == (3, 2)
+
+
+def test_instrumentacion_mide_fases_y_busquedas():
+    campo, ej_a, ej_b, _, _ = crear_campo_simple()
+    turnos = []
+    campo.activar_instrumentacion(trazador=turnos.append)
+    campo.simular_turno(ej_a, ej_b)
+    campo.simular_turno(ej_a, ej_b)
+
+    assert [t["turno"] for t in turnos] == [1, 2]
+    assert set(turnos[0]["fases"]) == {
+        "limpieza", "iniciativa", "curaciones", "ataques", "movimientos", "caminos", "registro"
+    }
+    assert 0 < sum(turnos[0]["fases"].values()) <= turnos[0]["tiempo"]
+    assert turnos[0]["unidades"] == 4
+    assert turnos[0]["acciones"] == 3
+    # El enemigo calcula su ruta en el primer turno y la reutiliza después
+    assert turnos[0]["cache_fallos"] >= 1 and turnos[0]["busquedas"] >= 1
+    assert turnos[0]["nodos_expandidos"] > 0
+    rendimiento = campo.obtener_estadisticas()["rendimiento"]
+    assert rendimiento["turnos"] == 2
+    assert rendimiento["busquedas"] == sum(t["busquedas"] for t in turnos)
+
+    campo.desactivar_instrumentacion()
+    campo.simular_turno(ej_a, ej_b)
+    assert len(turnos) == 2
+    assert "rendimiento" not in campo.obtener_estadisticas()
+
+
+def test_instrumentacion_detiene_el_perfil_si_el_turno_falla(monkeypatch):
+    campo, ej_a, ej_b, _, _ = crear_campo_simple()
+    instrumentacion = campo.activar_instrumentacion(perfilar=True)
+
+    def fallar(*args):
+        raise RuntimeError("fallo")
+
+    monkeypatch.setattr(campo, "resolver_ataques", fallar)
+    with pytest.raises(RuntimeError):
+        campo.simular_turno(ej_a, ej_b)
+    assert sys.getprofile() is None
+    assert instrumentacion.turnos == 0
+
+
+@pytest.mark.parametrize(
+    "modo, motor",
+    [("ruta", "objetos"), ("flujo", "objetos"), ("flujo", "vectorial"), ("incremental", "objetos")],
+)
+def test_restaurar_instantanea_repite_la_batalla(modo, motor):
+    from batalla.facciones import EjercitoDemonios, EjercitoMagia
+
+    terreno = Terreno(20, 20, densidad=0.05, densidad_bosque=0.0, num_rios=0, semilla=0)
+    campo = CampoBatalla(terreno, modo_movimiento=modo, motor=motor)
+    ej_a, ej_b = EjercitoDemonios(), EjercitoMagia()
+    campo.colocar_ejercito(ej_a)
+    campo.colocar_ejercito(ej_b, desde_derecha=True)
+    campo.simular(ej_a, ej_b, turnos=8)
+
+    instantanea = campo.instantanea()
+    assert instantanea.turno == 8
+    campo.simular(ej_a, ej_b, turnos=40)
+    final = campo.obtener_estadisticas()
+    replay = [[(a["tipo"], a["origen"], a.get("destino")) for a in t["acciones"]] for t in campo._replay]
+    supervivientes = [(u, u.salud, campo.posicion(u)) for u in campo.unidades()]
+
+    campo.restaurar(instantanea)
+    assert campo.obtener_estadisticas()["turno_actual"] == 8
+    assert len(campo._replay) == 8
+    campo.simular(ej_a, ej_b, turnos=40)
+
+    assert campo.obtener_estadisticas() == final
+    assert [
+        [(a["tipo"], a["origen"], a.get("destino")) for a in t["acciones"]] for t in campo._replay
+    ] == replay
+    assert [(u, u.salud, campo.posicion(u)) for u in campo.unidades()] == supervivientes
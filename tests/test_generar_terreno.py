@@ -0,0 +1,33 @@
+import types
+import sys
+import json
+import pathlib
+
+sys.modules.setdefault("pygame", types.ModuleType("pygame"))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+import numpy as np
+
+from generar_terreno import generar_lote, generar_tareas
+from terreno import Terreno
+
+
+def test_generar_lote_fragmentado_y_reproducible(tmp_path):
+    tareas = generar_tareas(range(3), [(12, 8), (10, 10)], [0.1], [0.1, 0.2], [1])
+    assert len(tareas) == 12
+    manifiesto = generar_lote(
+        tareas, tmp_path, por_fragmento=5, trabajadores=2, informar=lambda _: None
+    )
+
+    assert [f["mapas"] for f in manifiesto["fragmentos"]] == [5, 5, 2]
+    assert manifiesto["resumen"]["mapas"] == 12
+    assert json.loads((tmp_path / "manifiesto.json").read_text(encoding="utf-8")) == manifiesto
+
+    lineas = (tmp_path / "mapas-00002.jsonl").read_text(encoding="utf-8").splitlines()
+    registro = json.loads(lineas[-1])
+    assert registro["semilla"] == 2 and registro["num_rios"] == 1
+    codigos = np.array([[int(c) for c in fila] for fila in registro["mapa"]])
+    terreno = Terreno(10, 10, 0.1, 0.2, 1, semilla=2)
+    assert np.array_equal(codigos, terreno.codigos)
+    assert registro["fraccion_transitable"] == (~terreno.mascara_colisiones).mean()
+    assert registro["puentes"] >= 1
@@ -0,0 +1,41 @@
+import types
+import sys
+import pathlib
+import random
+
+sys.modules.setdefault("pygame", types.ModuleType("pygame"))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+from batalla.indice import IndiceEspacial
+from batalla.unidad import Infanteria
+
+
+def test_mas_cercano_coincide_con_busqueda_lineal():
+    rnd = random.Random(4)
+    indice = IndiceEspacial(tam_cubeta=4)
+    posiciones = {}
+    for _ in range(200):
+        unidad = Infanteria()
+        posiciones[unidad] = (rnd.randrange(60), rnd.randrange(60))
+        indice.insertar(unidad, *posiciones[unidad])
+    for unidad in list(posiciones)[:50]:
+        posiciones[unidad] = (rnd.randrange(60), rnd.randrange(60))
+        indice.mover(unidad, *posiciones[unidad])
+    for unidad in list(posiciones)[50:80]:
+        del posiciones[unidad]
+        indice.quitar(unidad)
+
+    for _ in range(100):
+        x, y = rnd.randrange(-5, 65), rnd.randrange(-5, 65)
+        radio = rnd.choice([None, 1, 3, 10])
+        distancias = [
+            abs(ux - x) + abs(uy - y)
+            for ux, uy in posiciones.values()
+            if radio is None or abs(ux - x) + abs(uy - y) <= radio
+        ]
+        encontrado = indice.mas_cercano(x, y, radio=radio)
+        if not distancias:
+            assert encontrado is None
+        else:
+            ex, ey = posiciones[encontrado]
+            assert abs(ex - x) + abs(ey - y) == min(distancias)
@@ -0,0 +1,71 @@
+import types
+import sys
+import pathlib
+
+sys.modules.setdefault("pygame", types.ModuleType("pygame"))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from terreno import Terreno
+from batalla.campo import CampoBatalla
+from prediccion import intervalo_wilson, predecir
+from torneo import crear_participante
+
+
+def _batalla(turnos=5):
+    campo = CampoBatalla(Terreno(16, 16, semilla=0))
+    ejercito_a = crear_participante("Demonios")
+    ejercito_b = crear_participante("Magia")
+    campo.colocar_ejercito(ejercito_a)
+    campo.colocar_ejercito(ejercito_b, desde_derecha=True)
+    campo.simular(ejercito_a, ejercito_b, turnos=turnos)
+    return campo, ejercito_a, ejercito_b
+
+
+def test_intervalo_wilson():
+    assert intervalo_wilson(0, 0) == (0.0, 1.0)
+    bajo, alto = intervalo_wilson(50, 100)
+    assert bajo == pytest.approx(0.4038, abs=1e-4)
+    assert alto == pytest.approx(0.5962, abs=1e-4)
+    assert intervalo_wilson(10, 10)[1] == 1.0
+    with pytest.raises(ValueError):
+        intervalo_wilson(1, 2, confianza=1.0)
+
+
+def test_predecir_no_modifica_el_campo_y_es_reproducible():
+    campo, ejercito_a, ejercito_b = _batalla()
+    antes = campo.instantanea().datos.copy()
+    opciones = {
+        "dispersion": 1,
+        "precision": 0.1,
+        "min_simulaciones": 8,
+        "max_simulaciones": 64,
+    }
+
+    r = predecir(campo, ejercito_a, ejercito_b, **opciones)
+    assert (campo.instantanea().datos == antes).all()
+    assert r["convergida"] and r["simulaciones"] < 64
+    assert r["victorias_a"] + r["victorias_b"] + r["empates"] == r["simulaciones"]
+    for clave in ("a", "b"):
+        bajo, alto = r[f"intervalo_{clave}"]
+        assert 0.0 <= bajo <= r[f"prob_{clave}"] <= alto <= 1.0
+
+    # El lote por defecto no depende del número de procesos
+    for trabajadores in (2, 4):
+        en_procesos = predecir(
+            campo, ejercito_a, ejercito_b, trabajadores=trabajadores, **opciones
+        )
+        for clave in ("simulaciones", "victorias_a", "victorias_b", "empates", "turnos_medios"):
+            assert en_procesos[clave] == r[clave]
+
+
+def test_predecir_se_detiene_al_alcanzar_la_precision():
+    campo, ejercito_a, ejercito_b = _batalla()
+    # Sin perturbaciones todas las simulaciones terminan igual
+    r = predecir(
+        campo, ejercito_a, ejercito_b, desempatar_iniciativa=False, precision=0.1, lote=5
+    )
+    assert r["convergida"]
+    assert r["simulaciones"] < 1000
+    assert max(r["prob_a"], r["prob_b"]) == 1.0
@@ -0,0 +1,49 @@
+import types
+import sys
+import pathlib
+
+sys.modules.setdefault("pygame", types.ModuleType("pygame"))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+from batalla.replanificador import PlanIncremental, INF
+
+
+def test_plan_se_repara_al_ocupar_y_liberar_celdas():
+    transitables = [[True] * 5 for _ in range(3)]
+    ocupacion = [[None] * 5 for _ in range(3)]
+    ocupacion[1][0] = "unidad"
+    ocupacion[1][4] = "objetivo"
+    plan = PlanIncremental(transitables, ocupacion, (0, 1), (4, 1))
+    assert plan.distancia() == 4
+
+    # Un muro de unidades obliga a rodear y después cierra el paso
+    ocupacion[1][2] = ocupacion[0][2] = "otra"
+    plan.celdas_cambiadas([(2, 1), (2, 0)])
+    assert plan.distancia() == 6
+    assert plan.siguiente_paso() in ((1, 1), (0, 2))
+    ocupacion[2][2] = "otra"
+    plan.celdas_cambiadas([(2, 2)])
+    assert plan.distancia() == INF
+    assert plan.siguiente_paso() is None
+
+    ocupacion[1][2] = None
+    plan.celdas_cambiadas([(2, 1)])
+    assert plan.camino() == [(0, 1), (1, 1), (2, 1), (3, 1), (4, 1)]
+
+    # El objetivo se desplaza una casilla
+    ocupacion[1][4] = None
+    ocupacion[2][4] = "objetivo"
+    plan.mover_objetivo((4, 2))
+    assert plan.distancia() == 5
+
+
+def test_radio_de_ocupacion_ignora_unidades_lejanas():
+    transitables = [[True] * 6]
+    ocupacion = [["unidad", None, None, None, "otra", "objetivo"]]
+    plan = PlanIncremental(transitables, ocupacion, (0, 0), (5, 0), radio_ocupacion=2)
+    assert plan.siguiente_paso() == (1, 0)
+
+    ocupacion[0][0], ocupacion[0][2] = None, "unidad"
+    plan.mover_inicio((2, 0))
+    plan.celdas_cambiadas([(0, 0), (2, 0)])
+    assert plan.distancia() == INF
@@ -0,0 +1,65 @@
+import types
+import sys
+import pathlib
+import io
+import json
+
+import pytest
+
+sys.modules.setdefault("pygame", types.ModuleType("pygame"))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+from batalla.replay import leer_replay_jsonl
+from batalla.replay_binario import (
+    EscritorReplayBinario,
+    LectorReplayBinario,
+    convertir_replay_json,
+)
+from test_campo import crear_campo_simple
+
+
+def test_transmitir_replay_jsonl():
+    campo, ej_a, ej_b, herido, enemigo = crear_campo_simple()
+    flujo = io.StringIO()
+    campo.transmitir_replay(flujo, intervalo_volcado=2)
+    devueltas = [campo.simular_turno(ej_a, ej_b) for _ in range(3)]
+    campo.cerrar_replay()
+
+    assert campo._replay == []
+    flujo.seek(0)
+    turnos = list(leer_replay_jsonl(flujo))
+    assert [t["turno"] for t in turnos] == [1, 2, 3]
+    for turno, acciones in zip(turnos, devueltas):
+        assert [a["tipo"] for a in turno["acciones"]] == [a["tipo"] for a in acciones]
+    primera = turnos[0]["acciones"][0]
+    assert primera["unidad"]["tipo"] == "Soporte"
+    assert primera["destino"] == [1, 0]
+
+
+def test_replay_binario_acceso_directo(tmp_path):
+    campo, ej_a, ej_b, herido, enemigo = crear_campo_simple()
+    campo.simular(ej_a, ej_b, turnos=4)
+    ruta_json = tmp_path / "replay.json"
+    campo.exportar_replay(str(ruta_json))
+    campo.exportar_replay_binario(str(tmp_path / "replay.bin"))
+    convertir_replay_json(ruta_json, tmp_path / "convertido.bin")
+
+    esperado = json.loads(ruta_json.read_text(encoding="utf-8"))
+    for nombre in ("replay.bin", "convertido.bin"):
+        with LectorReplayBinario(tmp_path / nombre) as lector:
+            assert len(lector) == len(esperado)
+            assert lector.turno(3) == esperado[2]
+            assert list(lector) == esperado
+
+
+def test_replay_binario_rechaza_datos_invalidos(tmp_path):
+    ruta = tmp_path / "otro.bin"
+    ruta.write_bytes(b"XXXX" + bytes(40))
+    with pytest.raises(ValueError):
+        LectorReplayBinario(ruta)
+
+    unidad = {"id": "1", "tipo": "Infanteria"}
+    accion = {"tipo": "mover", "unidad": unidad, "origen": [70000, 0], "destino": [70001, 0]}
+    with EscritorReplayBinario(io.BytesIO()) as escritor:
+        with pytest.raises(ValueError):
+            escritor.escribir_turno(1, [accion])
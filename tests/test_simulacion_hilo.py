@@ -0,0 +1,111 @@
+import types
+import sys
+import pathlib
+import time
+
+sys.modules.setdefault("pygame", types.ModuleType("pygame"))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+from batalla.campo import CampoBatalla
+from batalla.facciones import EjercitoDemonios, EjercitoMagia
+from batalla.simulacion_hilo import SimulacionEnHilo
+from terreno import Terreno
+
+
+def crear_batalla():
+    terreno = Terreno(12, 12, densidad=0.0, densidad_bosque=0.0, num_rios=0, semilla=3)
+    campo = CampoBatalla(terreno)
+    ejercito_a, ejercito_b = EjercitoDemonios(), EjercitoMagia()
+    campo.colocar_ejercito(ejercito_a)
+    campo.colocar_ejercito(ejercito_b, desde_derecha=True)
+    return campo, ejercito_a, ejercito_b
+
+
+def esperar_turno(simulacion, limite=10.0):
+    fin = time.monotonic() + limite
+    while time.monotonic() < fin:
+        turno = simulacion.siguiente_turno()
+        if turno is not None:
+            return turno
+        time.sleep(0.001)
+    raise AssertionError("La simulación no entregó ningún turno")
+
+
+def resumen(acciones):
+    return [(a["tipo"], a.get("origen"), a.get("destino")) for a in acciones]
+
+
+def test_turnos_en_hilo_coinciden_con_la_simulacion_directa():
+    campo, ej_a, ej_b = crear_batalla()
+    esperados = []
+    for _ in range(60):
+        esperados.append(resumen(campo.simular_turno(ej_a, ej_b)))
+        if not ej_a.unidades or not ej_b.unidades:
+            break
+
+    campo, ej_a, ej_b = crear_batalla()
+    simulacion = SimulacionEnHilo(campo, ej_a, ej_b, max_turnos_en_cola=1)
+    simulacion.iniciar()
+    recibidos = []
+    for _ in esperados:
+        turno = esperar_turno(simulacion)
+        recibidos.append(resumen(turno["acciones"]))
+        if turno["fin"]:
+            break
+    simulacion.detener(espera=5)
+
+    assert recibidos == esperados
+    assert turno["fin"] == (len(esperados) < 60)
+    assert {bando for *_, bando in turno["unidades"]} <= {0, 1}
+    assert not simulacion.activa
+
+
+def test_pausa_y_avance_de_un_turno():
+    campo, ej_a, ej_b = crear_batalla()
+    simulacion = SimulacionEnHilo(campo, ej_a, ej_b, pausada=True)
+    simulacion.iniciar()
+    time.sleep(0.05)
+    assert simulacion.siguiente_turno() is None
+
+    simulacion.avanzar()
+    assert esperar_turno(simulacion)["turno"] == 1
+    time.sleep(0.05)
+    assert simulacion.siguiente_turno() is None
+
+    simulacion.detener(espera=5)
+    assert not simulacion.activa
+
+
+def test_entregas_agrupadas_conservan_el_registro():
+    campo, ej_a, ej_b = crear_batalla()
+    campo.simular(ej_a, ej_b, turnos=500)
+    esperado = [(t["turno"], resumen(t["acciones"])) for t in campo._replay]
+
+    campo, ej_a, ej_b = crear_batalla()
+    simulacion = SimulacionEnHilo(campo, ej_a, ej_b, turnos_por_entrega=5)
+    simulacion.iniciar()
+    primera = esperar_turno(simulacion)
+    simulacion.fijar_turnos_por_entrega(None)
+    entregas = [primera]
+    while not entregas[-1]["fin"]:
+        entregas.append(esperar_turno(simulacion))
+    simulacion.detener(espera=5)
+
+    assert primera["turnos"] == 5
+    assert sum(e["turnos"] for e in entregas) == len(esperado)
+    assert [(t["turno"], resumen(t["acciones"])) for t in campo._replay] == esperado
+
+
+def test_instantanea_copia_los_datos_del_tooltip():
+    campo, ej_a, ej_b = crear_batalla()
+    simulacion = SimulacionEnHilo(campo, ej_a, ej_b)
+    estado = simulacion.estado_unidades()
+    registro = estado[0]
+    unidad = registro.unidad
+    copia = (registro.salud, registro.ataque, registro.defensa, registro.velocidad, registro.alcance)
+    assert copia == (unidad.salud, unidad.ataque, unidad.defensa, unidad.velocidad, unidad.alcance)
+
+    # Los cambios posteriores de la unidad viva no alteran la instantánea
+    unidad.salud -= 1
+    unidad.ataque += 5
+    assert (registro.salud, registro.ataque) == copia[:2]
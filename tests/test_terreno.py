@@ -0,0 +1,127 @@
+import types
+import sys
+import pathlib
+
+sys.modules.setdefault("pygame", types.ModuleType("pygame"))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+import numpy as np
+
+from terreno import Terreno, CODIGOS_TILE
+
+
+def test_generacion_reproducible_con_semilla():
+    t1 = Terreno(40, 30, densidad=0.2, densidad_bosque=0.2, num_rios=2, semilla=7)
+    t2 = Terreno(40, 30, densidad=0.2, densidad_bosque=0.2, num_rios=2, semilla=7)
+    assert np.array_equal(t1.codigos, t2.codigos)
+    assert np.array_equal(t1.mascara_colisiones, t2.mascara_colisiones)
+
+
+def test_vistas_de_compatibilidad_escriben_en_los_arrays():
+    terreno = Terreno(4, 3, densidad=0.0, densidad_bosque=0.0, num_rios=0, semilla=1)
+    assert terreno.mapa[2][3] == "SUELO"
+    terreno.mapa[2][3] = "AGUA"
+    assert terreno.codigos[2, 3] == CODIGOS_TILE["AGUA"]
+    assert terreno.colisiones[2][3] is True
+    terreno.colisiones[2][3] = False
+    assert not terreno.es_colision(3, 2)
+    assert [list(fila) for fila in terreno.colisiones][0] == [False] * 4
+
+
+def test_editar_tile_invalida_solo_su_chunk():
+    terreno = Terreno(80, 40, densidad=0.0, densidad_bosque=0.5, num_rios=0, semilla=3)
+    centinela = object()
+    terreno._chunks = {(0, 0): centinela, (1, 0): centinela}
+    terreno.fijar_tile(33, 2, "PARED")
+    assert (1, 0) not in terreno._chunks
+    assert terreno._chunks[(0, 0)] is centinela
+    colores = terreno._colores_region(0, 0, 80, 40)
+    assert colores.shape == (40, 80, 3)
+    assert np.array_equal(colores, terreno._colores_region(0, 0, 80, 40))
+
+
+def test_camino_jerarquico_valido_y_actualizado():
+    terreno = Terreno(64, 48, densidad=0.1, densidad_bosque=0.1, num_rios=1, semilla=3)
+    libres = np.argwhere(~terreno.mascara_colisiones)
+    origen = tuple(int(v) for v in libres[0][::-1])
+    destino = tuple(int(v) for v in libres[-1][::-1])
+
+    exacto = terreno.calcular_camino(origen, destino)
+    camino = terreno.calcular_camino(origen, destino, jerarquico=True)
+    assert camino[0] == origen and camino[-1] == destino
+    assert all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 for a, b in zip(camino, camino[1:]))
+    assert not any(terreno.es_colision(x, y) for x, y in camino)
+    assert len(exacto) <= len(camino) <= len(exacto) * 1.2
+
+    # Aislar el destino invalida el grafo abstracto
+    x, y = destino
+    for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+        if 0 <= nx < 64 and 0 <= ny < 48:
+            terreno.fijar_tile(nx, ny, "PARED")
+    assert terreno.calcular_camino(origen, destino, jerarquico=True) is None
+
+
+def test_componentes_separan_regiones_desconectadas():
+    terreno = Terreno(7, 3, densidad=0.0, densidad_bosque=0.0, num_rios=0, semilla=1)
+    for y in range(3):
+        terreno.fijar_tile(2, y, "AGUA")
+    assert terreno.componente(0, 0) == 1
+    assert terreno.componente(2, 1) == 0
+    assert terreno.componente(6, 2) == 2
+    assert terreno.componente_principal() == 2
+    assert terreno.calcular_camino((0, 0), (6, 2)) is None
+    assert terreno.calcular_camino((0, 0), (6, 2), jerarquico=True) is None
+
+    terreno.fijar_tile(2, 1, "PUENTE")
+    assert terreno.conectadas((0, 0), (6, 2))
+    assert len(terreno.calcular_camino((0, 0), (6, 2))) == 9
+
+
+def test_cache_de_caminos_respeta_version_y_presupuesto():
+    terreno = Terreno(8, 3, densidad=0.0, densidad_bosque=0.0, num_rios=0, semilla=1)
+    cache = terreno.cache_caminos
+    camino = terreno.calcular_camino((0, 0), (7, 0))
+    assert terreno.calcular_camino((0, 0), (7, 0)) == camino
+    assert (cache.aciertos, cache.fallos) == (1, 1)
+    # Sin ``max_rutas`` no se registra ninguna ruta
+    assert terreno.rutas == {}
+
+    # Editar una celda invalida los caminos guardados
+    terreno.fijar_tile(3, 0, "PARED")
+    desvio = terreno.calcular_camino((0, 0), (7, 0))
+    assert (3, 0) not in desvio and len(desvio) == 10
+    assert cache.fallos == 2
+
+    # Con presupuesto para un solo camino se expulsa el menos usado
+    cache.presupuesto = cache.memoria + 1
+    terreno.calcular_camino((0, 2), (7, 2))
+    assert len(cache) == 1 and ((0, 2), (7, 2), False) in cache
+
+
+def test_rutas_registradas_acotadas():
+    terreno = Terreno(5, 1, densidad=0.0, densidad_bosque=0.0, num_rios=0, semilla=1, max_rutas=2)
+    for destino in range(1, 5):
+        terreno.calcular_camino((0, 0), (destino, 0), "A")
+    assert [len(ruta) for ruta in terreno.rutas["A"]] == [4, 5]
+
+
+def test_generacion_en_hilos_reproducible_y_capas_independientes():
+    from concurrent.futures import ThreadPoolExecutor
+
+    def generar(semilla):
+        return Terreno(50, 40, densidad=0.2, densidad_bosque=0.2, num_rios=2, semilla=semilla).codigos
+
+    with ThreadPoolExecutor(4) as pool:
+        paralelos = list(pool.map(generar, [1, 2, 3, 4] * 2))
+    for semilla, codigos in zip([1, 2, 3, 4] * 2, paralelos):
+        assert np.array_equal(codigos, generar(semilla))
+
+    # Sin paredes ni bosque, los ríos son los mismos que con ellos
+    con_paredes = Terreno(50, 40, densidad=0.2, densidad_bosque=0.2, num_rios=2, semilla=9)
+    sin_paredes = Terreno(50, 40, densidad=0.0, densidad_bosque=0.0, num_rios=2, semilla=9)
+    agua = sin_paredes.codigos == CODIGOS_TILE["AGUA"]
+    assert np.array_equal(con_paredes.codigos[agua], sin_paredes.codigos[agua])
+
+    azar = Terreno(20, 20)
+    repetido = Terreno(20, 20, semilla=azar.semilla)
+    assert np.array_equal(azar.codigos, repetido.codigos)
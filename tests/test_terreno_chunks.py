@@ -0,0 +1,39 @@
+import types
+import sys
+import pathlib
+
+sys.modules.setdefault("pygame", types.ModuleType("pygame"))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+import numpy as np
+
+from batalla.campo import CampoBatalla
+from terreno import CODIGOS_TILE
+from terreno_chunks import TerrenoPorChunks
+
+
+def test_chunks_descartados_se_regeneran_iguales():
+    grande = TerrenoPorChunks(200, 150, densidad=0.2, num_rios=2, semilla=5)
+    pequeño = TerrenoPorChunks(200, 150, densidad=0.2, num_rios=2, semilla=5, max_chunks=2)
+    codigos, colisiones = grande.region(0, 0, 200, 150)
+    # Recorrer el mapa con dos chunks en memoria obliga a regenerarlos
+    assert np.array_equal(pequeño.region(0, 0, 200, 150)[0], codigos)
+    assert np.array_equal(pequeño.region(0, 0, 200, 150)[0], codigos)
+    assert pequeño.chunks_cargados == 2
+    assert pequeño.generados > grande.generados
+    assert (codigos == CODIGOS_TILE["AGUA"]).any() and (codigos == CODIGOS_TILE["PARED"]).any()
+    assert pequeño.colisiones[7][3] == bool(colisiones[7, 3])
+
+
+def test_ediciones_sobreviven_al_descarte_y_extraer_zona():
+    terreno = TerrenoPorChunks(100, 100, densidad=0.0, num_rios=0, semilla=1, max_chunks=1)
+    version = terreno.version
+    terreno.fijar_tile(1, 1, "PARED")
+    terreno.region(64, 64, 100, 100)
+    assert terreno.mapa[1][1] == "PARED" and terreno.es_colision(1, 1)
+    assert terreno.version > version
+
+    zona = terreno.extraer(0, 0, 3, 3)
+    assert zona.mapa[1][1] == "PARED" and zona.es_colision(1, 1)
+    campo = CampoBatalla(zona)
+    assert not campo.es_transitable(1, 1)
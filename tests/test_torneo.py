@@ -0,0 +1,30 @@
+import types
+import sys
+import pathlib
+
+sys.modules.setdefault("pygame", types.ModuleType("pygame"))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+from torneo import generar_tareas, jugar_batalla, resumir
+
+
+def test_jugar_batalla_y_resumir():
+    resultados = [
+        jugar_batalla("Demonios", "Magia", semilla, ancho=12, alto=12, max_turnos=60)
+        for semilla in range(2)
+    ]
+    for r in resultados:
+        assert r["ganador"] in (None, "Demonios", "Magia")
+        assert r["daño"]["Demonios"] + r["daño"]["Magia"] == r["daño_total"]
+
+    resumen = resumir(resultados)
+    datos = resumen["emparejamientos"]["Demonios vs Magia"]
+    assert datos["batallas"] == 2
+    assert resumen["participantes"]["Magia"]["batallas"] == 2
+
+
+def test_generar_tareas_alterna_bandos():
+    tareas = generar_tareas(["A", "B", "C"], 2, 10, {})
+    assert len(tareas) == 6
+    assert tareas[0][0] == ("A", "B", 10)
+    assert tareas[1][0] == ("B", "A", 11)
@@ -0,0 +1,237 @@
+"""Torneo de batallas sin interfaz gráfica entre facciones y ejércitos.
+
+Cada participante se enfrenta a todos los demás en ``N`` batallas con
+semillas consecutivas. Las batallas se reparten entre los núcleos del equipo
+mediante un conjunto de procesos y al final se muestra un resumen con las
+tasas de victoria, la duración media y el daño infligido.
+
+Ejemplo::
+
+    python torneo.py -n 50 --ejercitos mi_ejercito.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from terreno import Terreno
+from batalla.campo import CampoBatalla, MODOS_MOVIMIENTO
+from batalla.carga import leer_ejercito
+from batalla.facciones import EjercitoMagia, EjercitoAngeles, EjercitoDemonios
+
+FACCIONES = {
+    "Magia": EjercitoMagia,
+    "Ángeles": EjercitoAngeles,
+    "Demonios": EjercitoDemonios,
+}
+
+
+def crear_participante(nombre: str):
+    """Crea el ejército de una facción predefinida o de un archivo JSON."""
+
+    if nombre in FACCIONES:
+        return FACCIONES[nombre]()
+    return leer_ejercito(nombre)
+
+
+def jugar_batalla(
+    participante_a: str,
+    participante_b: str,
+    semilla: int,
+    ancho: int = 30,
+    alto: int = 30,
+    densidad: float = 0.1,
+    densidad_bosque: float = 0.1,
+    num_rios: int = 1,
+    max_turnos: int = 300,
+    modo_movimiento: str = "ruta",
+) -> dict:
+    """Juega una batalla completa y devuelve un resumen serializable.
+
+    El ejército de ``participante_a`` se despliega en el borde izquierdo
+    del terreno y el de ``participante_b`` en el derecho. La clave
+    ``ganador`` contiene el nombre del participante victorioso o ``None``
+    si ambos siguen en pie tras ``max_turnos``.
+    """
+
+    terreno = Terreno(ancho, alto, densidad, densidad_bosque, num_rios, semilla=semilla)
+    campo = CampoBatalla(terreno, modo_movimiento)
+    ejercito_a = crear_participante(participante_a)
+    ejercito_b = crear_participante(participante_b)
+    miembros_a = set(ejercito_a.unidades)
+    campo.colocar_ejercito(ejercito_a)
+    campo.colocar_ejercito(ejercito_b, desde_derecha=True)
+    campo.simular(ejercito_a, ejercito_b, turnos=max_turnos)
+
+    estadisticas = campo.obtener_estadisticas()
+    daños = estadisticas["daño_por_unidad"]
+    daño_a = sum(d for u, d in daños.items() if u in miembros_a)
+    ganador = None
+    if ejercito_a.unidades and not ejercito_b.unidades:
+        ganador = participante_a
+    elif ejercito_b.unidades and not ejercito_a.unidades:
+        ganador = participante_b
+    return {
+        "participantes": [participante_a, participante_b],
+        "semilla": semilla,
+        "ganador": ganador,
+        "turnos": estadisticas["turno_actual"],
+        "daño_total": estadisticas["daño_total"],
+        "curacion_total": estadisticas["curacion_total"],
+        "daño": {
+            participante_a: daño_a,
+            participante_b: estadisticas["daño_total"] - daño_a,
+        },
+    }
+
+
+def _jugar_tarea(tarea: tuple[tuple, dict]) -> dict:
+    argumentos, opciones = tarea
+    return jugar_batalla(*argumentos, **opciones)
+
+
+def generar_tareas(participantes, batallas, semilla, opciones):
+    """Crea las tareas de todos los emparejamientos.
+
+    Los bandos se alternan en cada batalla para compensar la ventaja de
+    desplegarse en uno u otro borde del mapa.
+    """
+
+    tareas = []
+    for a, b in itertools.combinations(participantes, 2):
+        for i in range(batallas):
+            lados = (a, b) if i % 2 == 0 else (b, a)
+            tareas.append(((*lados, semilla + i), opciones))
+    return tareas
+
+
+def resumir(resultados: list[dict]) -> dict:
+    """Agrupa los resultados por emparejamiento y por participante."""
+
+    emparejamientos: dict[tuple[str, str], dict] = {}
+    participantes: dict[str, dict] = {}
+    for r in resultados:
+        clave = tuple(sorted(r["participantes"]))
+        resumen = emparejamientos.setdefault(
+            clave,
+            {
+                "batallas": 0,
+                "empates": 0,
+                "turnos": 0,
+                "victorias": dict.fromkeys(clave, 0),
+                "daño": dict.fromkeys(clave, 0),
+            },
+        )
+        resumen["batallas"] += 1
+        resumen["turnos"] += r["turnos"]
+        if r["ganador"] is None:
+            resumen["empates"] += 1
+        else:
+            resumen["victorias"][r["ganador"]] += 1
+        for nombre in clave:
+            resumen["daño"][nombre] += r["daño"][nombre]
+            total = participantes.setdefault(nombre, {"batallas": 0, "victorias": 0})
+            total["batallas"] += 1
+            total["victorias"] += r["ganador"] == nombre
+
+    for resumen in emparejamientos.values():
+        n = resumen["batallas"]
+        resumen["turnos_medios"] = resumen.pop("turnos") / n
+        resumen["tasa_victoria"] = {k: v / n for k, v in resumen["victorias"].items()}
+        resumen["daño_medio"] = {k: v / n for k, v in resumen["daño"].items()}
+    for total in participantes.values():
+        total["tasa_victoria"] = total["victorias"] / total["batallas"]
+
+    return {
+        "emparejamientos": {" vs ".join(k): v for k, v in emparejamientos.items()},
+        "participantes": participantes,
+    }
+
+
+def imprimir_resumen(resumen: dict) -> None:
+    for nombre, datos in resumen["emparejamientos"].items():
+        a, b = nombre.split(" vs ")
+        print(
+            f"{nombre}: {datos['batallas']} batallas | "
+            f"{a} {datos['tasa_victoria'][a]:.1%} - {b} {datos['tasa_victoria'][b]:.1%} | "
+            f"empates {datos['empates']} | turnos medios {datos['turnos_medios']:.1f} | "
+            f"daño medio {datos['daño_medio'][a]:.1f} / {datos['daño_medio'][b]:.1f}"
+        )
+    print()
+    clasificacion = sorted(
+        resumen["participantes"].items(), key=lambda p: p[1]["tasa_victoria"], reverse=True
+    )
+    for nombre, datos in clasificacion:
+        print(f"{nombre}: {datos['victorias']}/{datos['batallas']} ({datos['tasa_victoria']:.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Juega batallas entre todas las parejas de ejércitos en paralelo"
+    )
+    parser.add_argument("-n", "--batallas", type=int, default=10, help="Batallas por emparejamiento")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla de la primera batalla")
+    parser.add_argument(
+        "--facciones",
+        nargs="*",
+        default=list(FACCIONES),
+        help="Facciones predefinidas participantes",
+    )
+    parser.add_argument(
+        "--ejercitos", nargs="*", default=[], help="Archivos JSON de ejércitos participantes"
+    )
+    parser.add_argument("--ancho", type=int, default=30, help="Ancho del terreno en tiles")
+    parser.add_argument("--alto", type=int, default=30, help="Alto del terreno en tiles")
+    parser.add_argument("--densidad", type=float, default=0.1, help="Densidad de paredes")
+    parser.add_argument("--densidad-bosque", type=float, default=0.1, help="Densidad de bosque")
+    parser.add_argument("--rios", type=int, default=1, help="Número de ríos")
+    parser.add_argument("--max-turnos", type=int, default=300, help="Turnos antes de declarar empate")
+    parser.add_argument(
+        "--modo-movimiento", choices=MODOS_MOVIMIENTO, default="ruta", help="Modo de movimiento"
+    )
+    parser.add_argument(
+        "--trabajadores", type=int, default=os.cpu_count(), help="Procesos simultáneos"
+    )
+    parser.add_argument("--json", help="Ruta donde guardar resultados y resumen")
+    args = parser.parse_args()
+
+    for nombre in args.facciones:
+        if nombre not in FACCIONES:
+            parser.error(f"Facción desconocida: {nombre}")
+    participantes = args.facciones + args.ejercitos
+    if len(participantes) < 2:
+        parser.error("Se necesitan al menos dos participantes")
+
+    opciones = {
+        "ancho": args.ancho,
+        "alto": args.alto,
+        "densidad": args.densidad,
+        "densidad_bosque": args.densidad_bosque,
+        "num_rios": args.rios,
+        "max_turnos": args.max_turnos,
+        "modo_movimiento": args.modo_movimiento,
+    }
+    tareas = generar_tareas(participantes, args.batallas, args.semilla, opciones)
+    trabajadores = max(1, args.trabajadores or 1)
+    bloque = max(1, len(tareas) // (trabajadores * 4))
+    with ProcessPoolExecutor(max_workers=trabajadores) as ejecutor:
+        resultados = list(ejecutor.map(_jugar_tarea, tareas, chunksize=bloque))
+
+    resumen = resumir(resultados)
+    imprimir_resumen(resumen)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as archivo:
+            json.dump(
+                {"resultados": resultados, "resumen": resumen},
+                archivo,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,73 @@
-"""Elementos de interfaz de usuario para el juego."""
+"""Elementos de interfaz de usuario para el juego.
+
+Las fuentes y los textos renderizados se guardan en cachés para no repetir
+búsquedas de ``SysFont`` ni renderizados en cada fotograma, y el panel de
+control se compone en una superficie que solo se redibuja cuando cambia
+alguno de sus textos, valores o el botón bajo el cursor.
+"""
+
+from collections import OrderedDict
 
 import pygame
 
 import constantes as const
 
+# Textos renderizados que se conservan antes de descartar los menos usados
+MAX_TEXTOS_CACHE = 256
+
+_fuentes = {}
+_textos = OrderedDict()
+
+
+def obtener_fuente(tamaño, nombre=None):
+    """Devuelve la fuente del sistema ``nombre`` en ``tamaño``, creada una vez."""
+
+    clave = (nombre, tamaño)
+    fuente = _fuentes.get(clave)
+    if fuente is None:
+        fuente = _fuentes[clave] = pygame.font.SysFont(nombre, tamaño)
+    return fuente
+
+
+def renderizar_texto(texto, tamaño=24, color=const.COLOR_TEXTO, nombre=None):
+    """Devuelve la superficie de ``texto``, reutilizando renderizados previos.
+
+    La caché se indexa por fuente, tamaño, texto y color y descarta en orden
+    LRU a partir de ``MAX_TEXTOS_CACHE`` entradas. La superficie devuelta es
+    compartida y no debe modificarse.
+    """
+
+    clave = (nombre, tamaño, texto, color)
+    superficie = _textos.get(clave)
+    if superficie is None:
+        superficie = obtener_fuente(tamaño, nombre).render(texto, True, color)
+        _textos[clave] = superficie
+        if len(_textos) > MAX_TEXTOS_CACHE:
+            _textos.popitem(last=False)
+    else:
+        _textos.move_to_end(clave)
+    return superficie
+
 
 class Boton:
     def __init__(self, rect, texto, accion):
         self.rect = pygame.Rect(rect)
         self.texto = texto
         self.accion = accion
+        self.resaltado = False
 
     def manejar_evento(self, evento):
         if evento.type == pygame.MOUSEBUTTONDOWN and evento.button == 1:
             if self.rect.collidepoint(evento.pos):
                 self.accion()
+        elif evento.type == pygame.MOUSEMOTION:
+            self.resaltado = self.rect.collidepoint(evento.pos)
 
     def dibujar(self, surface):
-        pygame.draw.rect(surface, (230, 230, 230), self.rect)
+        fondo = (245, 245, 245) if self.resaltado else (230, 230, 230)
+        pygame.draw.rect(surface, fondo, self.rect)
         pygame.draw.rect(surface, (50, 50, 50), self.rect, 2)
-        fuente = pygame.font.SysFont(None, 24)
-        texto = fuente.render(self.texto, True, const.COLOR_TEXTO)
+        texto = renderizar_texto(self.texto)
         surface.blit(texto, texto.get_rect(center=self.rect.center))
 
 
@@ -43,19 +90,47 @@ class Selector(Boton):
         self.callback(self.opciones[self.indice])
 
 
+class _PanelCompuesto:
+    """Superficie del panel de control y estado con el que se dibujó."""
+
+    def __init__(self):
+        self.clave = None
+        self.superficie = None
+
+    def dibujar(self, surface, botones, densidad, num_rios, densidad_bosque):
+        clave = (
+            const.ANCHO,
+            const.ALTO_PANEL,
+            const.TAM_CELDA,
+            densidad,
+            num_rios,
+            densidad_bosque,
+            tuple((b.texto, b.resaltado, tuple(b.rect)) for b in botones),
+        )
+        if clave != self.clave:
+            self.clave = clave
+            self.superficie = self._componer(botones, densidad, num_rios, densidad_bosque)
+        surface.blit(self.superficie, (0, 0))
+
+    @staticmethod
+    def _componer(botones, densidad, num_rios, densidad_bosque):
+        panel = pygame.Surface((const.ANCHO, const.ALTO_PANEL))
+        panel.fill(const.COLOR_PANEL)
+        for boton in botones:
+            boton.dibujar(panel)
+        y = const.ALTO_PANEL - 30
+        panel.blit(renderizar_texto(f"Obstáculos: {densidad:.2f}"), (10, y))
+        panel.blit(renderizar_texto(f"Ríos: {num_rios}"), (200, y))
+        panel.blit(renderizar_texto(f"Bosque: {densidad_bosque:.2f}"), (360, y))
+        panel.blit(renderizar_texto(f"Celda: {const.TAM_CELDA}"), (520, y))
+        return panel
+
+
+_panel = _PanelCompuesto()
+
+
 def dibujar_panel(surface, botones, densidad, num_rios, densidad_bosque):
-    pygame.draw.rect(surface, const.COLOR_PANEL, (0, 0, const.ANCHO, const.ALTO_PANEL))
-    for boton in botones:
-        boton.dibujar(surface)
-    fuente = pygame.font.SysFont(None, 24)
-    texto = fuente.render(f"Obstáculos: {densidad:.2f}", True, const.COLOR_TEXTO)
-    surface.blit(texto, (10, const.ALTO_PANEL - 30))
-    texto = fuente.render(f"Ríos: {num_rios}", True, const.COLOR_TEXTO)
-    surface.blit(texto, (200, const.ALTO_PANEL - 30))
-    texto = fuente.render(f"Bosque: {densidad_bosque:.2f}", True, const.COLOR_TEXTO)
-    surface.blit(texto, (360, const.ALTO_PANEL - 30))
-    texto = fuente.render(f"Celda: {const.TAM_CELDA}", True, const.COLOR_TEXTO)
-    surface.blit(texto, (520, const.ALTO_PANEL - 30))
+    _panel.dibujar(surface, botones, densidad, num_rios, densidad_bosque)
 
 
 def mostrar_tooltip(surface, unidad, pos):
@@ -67,12 +142,12 @@ def mostrar_tooltip(surface, unidad, pos):
         Superficie sobre la que se dibuja el tooltip.
     unidad:
         Objeto que posee atributos ``salud``, ``ataque``, ``defensa``,
-        ``velocidad`` y ``alcance``.
+        ``velocidad`` y ``alcance``, como la instantánea
+        :class:`batalla.simulacion_hilo.EstadoUnidad`.
     pos:
         Tupla ``(x, y)`` indicando la posición donde mostrar el tooltip.
     """
 
-    fuente = pygame.font.SysFont(None, 20)
     lineas = [
         f"Salud: {unidad.salud}",
         f"Ataque: {unidad.ataque}",
@@ -80,7 +155,7 @@ def mostrar_tooltip(surface, unidad, pos):
         f"Velocidad: {unidad.velocidad}",
         f"Alcance: {unidad.alcance}",
     ]
-    textos = [fuente.render(t, True, const.COLOR_TEXTO) for t in lineas]
+    textos = [renderizar_texto(t, 20) for t in lineas]
     ancho = max(t.get_width() for t in textos) + 10
     alto = sum(t.get_height() for t in textos) + 10
     x, y = pos